@@ -0,0 +1,196 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+from time import perf_counter
+
+import numpy as np
+import pyglet
+
+# offscreen first, it makes pyglet headless before any GL is loaded
+import offscreen
+from pyglet import gl
+from pyglet.graphics.shader import ShaderProgram
+
+import buffers
+import timers
+
+
+""" BENCH """
+""" Frame cost of every scene script, measured without a window.
+    Each script runs in a process of its own, so one's memory and GL
+    state cannot colour the next. update() is stepped with a fixed dt
+    and on_draw draws into an offscreen framebuffer the size of the
+    window. Per frame it records the CPU time of update() and the part
+    of it spent uploading uniforms and buffers (upload_ms), the CPU time
+    of on_draw and the part of that spent on uploads (draw_upload_ms,
+    uniforms set in before_draw hooks), and the GPU time of on_draw from
+    a timer query; per scene the peak resident memory. The results go
+    to a JSON file, to be compared between runs.
+    Usage: python bench.py [octahedron ...] --frames 600 --out bench.json
+"""
+
+# every script that draws a scene
+scripts = ('compound_of_10_tetrahedra', 'compound_of_10_tetrahedra_2',
+           'compound_of_5_cubes', 'compound_of_5_tetrahedra', 'conway_solid',
+           'dodecahedron', 'dodecahedron_2', 'dodecahedron_3',
+           'dodecahedron_4', 'geodesic_sphere', 'icosahedron', 'instanced',
+           'octahedron', 'octahedron-mobius')
+
+
+def _peak_rss():
+    """Peak resident memory of this process in MB, None if unknown."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def _summary(seconds):
+    """Mean, median, 95th percentile and worst of per-frame times, in ms."""
+    ms = np.asarray(seconds) * 1000
+    return {'mean': round(float(ms.mean()), 4),
+            'median': round(float(np.median(ms)), 4),
+            'p95': round(float(np.percentile(ms, 95)), 4),
+            'max': round(float(ms.max()), 4)}
+
+
+def measure(script, frames=600, dt=1/60, warmup=30):
+    """Timings of frames frames of a scene script, after warmup frames.
+
+    Meant to run in a process of its own (see run()).
+    """
+    uploaded = [0.0]
+    set_uniform = ShaderProgram.__setitem__
+    upload = buffers.upload
+
+    # uniform and buffer uploads, wherever the script makes them
+    def timed_uniform(program, key, value):
+        start = perf_counter()
+        set_uniform(program, key, value)
+        uploaded[0] += perf_counter() - start
+
+    def timed_upload(*args, **kwargs):
+        start = perf_counter()
+        upload(*args, **kwargs)
+        uploaded[0] += perf_counter() - start
+
+    ShaderProgram.__setitem__ = timed_uniform
+    buffers.upload = timed_upload
+    before = _peak_rss()
+    load_start = perf_counter()
+    window, callbacks = offscreen.load(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                     script + '.py'))
+    load_time = perf_counter() - load_start
+    window.switch_to()
+    width, height = window.get_framebuffer_size()
+    target = offscreen.Framebuffer(width, height)
+    queries = timers.TimerQueries()
+
+    update_times, upload_times, draw_times, gpu_times = [], [], [], []
+    draw_upload_times = []
+    try:
+        for frame in range(warmup + frames):
+            uploaded[0] = 0.0
+            start = perf_counter()
+            for callback in callbacks:
+                callback(dt)
+            updated = perf_counter()
+            update_uploads, uploaded[0] = uploaded[0], 0.0
+            target.bind()
+            queries.begin(frame)
+            pyglet.event.EventDispatcher.dispatch_event(window, 'on_draw')
+            queries.end()
+            drawn = perf_counter()
+            if frame >= warmup:
+                update_times.append(updated - start)
+                upload_times.append(update_uploads)
+                draw_times.append(drawn - updated)
+                draw_upload_times.append(uploaded[0])
+            gpu_times += [elapsed for number, elapsed in queries.collect()
+                          if number >= warmup]
+        gl.glFinish()
+        gpu_times += [elapsed for number, elapsed in queries.collect(True)
+                      if number >= warmup]
+    finally:
+        ShaderProgram.__setitem__ = set_uniform
+        buffers.upload = upload
+        queries.delete()
+        target.unbind()
+        target.delete()
+        window.close()
+
+    peak = _peak_rss()
+    return {
+        'frames': frames,
+        'size': [width, height],
+        'load_ms': round(load_time * 1000, 2),
+        'update_ms': _summary(update_times),
+        'upload_ms': _summary(upload_times),
+        'draw_ms': _summary(draw_times),
+        'draw_upload_ms': _summary(draw_upload_times),
+        'gpu_ms': _summary(np.asarray(gpu_times) / 1e9),
+        'peak_rss_mb': None if peak is None else round(peak, 1),
+        'scene_rss_mb': None if peak is None else round(peak - before, 1),
+    }
+
+
+def _renderer():
+    # the window is never shown; it only carries the GL context
+    pyglet.window.Window(16, 16, visible=False).switch_to()
+    return {'vendor': gl.gl_info.get_vendor(),
+            'renderer': gl.gl_info.get_renderer(),
+            'version': gl.gl_info.get_version_string()}
+
+
+def run(names=scripts, frames=600, dt=1/60):
+    """Measure each script in a fresh process; returns the JSON report."""
+    # spawn: every script starts from a clean interpreter
+    context = multiprocessing.get_context('spawn')
+    report = {
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pyglet': pyglet.version,
+        'numpy': np.__version__,
+        'machine': platform.platform(),
+        'cpus': os.cpu_count(),
+        'dt': dt,
+        'scenes': {},
+    }
+    for name in names:
+        with context.Pool(1) as pool:
+            if 'gl' not in report:
+                report['gl'] = pool.apply(_renderer)
+            report['scenes'][name] = pool.apply(measure, (name, frames, dt))
+        scene = report['scenes'][name]
+        print("%-28s update %7.3f  upload %7.3f  draw %7.3f  upload %7.3f"
+              "  gpu %7.3f ms"
+              % (name, scene['update_ms']['mean'],
+                 scene['upload_ms']['mean'], scene['draw_ms']['mean'],
+                 scene['draw_upload_ms']['mean'], scene['gpu_ms']['mean']))
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Time update(), uploads and drawing of scene scripts.")
+    parser.add_argument('scenes', nargs='*',
+                        help="default: all of %s" % ', '.join(scripts))
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--dt', type=float, default=1/60)
+    parser.add_argument('--out', default='bench.json')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    names = [name.removesuffix('.py') for name in args.scenes] or scripts
+    report = run(names, args.frames, args.dt)
+    with open(args.out, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(args.out)
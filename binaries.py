@@ -0,0 +1,186 @@
+import ctypes
+import hashlib
+import os
+import struct
+from time import perf_counter
+
+import pyglet
+from pyglet import gl
+from pyglet.graphics.shader import Shader, ShaderException, ShaderProgram
+
+try:
+    # private: a program made from a binary is set up as pyglet sets up
+    # the ones it links, with these
+    from pyglet.graphics.shader import (_introspect_attributes,
+                                        _introspect_uniform_blocks,
+                                        _introspect_uniforms)
+except ImportError:
+    # a pyglet without them: every program is compiled, none cached
+    _introspect_attributes = None
+
+
+""" BINARIES """
+""" Linked shader programs kept on disk, so later launches skip compiling.
+    A program is stored under a hash of its sources and of the driver's
+    vendor, renderer and version strings; a new driver gets new files.
+    The driver may still turn a binary down (it is free to, e.g. after
+    an update that kept the version string), and then the sources are
+    compiled as before and the file written again.
+    Each file keeps the time the compile took, so a load can tell how
+    much it saved; stats adds it up for the process.
+    Set cache_dir to None to always compile. A pyglet release without
+    the private helpers CachedProgram relies on compiles always too.
+"""
+
+cache_dir = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'polyhedra', 'programs')
+
+# programs loaded and compiled, and seconds saved by the loads
+stats = {'loaded': 0, 'compiled': 0, 'rejected': 0, 'saved': 0.0}
+
+# binary format, then seconds the compile took
+_header = struct.Struct('<Id')
+
+
+class CachedProgram(ShaderProgram):
+    """ShaderProgram linked from shaders, or made from a program binary.
+
+    binary is (format, bytes) as given by binary().
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *shaders, binary=None):
+        self._id = None
+        program_id = gl.glCreateProgram()
+        if binary is None:
+            # some drivers only keep a binary when asked before linking
+            gl.glProgramParameteri(program_id,
+                                   gl.GL_PROGRAM_BINARY_RETRIEVABLE_HINT,
+                                   gl.GL_TRUE)
+            for shader in shaders:
+                gl.glAttachShader(program_id, shader.id)
+            gl.glLinkProgram(program_id)
+            for shader in shaders:
+                gl.glDetachShader(program_id, shader.id)
+        else:
+            binary_format, data = binary
+            gl.glProgramBinary(program_id, binary_format, data, len(data))
+
+        status = gl.GLint()
+        gl.glGetProgramiv(program_id, gl.GL_LINK_STATUS, status)
+        if not status.value:
+            length = gl.GLint()
+            gl.glGetProgramiv(program_id, gl.GL_INFO_LOG_LENGTH, length)
+            log = ctypes.create_string_buffer(max(1, length.value))
+            gl.glGetProgramInfoLog(program_id, len(log), None, log)
+            gl.glDeleteProgram(program_id)
+            raise ShaderException("Error linking shader program:\n%s"
+                                  % log.value.decode(errors='replace'))
+
+        # as ShaderProgram.__init__ does after linking
+        self._id = program_id
+        self._context = pyglet.gl.current_context
+        have_dsa = (gl.gl_info.have_version(4, 1) or gl.gl_info.have_extension(
+            'GL_ARB_separate_shader_objects'))
+        self._attributes = _introspect_attributes(program_id)
+        self._uniforms = _introspect_uniforms(program_id, have_dsa)
+        self._uniform_blocks = _introspect_uniform_blocks(self)
+
+    def binary(self):
+        """(format, bytes) of the linked program, or None if not given."""
+        length = gl.GLint()
+        gl.glGetProgramiv(self._id, gl.GL_PROGRAM_BINARY_LENGTH, length)
+        if not length.value:
+            return None
+        data = ctypes.create_string_buffer(length.value)
+        binary_format = gl.GLenum()
+        gl.glGetProgramBinary(self._id, length.value, None, binary_format,
+                              data)
+        return binary_format.value, data.raw
+
+
+def supported():
+    """Whether the current context can save and load program binaries."""
+    count = gl.GLint()
+    gl.glGetIntegerv(gl.GL_NUM_PROGRAM_BINARY_FORMATS, count)
+    return count.value > 0
+
+
+def cache_path(vertex, fragment):
+    """The file the program of vertex and fragment is kept in."""
+    key = hashlib.sha256()
+    for part in (gl.gl_info.get_vendor(), gl.gl_info.get_renderer(),
+                 gl.gl_info.get_version_string(), vertex, fragment):
+        key.update(part.encode())
+        # so moving text from one part to the next changes the key
+        key.update(b'\0')
+    return os.path.join(cache_dir, key.hexdigest() + '.bin')
+
+
+def compile_program(vertex, fragment):
+    """(program, seconds) for vertex and fragment sources, compiled."""
+    start = perf_counter()
+    kind = ShaderProgram if _introspect_attributes is None else CachedProgram
+    program = kind(Shader(vertex, 'vertex'), Shader(fragment, 'fragment'))
+    return program, perf_counter() - start
+
+
+def program(vertex, fragment):
+    """Program of vertex and fragment, from the cache if it is there."""
+    if cache_dir is None or _introspect_attributes is None \
+            or not supported():
+        stats['compiled'] += 1
+        return compile_program(vertex, fragment)[0]
+
+    path = cache_path(vertex, fragment)
+    try:
+        with open(path, 'rb') as file:
+            binary_format, compile_time = _header.unpack(
+                file.read(_header.size))
+            data = file.read()
+    except (OSError, struct.error):
+        pass
+    else:
+        start = perf_counter()
+        try:
+            loaded = CachedProgram(binary=(binary_format, data))
+        except (ShaderException, gl.GLException):
+            # e.g. a driver update; compiled again and saved below
+            stats['rejected'] += 1
+        else:
+            stats['loaded'] += 1
+            # a load can be slower than a quick compile: no time saved
+            stats['saved'] += max(0.0,
+                                  compile_time - (perf_counter() - start))
+            return loaded
+
+    compiled, compile_time = compile_program(vertex, fragment)
+    stats['compiled'] += 1
+    binary = compiled.binary()
+    if binary is not None:
+        _save(path, binary, compile_time)
+    return compiled
+
+
+def _save(path, binary, compile_time):
+    binary_format, data = binary
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # written whole then renamed, as farm workers may race to save
+        temporary = '%s.%d' % (path, os.getpid())
+        with open(temporary, 'wb') as file:
+            file.write(_header.pack(binary_format, compile_time))
+            file.write(data)
+        os.replace(temporary, path)
+    except OSError:
+        # a read-only home only costs the compile next time
+        pass
+
+
+def report():
+    """One line on what the cache did in this process."""
+    return ("programs: %d loaded, %d compiled, %d rejected, %.1f ms saved"
+            % (stats['loaded'], stats['compiled'], stats['rejected'],
+               stats['saved'] * 1000))
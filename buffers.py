@@ -0,0 +1,114 @@
+import ctypes
+
+import numpy as np
+from pyglet import gl
+
+
+""" BUFFERS """
+""" OpenGL buffer objects filled straight from NumPy arrays.
+    pyglet's vertex lists copy data element by element into their own
+    arrays; these helpers hand the array memory to the driver in one call.
+"""
+
+_gl_types = {
+    np.dtype(np.float32): gl.GL_FLOAT,
+    np.dtype(np.uint8): gl.GL_UNSIGNED_BYTE,
+    np.dtype(np.uint16): gl.GL_UNSIGNED_SHORT,
+    np.dtype(np.uint32): gl.GL_UNSIGNED_INT,
+    np.dtype(np.int32): gl.GL_INT,
+}
+
+
+def gl_type(dtype):
+    """OpenGL type enum for a NumPy dtype."""
+    return _gl_types[np.dtype(dtype)]
+
+
+def create_buffer(data=None, size=None, target=gl.GL_ARRAY_BUFFER,
+                  usage=gl.GL_STATIC_DRAW):
+    """New buffer object holding data, or size bytes left undefined."""
+    buffer = gl.GLuint()
+    gl.glGenBuffers(1, ctypes.byref(buffer))
+    gl.glBindBuffer(target, buffer)
+    if data is not None:
+        data = np.ascontiguousarray(data)
+        gl.glBufferData(target, data.nbytes, data.ctypes.data, usage)
+    else:
+        gl.glBufferData(target, size, None, usage)
+    return buffer
+
+
+def upload(buffer, data, offset=0, target=gl.GL_ARRAY_BUFFER):
+    """Copy data into the buffer at byte offset, without reallocating."""
+    data = np.ascontiguousarray(data)
+    gl.glBindBuffer(target, buffer)
+    gl.glBufferSubData(target, offset, data.nbytes, data.ctypes.data)
+
+
+def delete_buffer(buffer):
+    gl.glDeleteBuffers(1, ctypes.byref(buffer))
+
+
+def create_vertex_array():
+    """New vertex array object, left bound."""
+    vao = gl.GLuint()
+    gl.glGenVertexArrays(1, ctypes.byref(vao))
+    gl.glBindVertexArray(vao)
+    return vao
+
+
+def delete_vertex_array(vao):
+    gl.glDeleteVertexArrays(1, ctypes.byref(vao))
+
+
+def attribute(location, buffer, count, dtype, stride=0, offset=0,
+              normalize=False, divisor=0):
+    """Feed a shader attribute from the buffer, in the bound vertex array.
+
+    A divisor of 1 advances the attribute once per instance instead of
+    once per vertex.
+    """
+    gl.glBindBuffer(gl.GL_ARRAY_BUFFER, buffer)
+    gl.glEnableVertexAttribArray(location)
+    gl.glVertexAttribPointer(location, count, gl_type(dtype), normalize,
+                             stride, ctypes.c_void_p(offset))
+    gl.glVertexAttribDivisor(location, divisor)
+
+
+# rows of a colour table, so tables longer than the largest texture
+# width still fit
+TABLE_WIDTH = 1024
+
+
+def create_color_table(colors):
+    """Texture of (n, 4) uint8 colours, TABLE_WIDTH to a row.
+
+    Colour i is read in a shader with
+    texelFetch(table, ivec2(i % 1024, i / 1024), 0).
+    """
+    colors = np.asarray(colors, dtype=np.uint8).reshape(-1, 4)
+    height = -(-len(colors) // TABLE_WIDTH)
+    width = min(len(colors), TABLE_WIDTH)
+    table = np.zeros((height * width, 4), dtype=np.uint8)
+    table[:len(colors)] = colors
+    texture = gl.GLuint()
+    gl.glGenTextures(1, ctypes.byref(texture))
+    gl.glBindTexture(gl.GL_TEXTURE_2D, texture)
+    gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 1)
+    gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGBA8, width, height, 0,
+                    gl.GL_RGBA, gl.GL_UNSIGNED_BYTE, table.ctypes.data)
+    gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER,
+                       gl.GL_NEAREST)
+    gl.glTexParameteri(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER,
+                       gl.GL_NEAREST)
+    return texture
+
+
+def bind_texture(texture, unit=0):
+    """Bind a 2D texture to a texture unit, for a sampler2D uniform."""
+    gl.glActiveTexture(gl.GL_TEXTURE0 + unit)
+    gl.glBindTexture(gl.GL_TEXTURE_2D, texture)
+
+
+def delete_texture(texture):
+    gl.glDeleteTextures(1, ctypes.byref(texture))
@@ -1,14 +1,13 @@
-import pyglet
-from pyglet.graphics.shader import Shader, ShaderProgram
 # from pyglet.gl import GL_LINES
-from pyglet.gl import (GL_DEPTH_TEST,
-                       GL_TRIANGLES,
+from pyglet.gl import (GL_TRIANGLES,
                        GL_LINES,
                        GL_POINTS)
 # from pyglet.gl import GL_POINT_SIZE
-from pyglet.gl import glClearColor, glEnable, glLineWidth, glPointSize
 from pyglet.math import Mat4, Vec3
-from math import sqrt
+
+import geometry
+import scene
+import symmetry
 
 
 """ FIVE TETRAHEDRA """
@@ -16,48 +15,7 @@ from math import sqrt
     Vertices of the tetrahedra have dodecahedral symmetry.
 """
 
-window = pyglet.window.Window(1280, 720, caption="FIVE TERTAHEDRA")
-glEnable(GL_DEPTH_TEST)
-# set window background colour
-glClearColor(1.0, 1.0, 1.0, 1.0)
-glLineWidth(1)
-glPointSize(10)
-
-
-# create the vertex source and fragment source
-vertex_source = """
-#version 330
-layout(location = 0) in vec3 vertices;
-layout(location = 1) in vec4 colors;
-
-out vec4 newColor;
-
-uniform mat4 vp;
-uniform mat4 model;
-
-void main()
-{
-    gl_Position = vp * model * vec4(vertices, 1.0f);
-    newColor = colors;
-}
-"""
-
-fragment_source = """
-#version 330
-in vec4 newColor;
-
-out vec4 outColor;
-
-void main()
-{
-    outColor = newColor;
-}
-"""
-
-# compile vertex source and fragment source into the shader program
-vert_shader = Shader(vertex_source, 'vertex')
-frag_shader = Shader(fragment_source, 'fragment')
-program = ShaderProgram(vert_shader, frag_shader)
+caption = "FIVE TERTAHEDRA"
 
 # view_mat seems to be position of eye
 view_mat = Mat4.from_translation(Vec3(x=0, y=0, z=-200))
@@ -67,245 +25,59 @@ proj_mat = Mat4.orthogonal_projection(left=0, right=1280,
 
 vp = proj_mat @ view_mat
 
-program['vp'] = vp
-
 # create the translation matrix
 translate_mat = Mat4.from_translation(vector=Vec3(x=640, y=360, z=0))
 
-program['model'] = translate_mat
-
-batch = pyglet.graphics.Batch()
-
-# Regular dodecahedron built on golden ratio (ref wikipedia.com/dodecahedron)
-h = 2.0 / (1.0 + sqrt(5.0))                 # approx 0.618
-h2 = h * h
-
-# Vertices are defined (ref wikipedia)
-vertices = [
-    -1, -1, -1,                 # vertex 0
-    1, -1, -1,
-    1,  1, -1,
-    -1,  1, -1,                 # 3
-
-    -1, -1,  1,                 # 4
-    1, -1,  1,
-    1,  1,  1,
-    -1,  1,  1,                 # 7
+# spun around all axes at once, one radian per second about each
+rates = (1.0, 1.0, 1.0)
+line_width = 1
+point_size = 10
 
-    0, -(1+h), -(1-h2),         # 8
-    0, -(1+h),  (1-h2),         # 9
-    0,  (1+h),  (1-h2),
-    0,  (1+h), -(1-h2),
+# Regular dodecahedron built on golden ratio (ref geometry.py)
+vertices = geometry.vertices('dodecahedron', scale=100).ravel()
 
-    -(1+h), -(1-h2), 0,
-    -(1+h),  (1-h2), 0,         # 13
-    (1+h),  (1-h2), 0,
-    (1+h), -(1-h2), 0,          # 15
+# embedded tetrahedra each having 4 faces, turned into place by the
+# rotations of the dodecahedron and their mirror images (ref symmetry.py)
+tetrahedra = symmetry.compound(
+    geometry.vertices('tetrahedron'),
+    symmetry.with_inversion(symmetry.rotations('icosahedral')))
+tetrahedra = symmetry.indices_into(tetrahedra,
+                                   geometry.vertices('dodecahedron'))
+faces = tetrahedra[:, geometry.faces('tetrahedron')].reshape(10, -1).tolist()
+(indices_grn, indices_red, indices_ora, indices_yel, indices_blu,
+ indices_yel_2, indices_ora_2, indices_red_2, indices_grn_2,
+ indices_blu_2) = faces
 
-    -(1-h2), 0, -(1+h),
-    -(1-h2), 0,  (1+h),
-    (1-h2), 0,  (1+h),
-    (1-h2), 0, -(1+h)           # vertex 19
-]
-
-# embedded tetrahedra each having 4 faces
-indices_red = [
-    10, 19, 5,
-    10, 19, 12,
-    10, 5, 12,
-    19, 5, 12
-]
-indices_blu = [
-    11, 15, 17,
-    11, 15, 0,
-    11, 17, 0,
-    15, 17, 0
-]
-indices_ora = [
-    2, 18, 13,
-    2, 18, 8,
-    2, 13, 8,
-    18, 13, 8
-]
-indices_yel = [
-    14, 7, 16,
-    14, 7, 9,
-    14, 16, 9,
-    7, 16, 9
-]
-indices_grn = [
-    6, 3, 1,
-    6, 3, 4,
-    6, 1, 4,
-    3, 1, 4
-]
-
-indices_red_2 = [
-    10,	15,	16,
-    10,	15,	4,
-    10,	16,	4,
-    15,	16,	4
-]
-indices_blu_2 = [
-    6,	19,	13,
-    6,	19,	9,
-    6,	13,	9,
-    19,	13,	9
-]
-indices_ora_2 = [
-    14,	3,	17,
-    14,	3,	8,
-    14,	17,	8,
-    3,	17,	8
-]
-indices_yel_2 = [
-    2,	7,	5,
-    2,	7,	0,
-    2,	5,	0,
-    7,	5,	0,
-]
-indices_grn_2 = [
-    11,	18,	1,
-    11,	18,	12,
-    11,	1,	12,
-    18,	1,	12,
-]
-
-edge_indices = [
-    10, 19, 10, 12, 10, 5, 5, 19, 19, 12, 12, 5,
-    2, 18, 2, 13, 2, 8, 8, 13, 13, 18, 18, 8,
-    11, 15, 11, 0, 11, 17, 17, 0, 0, 15, 15, 17,
-    14, 7, 14, 16, 14, 9, 9, 16, 16, 7, 7, 9,
-
-    6, 3, 6, 1, 6, 4, 4, 1, 1, 3, 3, 4
-]
+edge_indices = tetrahedra[:5, geometry.edges('tetrahedron')].ravel().tolist()
 
 
 # Just some colours
-red_colors = (255, 0, 0, 255) * 20
-grn_colors = (0, 200, 0, 255) * 20
-blu_colors = (0, 0, 255, 255) * 20
-ora_colors = (255, 127, 0, 255) * 20
-yel_colors = (255, 255, 0, 255) * 20
-
-point_colors = (0, 0, 0, 255) * 20
-edge_colors = (255, 127, 127, 255) * 20
-
-# # Scale up the vertices
-vertices = [v * 100 for v in vertices]
-
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_red,
-    vertices=('f', vertices),
-    colors=('Bn', red_colors)
-)
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_blu,
-    vertices=('f', vertices),
-    colors=('Bn', blu_colors)
-)
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_ora,
-    vertices=('f', vertices),
-    colors=('Bn', ora_colors)
-)
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_yel,
-    vertices=('f', vertices),
-    colors=('Bn', yel_colors)
-)
-
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_red_2,
-    vertices=('f', vertices),
-    colors=('Bn', red_colors)
-)
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_blu_2,
-    vertices=('f', vertices),
-    colors=('Bn', blu_colors)
-)
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_ora_2,
-    vertices=('f', vertices),
-    colors=('Bn', ora_colors)
-)
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_yel_2,
-    vertices=('f', vertices),
-    colors=('Bn', yel_colors)
-)
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_grn_2,
-    vertices=('f', vertices),
-    colors=('Bn', grn_colors)
-)
-program.vertex_list_indexed(
-    20,
-    GL_LINES,
-    batch=batch,
-    indices=edge_indices,
-    vertices=('f', vertices),
-    colors=('Bn', edge_colors)
-)
-
-# draw the cube edges, all one colours
-program.vertex_list(
-    20,
-    GL_POINTS,
-    batch=batch,
-    vertices=('f', vertices),
-    colors=('Bn', point_colors)
-)
-
-
-@window.event
-def on_draw():
-    window.clear()
-    batch.draw()
-
-
-angle = 0
-
-
-def update(dt: float):
-    global angle
-    angle += dt
-    # spin it around all axes
-    rotate_x_mat = Mat4.from_rotation(angle=angle, vector=Vec3(x=1, y=0, z=0))
-    rotate_y_mat = Mat4.from_rotation(angle=angle, vector=Vec3(x=0, y=1, z=0))
-    rotate_z_mat = Mat4.from_rotation(angle=angle, vector=Vec3(x=0, y=0, z=1))
-    # upload the combined model matrix to the vertex shader model uniform
-    model_mat = translate_mat @ rotate_x_mat @ rotate_y_mat @ rotate_z_mat
-    program['model'] = model_mat
-
-
-pyglet.clock.schedule_interval(update, 1/60)
-pyglet.app.run()
+red_colors = (255, 0, 0, 255)
+grn_colors = (0, 200, 0, 255)
+blu_colors = (0, 0, 255, 255)
+ora_colors = (255, 127, 0, 255)
+yel_colors = (255, 255, 0, 255)
+
+point_colors = (0, 0, 0, 255)
+edge_colors = (255, 127, 127, 255)
+
+
+# faces, edges and points in one buffer (ref scene.py)
+layers = scene.Scene()
+layers.add(GL_TRIANGLES, vertices, red_colors, indices_red)
+layers.add(GL_TRIANGLES, vertices, blu_colors, indices_blu)
+layers.add(GL_TRIANGLES, vertices, ora_colors, indices_ora)
+layers.add(GL_TRIANGLES, vertices, yel_colors, indices_yel)
+layers.add(GL_TRIANGLES, vertices, red_colors, indices_red_2)
+layers.add(GL_TRIANGLES, vertices, blu_colors, indices_blu_2)
+layers.add(GL_TRIANGLES, vertices, ora_colors, indices_ora_2)
+layers.add(GL_TRIANGLES, vertices, yel_colors, indices_yel_2)
+layers.add(GL_TRIANGLES, vertices, grn_colors, indices_grn_2)
+layers.add(GL_LINES, vertices, edge_colors, edge_indices)
+# the dodecahedron vertices as points
+layers.add(GL_POINTS, vertices, point_colors)
+
+# the data above needs no window, so other tools can import the scene
+if __name__ == '__main__':
+    import polyhedra
+    polyhedra.main(['compound_of_10_tetrahedra_2'])
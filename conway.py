@@ -0,0 +1,320 @@
+import argparse
+import sys
+from time import perf_counter
+
+import numpy as np
+
+import geometry
+
+
+""" CONWAY """
+""" Conway's operators on polyhedra, done on whole arrays at once.
+    A mesh is its faces one after the other in corners, sizes[f] corners
+    to a face. Corner h is also the half-edge from corners[h] to the next
+    corner of its face, so next, prev, face and twin (the same edge run
+    the other way) are arrays over the half-edges, and every operator is
+    a few gathers over them:
+        d  dual       a vertex per face, a face per vertex
+        a  ambo       a vertex per edge
+        k  kis        every face a pyramid of triangles
+        g  gyro       every face n pentagons
+        t  truncate   every point cut off, a face in its place (dkd)
+        e  expand     aa
+        s  snub       dgd
+    Expressions read right to left from a seed, T C O D or I:
+        conway.apply('tkD')     truncated pentakis dodecahedron
+    Points are rescaled to a mean distance of 1 from the origin after
+    every operator, faces are counter-clockwise seen from outside.
+    Operators keep faces flat and the seeds convex: t cuts with planes,
+    k keeps its apexes low enough and g solves for flat pentagons;
+    python conway.py --check tests every operator on every seed.
+"""
+
+seeds = {'T': 'tetrahedron', 'C': 'cube', 'O': 'octahedron',
+         'D': 'dodecahedron', 'I': 'icosahedron'}
+
+
+class Mesh:
+    """Polygon faces over points, with the half-edge arrays worked out."""
+
+    def __init__(self, points, corners, sizes):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        self.corners = np.asarray(corners, dtype=np.int64)
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        half_edges = len(self.corners)
+        self.start = np.cumsum(self.sizes) - self.sizes
+        self.face = np.repeat(np.arange(len(self.sizes)), self.sizes)
+        last = self.start + self.sizes - 1
+        self.next = np.arange(1, half_edges + 1)
+        self.next[last] = self.start
+        self.prev = np.arange(-1, half_edges - 1)
+        self.prev[self.start] = last
+        self.end = self.corners[self.next]
+
+        # the twin of a->b is b->a: on a closed surface the keys of b->a
+        # are those of a->b in another order, so sorting both pairs them
+        count = len(self.points)
+        self.twin = np.empty(half_edges, dtype=np.int64)
+        self.twin[np.argsort(self.end * count + self.corners)] = \
+            np.argsort(self.corners * count + self.end)
+        if ((self.corners[self.twin] != self.end)
+                | (self.end[self.twin] != self.corners)).any():
+            raise ValueError("not a closed surface: some edge has one face")
+
+        # the edge of a half-edge, numbered through its lower half-edge
+        lower = np.arange(half_edges) < self.twin
+        number = np.cumsum(lower) - 1
+        self.edge = number[np.minimum(np.arange(half_edges), self.twin)]
+
+    @classmethod
+    def from_faces(cls, points, faces):
+        """Mesh of an (f, k) array of faces, all of k corners."""
+        faces = np.asarray(faces)
+        return cls(points, faces.ravel(),
+                   np.full(len(faces), faces.shape[1]))
+
+    def around(self, values):
+        """values[h] for the half-edges leaving each point, as faces.
+
+        The half-edges of a point go counter-clockwise round it, seen
+        from outside; returns (corners, sizes).
+        """
+        # twin of prev leaves the same point, one face further round
+        step = self.twin[self.prev]
+        sizes = np.bincount(self.corners, minlength=len(self.points))
+        # any half-edge leaving each point to start from
+        first = np.empty(len(self.points), dtype=np.int64)
+        first[self.corners] = np.arange(len(self.corners))
+        walk = np.empty((len(first), sizes.max()), dtype=np.int64)
+        current = first
+        for column in range(sizes.max()):
+            walk[:, column] = values[current]
+            current = step[current]
+        return walk[np.arange(sizes.max()) < sizes[:, None]], sizes
+
+    def centroids(self):
+        """(f, 3) mean of the corners of every face."""
+        total = np.column_stack([
+            np.bincount(self.face, self.points[self.corners, axis],
+                        minlength=len(self.sizes)) for axis in range(3)])
+        return total / self.sizes[:, None]
+
+    def normals(self):
+        """(f, 3) unit normals, by Newell's method so any face will do."""
+        cross = np.cross(self.points[self.corners], self.points[self.end])
+        total = np.column_stack([
+            np.bincount(self.face, cross[:, axis],
+                        minlength=len(self.sizes)) for axis in range(3)])
+        return total / np.linalg.norm(total, axis=1)[:, None]
+
+    def convex(self, tolerance=1e-6):
+        """Whether every face has all the points on or behind its plane,
+        and faces outward, away from the origin."""
+        normals = self.normals()
+        offsets = np.einsum('ij,ij->i', normals, self.centroids())
+        if (offsets <= tolerance).any():
+            return False
+        above = self.points @ normals.T - offsets
+        return bool((above <= tolerance).all())
+
+    def edges(self):
+        """(m, 2) uint32 point pairs, one per edge."""
+        lower = np.arange(len(self.corners)) < self.twin
+        return np.column_stack([self.corners[lower],
+                                self.end[lower]]).astype(np.uint32)
+
+    def triangles(self):
+        """(t, 3) uint32 indices into corners, every face as a fan.
+
+        Index corners (or points[corners]) with them; that way every
+        face can keep colours of its own.
+        """
+        inner = np.arange(len(self.corners))
+        inner = inner[(inner != self.start[self.face])
+                      & (self.next != self.start[self.face])]
+        return np.column_stack([self.start[self.face[inner]], inner,
+                                self.next[inner]]).astype(np.uint32)
+
+
+def _rescaled(points):
+    return points / np.linalg.norm(points, axis=1).mean()
+
+
+def seed(letter):
+    """Mesh of a platonic solid: T, C, O, D or I."""
+    name = seeds[letter]
+    return Mesh.from_faces(_rescaled(geometry.vertices(name).astype(
+        np.float64)), geometry.faces(name).astype(np.int64))
+
+
+def dual(mesh):
+    """A point per face, the pole of its plane; a face per point."""
+    normals = mesh.normals()
+    centroids = mesh.centroids()
+    poles = normals / np.einsum('ij,ij->i', normals, centroids)[:, None]
+    corners, sizes = mesh.around(mesh.face)
+    return Mesh(_rescaled(poles), corners, sizes)
+
+
+def ambo(mesh):
+    """A point at the middle of every edge; faces as cut down to them,
+    and a face where every point was."""
+    count = mesh.edge.max() + 1
+    middles = np.empty((count, 3))
+    middles[mesh.edge] = (mesh.points[mesh.corners]
+                          + mesh.points[mesh.end]) / 2
+    around, sizes = mesh.around(mesh.edge)
+    return Mesh(_rescaled(middles),
+                np.concatenate([mesh.edge, around]),
+                np.concatenate([mesh.sizes, sizes]))
+
+
+def kis(mesh):
+    """Every face a pyramid over its centroid.
+
+    An apex is raised until its triangles lean a third of the way to the
+    faces next door, at the edge where that comes first; both sides of
+    an edge then lean less than the angle between them, so the solid
+    stays convex (on the circumsphere, kT is a flat sided cube).
+    """
+    centroids = mesh.centroids()
+    normals = mesh.normals()
+    # the angle each edge turns through, and its distance from the centre
+    turn = np.arccos(np.clip(np.einsum(
+        'ij,ij->i', normals[mesh.face], normals[mesh.face[mesh.twin]]),
+        -1, 1))
+    start = mesh.points[mesh.corners]
+    along = mesh.points[mesh.end] - start
+    along /= np.linalg.norm(along, axis=1)[:, None]
+    offset = centroids[mesh.face] - start
+    offset -= np.einsum('ij,ij->i', offset, along)[:, None] * along
+    height = np.full(len(mesh.sizes), np.inf)
+    np.minimum.at(height, mesh.face,
+                  np.linalg.norm(offset, axis=1) * np.tan(turn / 3))
+    apexes = centroids + height[:, None] * normals
+    count = len(mesh.points)
+    corners = np.column_stack([mesh.corners, mesh.end, count + mesh.face])
+    return Mesh(_rescaled(np.concatenate([mesh.points, apexes])),
+                corners.ravel(), np.full(len(mesh.corners), 3))
+
+
+def gyro(mesh):
+    """Every face cut into pentagons, a pinwheel round its centre.
+
+    The pentagon of half-edge a->b has the face's centre, b and three
+    points near a third of the way along edges. Each of those is on
+    three pentagons, so each pentagon is given a plane, through its
+    centre and b and as near its three points as goes, and the points
+    are put where their three planes meet: every pentagon is flat, and
+    so are their duals (s is dgd).
+    """
+    count, faces = len(mesh.points), len(mesh.sizes)
+    # a point a third of the way along each half-edge, to start from
+    thirds = (2 * mesh.points[mesh.corners] + mesh.points[mesh.end]) / 3
+    third = count + faces + np.arange(len(mesh.corners))
+    corners = np.column_stack([count + mesh.face, third, third[mesh.twin],
+                               mesh.end, third[mesh.next]])
+    points = np.concatenate([mesh.points, mesh.centroids(), thirds])
+    points /= np.linalg.norm(points, axis=1)[:, None]
+
+    # the plane of each pentagon holds the line from its centre to b,
+    # turned about it to the main direction of its other points
+    centre = points[count + mesh.face]
+    axis = points[mesh.end] - centre
+    axis /= np.linalg.norm(axis, axis=1)[:, None]
+    offsets = points[corners[:, [1, 2, 4]]] - centre[:, None]
+    offsets -= np.einsum('hij,hj->hi', offsets, axis)[:, :, None] \
+        * axis[:, None]
+    spread = np.einsum('hij,hik->hjk', offsets, offsets)
+    normals = np.cross(axis, np.linalg.eigh(spread)[1][:, :, -1])
+    normals *= np.sign(np.einsum('ij,ij->i', normals, centre))[:, None]
+    heights = np.einsum('ij,ij->i', normals, centre)
+    # the point of half-edge h is on the pentagons of h, twin and prev
+    meet = np.column_stack([np.arange(len(mesh.corners)), mesh.twin,
+                            mesh.prev])
+    points[third] = np.linalg.solve(normals[meet],
+                                    heights[meet][:, :, None])[:, :, 0]
+    return Mesh(_rescaled(points), corners.ravel(),
+                np.full(len(mesh.corners), 5))
+
+
+def truncate(mesh):
+    """Every point cut off by a plane, which makes a face of it.
+
+    The plane is square to the point's normal and goes a third of the
+    way along the edge that drops fastest, no further on the others; the
+    old faces keep their planes, so a convex solid stays convex. On the
+    seeds this is cutting every edge at thirds.
+    """
+    normals = mesh.normals()
+    # each point's normal, the sum of those of its faces
+    across = np.column_stack([
+        np.bincount(mesh.corners, normals[mesh.face, axis],
+                    minlength=len(mesh.points)) for axis in range(3)])
+    across /= np.linalg.norm(across, axis=1)[:, None]
+    start = mesh.points[mesh.corners]
+    along = mesh.points[mesh.end] - start
+    drop = -np.einsum('ij,ij->i', along, across[mesh.corners])
+    depth = np.full(len(mesh.points), np.inf)
+    np.minimum.at(depth, mesh.corners, drop / 3)
+    # a point per half-edge, where its start's plane cuts it
+    cuts = start + (depth[mesh.corners] / drop)[:, None] * along
+    # each face keeps both cuts of each of its edges; each point's cuts
+    # go round it as the faces of ambo do
+    around, sizes = mesh.around(np.arange(len(mesh.corners)))
+    return Mesh(_rescaled(cuts),
+                np.concatenate([np.column_stack([np.arange(
+                    len(mesh.corners)), mesh.twin]).ravel(), around]),
+                np.concatenate([2 * mesh.sizes, sizes]))
+
+
+def expand(mesh):
+    return ambo(ambo(mesh))
+
+
+def snub(mesh):
+    return dual(gyro(dual(mesh)))
+
+
+operators = {'d': dual, 'a': ambo, 'k': kis, 'g': gyro,
+             't': truncate, 'e': expand, 's': snub}
+
+
+def apply(expression, mesh=None):
+    """Mesh of an expression such as 'tkD', or of 'tk' applied to mesh."""
+    if mesh is None:
+        expression, mesh = expression[:-1], seed(expression[-1])
+    for letter in reversed(expression):
+        mesh = operators[letter](mesh)
+    return mesh
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Apply Conway operators and time them.")
+    parser.add_argument('expression', nargs='*', help="e.g. tkD dI sC")
+    parser.add_argument('--check', action='store_true',
+                        help="apply every operator to every seed and "
+                             "check the solids are convex")
+    args = parser.parse_args()
+    if not args.expression and not args.check:
+        parser.error("give an expression, or --check")
+
+    if args.check:
+        failed = [letter + name for letter in operators for name in seeds
+                  if not apply(letter + name).convex()]
+        print("%d solids, %d not convex%s"
+              % (len(operators) * len(seeds), len(failed),
+                 ': ' + ' '.join(failed) if failed else ''))
+        if failed:
+            sys.exit(1)
+
+    for expression in args.expression:
+        start = perf_counter()
+        mesh = apply(expression)
+        took = perf_counter() - start
+        kinds = np.unique(mesh.sizes, return_counts=True)
+        print("%-12s %8d points %8d faces (%s)  %.1f ms"
+              % (expression, len(mesh.points), len(mesh.sizes),
+                 ', '.join('%d %d-gons' % (n, k)
+                           for k, n in zip(*kinds)), took * 1000))
@@ -0,0 +1,63 @@
+import numpy as np
+from pyglet.gl import GL_LINES, GL_TRIANGLES
+from pyglet.math import Mat4, Vec3
+
+import conway
+import geocache
+import scene
+
+
+""" CONWAY SOLID """
+""" A solid made by Conway's operators from a platonic seed, its faces
+    coloured by their number of sides.
+"""
+
+# truncated pentakis dodecahedron: 12 pentagons, 80 hexagons
+# (ref conway.py)
+expression = 'tkD'
+
+caption = "CONWAY SOLID " + expression
+
+# view_mat seems to be position of eye
+view_mat = Mat4.from_translation(Vec3(x=0, y=0, z=-200))
+proj_mat = Mat4.orthogonal_projection(left=0, right=1280,
+                                      bottom=0, top=720,
+                                      z_near=0.1, z_far=1000)
+
+vp = proj_mat @ view_mat
+
+# create the translation matrix
+translate_mat = Mat4.from_translation(vector=Vec3(x=640, y=360, z=0))
+
+# rates of turn about the x, y and z axes, in radians per second
+rates = (0.2, 0.5, 0.1)
+line_width = 2
+
+
+def solid(expression):
+    """(points, corners, sides of the face of every corner, triangles
+    over corners, edges) of expression."""
+    mesh = conway.apply(expression)
+    return (mesh.points, mesh.corners, mesh.sizes[mesh.face],
+            mesh.triangles(), mesh.edges())
+
+
+# built once, then mapped from the cache (ref geocache.py)
+points, corners, sides, triangles, edges = geocache.arrays(solid, expression)
+vertices = points * 160
+
+# triangles, squares, pentagons, hexagons and the rest
+palette = np.array([(255, 0, 0, 255), (255, 255, 0, 255),
+                    (0, 0, 255, 255), (255, 127, 0, 255),
+                    (0, 200, 0, 255)], dtype=np.uint8)
+colors = palette[np.minimum(sides, 7) - 3]
+
+# every corner its own vertex, so faces keep their own colours
+layers = scene.Scene()
+layers.add(GL_TRIANGLES, vertices[corners], colors, triangles)
+layers.add(GL_LINES, vertices * 1.005, (40, 40, 40, 255), edges)
+
+# the data above needs no window, so other tools can import the scene
+if __name__ == '__main__':
+    import polyhedra
+    polyhedra.main(['conway_solid'])
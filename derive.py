@@ -0,0 +1,250 @@
+import numpy as np
+
+
+""" DERIVE """
+""" Distance classes, adjacency, edges and faces worked out from a vertex
+    array alone, replacing the hand-run "if dd < 4.3" loops.
+    Up to GRID_THRESHOLD vertices everything comes from one dense distance
+    matrix. Above that a grid hash only visits neighbouring cells, so
+    meshes with 10^5 - 10^6 vertices stay linear in time and memory.
+"""
+
+GRID_THRESHOLD = 4096
+
+# the 13 neighbour cells "after" a cell, plus the cell itself: every pair
+# of neighbouring cells is then visited exactly once
+_HALF_OFFSETS = [(dx, dy, dz)
+                 for dx in (-1, 0, 1)
+                 for dy in (-1, 0, 1)
+                 for dz in (-1, 0, 1)
+                 if (dx, dy, dz) >= (0, 0, 0)]
+
+
+def index_dtype(count):
+    """Smallest unsigned index type able to address count vertices."""
+    return np.uint16 if count <= 0xFFFF else np.uint32
+
+
+def pairwise(vertices):
+    """(n, n) matrix of distances between all vertices."""
+    points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    delta = points[:, None, :] - points[None, :, :]
+    return np.sqrt(np.einsum('ijk,ijk->ij', delta, delta))
+
+
+def _ranges(start, count):
+    # concatenation of arange(s, s + c) for every (s, c), without a loop
+    offsets = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count,
+                                                 count)
+    return np.repeat(start, count) + offsets
+
+
+def _grid_pairs(points, radius):
+    cells = np.floor(points / radius).astype(np.int64)
+    cells -= cells.min(axis=0) - 1             # one empty cell of padding
+    dims = cells.max(axis=0) + 2
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+
+    first, second = [], []
+    for dx, dy, dz in _HALF_OFFSETS:
+        neighbour = keys + (dx * dims[1] + dy) * dims[2] + dz
+        start = np.searchsorted(sorted_keys, neighbour, side='left')
+        count = np.searchsorted(sorted_keys, neighbour, side='right') - start
+        i = np.repeat(np.arange(len(points)), count)
+        j = order[_ranges(start, count)]
+        if (dx, dy, dz) == (0, 0, 0):
+            keep = i < j
+            i, j = i[keep], j[keep]
+        first.append(i)
+        second.append(j)
+    i = np.concatenate(first)
+    j = np.concatenate(second)
+    swap = i > j
+    i[swap], j[swap] = j[swap], i[swap]
+    return i, j
+
+
+def pairs_within(vertices, radius):
+    """Vertex pairs (i, j, distance) with i < j and distance <= radius."""
+    points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    if len(points) <= GRID_THRESHOLD:
+        i, j = np.triu_indices(len(points), k=1)
+    else:
+        i, j = _grid_pairs(points, radius)
+    distance = np.linalg.norm(points[i] - points[j], axis=1)
+    keep = distance <= radius
+    return i[keep], j[keep], distance[keep]
+
+
+def edge_length(vertices):
+    """Shortest distance between two distinct vertices."""
+    points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    if len(points) <= GRID_THRESHOLD:
+        distance = pairwise(points)[np.triu_indices(len(points), k=1)]
+        return distance[distance > 0].min()
+    # start near the spacing of points spread over a surface and
+    # widen the search until some pair is found
+    size = np.ptp(points, axis=0).max()
+    radius = size / np.sqrt(len(points))
+    while True:
+        _, _, distance = pairs_within(points, radius)
+        distance = distance[distance > 0]
+        if len(distance):
+            return distance.min()
+        radius *= 2
+
+
+def distance_classes(vertices, radius=None, decimals=4):
+    """Distinct vertex distances and how many vertex pairs share each.
+
+    Small inputs classify every pair. Above GRID_THRESHOLD vertices
+    only pairs closer than radius are classified (default twice the
+    edge length), since all pairs of a large mesh would not fit.
+    Returns (distances, counts, (i, j, label)) with label indexing
+    distances for every classified pair.
+    """
+    points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    if radius is None:
+        if len(points) <= GRID_THRESHOLD:
+            radius = np.inf
+        else:
+            radius = 2 * edge_length(points)
+    i, j, distance = pairs_within(points, radius)
+    distances, label, counts = np.unique(np.round(distance, decimals),
+                                         return_inverse=True,
+                                         return_counts=True)
+    return distances, counts, (i, j, label)
+
+
+def edges(vertices, tolerance=1e-3):
+    """(m, 2) edges: vertex pairs at the shortest distance.
+
+    Pairs up to tolerance (relative) longer than the shortest distance
+    also count as edges, so generated meshes whose edges differ slightly
+    in length can pass a larger tolerance.
+    """
+    points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    shortest = edge_length(points)
+    i, j, _ = pairs_within(points, shortest * (1 + tolerance))
+    return np.stack([i, j], axis=1).astype(index_dtype(len(points)))
+
+
+def adjacency(count, edges):
+    """Neighbours of every vertex in compressed (indptr, indices) form.
+
+    The neighbours of vertex v are indices[indptr[v]:indptr[v + 1]].
+    """
+    edges = np.asarray(edges).reshape(-1, 2)
+    source = np.concatenate([edges[:, 0], edges[:, 1]]).astype(np.intp)
+    target = np.concatenate([edges[:, 1], edges[:, 0]]).astype(np.intp)
+    order = np.lexsort((target, source))
+    indptr = np.zeros(count + 1, dtype=np.intp)
+    np.cumsum(np.bincount(source, minlength=count), out=indptr[1:])
+    return indptr, target[order]
+
+
+def faces(vertices, edges):
+    """Faces of a convex (or star shaped) solid from its edges.
+
+    Around each vertex the edges are sorted by angle, seen from outside;
+    turning to the next edge at every vertex walks round one face.
+    Returns (f, k) vertex indices wound counter-clockwise from outside,
+    padded with -1 when the faces have different sizes.
+    """
+    points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+    count = len(points)
+    # half-edges: every edge once in each direction, twin[h] is reversed h
+    source = np.concatenate([edges[:, 0], edges[:, 1]])
+    target = np.concatenate([edges[:, 1], edges[:, 0]])
+    half = len(edges)
+    twin = np.concatenate([np.arange(half, 2 * half), np.arange(half)])
+
+    # tangent plane basis at each vertex, normal pointing away from centre
+    normal = points - points.mean(axis=0)
+    normal /= np.linalg.norm(normal, axis=1)[:, None]
+    axis = np.where(np.abs(normal[:, :1]) < 0.9, [[1., 0., 0.]],
+                    [[0., 1., 0.]])
+    tangent = axis - np.einsum('ij,ij->i', axis, normal)[:, None] * normal
+    tangent /= np.linalg.norm(tangent, axis=1)[:, None]
+    bitangent = np.cross(normal, tangent)
+    direction = points[target] - points[source]
+    angle = np.arctan2(np.einsum('ij,ij->i', direction, bitangent[source]),
+                       np.einsum('ij,ij->i', direction, tangent[source]))
+
+    # ring of outgoing half-edges round each vertex, anticlockwise
+    ring = np.lexsort((angle, source))
+    degree = np.bincount(source, minlength=count)
+    ring_start = np.cumsum(degree) - degree
+    position = np.empty_like(ring)
+    position[ring] = np.arange(len(ring)) - ring_start[source[ring]]
+
+    # arriving at v along u -> v, the face continues along the edge just
+    # clockwise of v -> u
+    back = twin
+    vertex = source[back]
+    step = ring[ring_start[vertex]
+                + (position[back] - 1) % degree[vertex]]
+
+    # label each half-edge with the smallest half-edge on its face by
+    # pointer jumping, then walk every face from its label
+    label = np.arange(len(step))
+    jump = step.copy()
+    while True:
+        smaller = np.minimum(label, label[jump])
+        jump = jump[jump]
+        if np.array_equal(smaller, label):
+            break
+        label = smaller
+    first, size = np.unique(label, return_counts=True)
+    walk = np.empty((len(first), size.max()), dtype=np.intp)
+    current = first
+    for column in range(size.max()):
+        walk[:, column] = source[current]
+        current = step[current]
+    walk[np.arange(size.max())[None, :] >= size[:, None]] = -1
+    return walk
+
+
+def triangulate(faces):
+    """(t, 3) fan triangles of (possibly -1 padded) faces."""
+    faces = np.asarray(faces)
+    k = faces.shape[1]
+    fan = np.stack([np.zeros(k - 2, dtype=np.intp),
+                    np.arange(1, k - 1),
+                    np.arange(2, k)], axis=1)
+    triangles = faces[:, fan].reshape(-1, 3)
+    return triangles[(triangles >= 0).all(axis=1)]
+
+
+def planes(vertices, faces):
+    """(f, 4) plane of every face: unit normal away from the origin and
+    the distance of the plane from the origin.
+
+    Faces in the same plane get the same row, so rounded rows can be
+    matched to find coplanar faces.
+    """
+    points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    corners = points[np.asarray(faces)[:, :3]]
+    normal = np.cross(corners[:, 1] - corners[:, 0],
+                      corners[:, 2] - corners[:, 0])
+    normal /= np.linalg.norm(normal, axis=1)[:, None]
+    offset = np.einsum('ij,ij->i', normal, corners[:, 0])
+    normal[offset < 0] *= -1
+    return np.column_stack([normal, np.abs(offset)])
+
+
+def analyse(vertices, tolerance=1e-3, decimals=4):
+    """Distance classes, edges, adjacency and faces of a vertex array."""
+    points = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    distances, counts, _ = distance_classes(points, decimals=decimals)
+    edge = edges(points, tolerance)
+    return {
+        'distances': distances,
+        'counts': counts,
+        'edges': edge,
+        'adjacency': adjacency(len(points), edge),
+        'faces': faces(points, edge),
+    }
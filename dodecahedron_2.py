@@ -1,56 +1,16 @@
-import pyglet
-from pyglet.graphics.shader import Shader, ShaderProgram
 # from pyglet.gl import GL_LINES
-from pyglet.gl import GL_TRIANGLES, GL_DEPTH_TEST
-from pyglet.gl import glClearColor, glEnable, glLineWidth
+from pyglet.gl import GL_TRIANGLES
 from pyglet.math import Mat4, Vec3
-from math import sqrt
 # from math import  pi
 
+import geometry
+import scene
+
 
 """ DODECAHEDRON """
 """ Filled faces - 3 blue, 3 orange, 3 red, 3 yellow """
 
-window = pyglet.window.Window(1280, 720, caption="DODECAHEDRON")
-glEnable(GL_DEPTH_TEST)
-glLineWidth(10)
-# set window background colour
-glClearColor(1.0, 1.0, 1.0, 1.0)
-
-# create the vertex source and fragment source
-vertex_source = """
-#version 330
-layout(location = 0) in vec3 vertices;
-layout(location = 1) in vec4 colors;
-
-out vec4 newColor;
-
-uniform mat4 vp;
-uniform mat4 model;
-
-void main()
-{
-    gl_Position = vp * model * vec4(vertices, 1.0f);
-    newColor = colors;
-}
-"""
-
-fragment_source = """
-#version 330
-in vec4 newColor;
-
-out vec4 outColor;
-
-void main()
-{
-    outColor = newColor;
-}
-"""
-
-# compile vertex source and fragment source into the shader program
-vert_shader = Shader(vertex_source, 'vertex')
-frag_shader = Shader(fragment_source, 'fragment')
-program = ShaderProgram(vert_shader, frag_shader)
+caption = "DODECAHEDRON"
 
 # view_mat seems to be position of eye
 view_mat = Mat4.from_translation(Vec3(x=0, y=0, z=-200))
@@ -60,46 +20,15 @@ proj_mat = Mat4.orthogonal_projection(left=0, right=1280,
 
 vp = proj_mat @ view_mat
 
-program['vp'] = vp
-
 # create the translation matrix
 translate_mat = Mat4.from_translation(vector=Vec3(x=640, y=360, z=0))
 
-program['model'] = translate_mat
-
-batch = pyglet.graphics.Batch()
-
-# Regular dodecahedron built on golden ratio (ref wikipedia.com/dodecahedron)
-h = 2.0 / (1.0 + sqrt(5.0))                 # approx 0.618
-h2 = h * h
-
-# Vertices are defined (ref wikipedia)
-vertices = [
-    -1, -1, -1,                 # vertex 0
-    1, -1, -1,
-    1,  1, -1,
-    -1,  1, -1,
-
-    -1, -1,  1,                 # 4
-    1, -1,  1,
-    1,  1,  1,                  # 6 top edge
-    -1,  1,  1,                 # 7 top edge
+# turned about the y axis, one radian per second
+rates = (0.0, 1.0, 0.0)
+line_width = 10
 
-    0, -(1+h), -(1-h2),         # 8
-    0, -(1+h),  (1-h2),         # 9
-    0,  (1+h),  (1-h2),
-    0,  (1+h), -(1-h2),
-
-    -(1+h), -(1-h2), 0,         # 12
-    -(1+h),  (1-h2), 0,
-    (1+h),  (1-h2), 0,
-    (1+h), -(1-h2), 0,
-
-    -(1-h2), 0, -(1+h),
-    -(1-h2), 0,  (1+h),
-    (1-h2), 0,  (1+h),
-    (1-h2), 0, -(1+h)           # vertex 19
-]
+# Regular dodecahedron built on golden ratio (ref geometry.py)
+vertices = geometry.vertices('dodecahedron', scale=100).ravel()
 
 # pentagon faces subdivided into trangles
 indices_blu = [
@@ -151,81 +80,22 @@ indices_blk_line = [
 ]
 
 # Just some colours
-colors_blu = (0, 0, 200, 255) * 20
-colors_ora = (255, 127, 0, 255) * 20
-colors_red = (200, 0, 0, 255) * 20
-colors_yel = (200, 200, 0, 255) * 20
-colors_blk = (0, 0, 0, 255) * 20
-
-
-# # Scale up the vertices
-vertices = [v * 100 for v in vertices]
-
-# blue face batch
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_blu,
-    vertices=('f', vertices),
-    colors=('Bn', colors_blu)
-)
-# orange face batch
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_ora,
-    vertices=('f', vertices),
-    colors=('Bn', colors_ora)
-)
-# red face batch
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_red,
-    vertices=('f', vertices),
-    colors=('Bn', colors_red)
-)
-# yellow face batch
-program.vertex_list_indexed(
-    20,
-    GL_TRIANGLES,
-    batch=batch,
-    indices=indices_yel,
-    vertices=('f', vertices),
-    colors=('Bn', colors_yel)
-)
-# program.vertex_list_indexed(
-#     20,
-#     GL_LINES,
-#     batch=batch,
-#     indices=indices_blk_line,
-#     vertices=('f', vertices),
-#     colors=('Bn', colors_blk)
-# )
-
-
-@window.event
-def on_draw():
-    window.clear()
-    batch.draw()
-
-
-angle = 0
-
-
-def update(dt: float):
-    global angle
-    angle += dt
-    # angle = pi/2.0
-    # upload the combined model matrix to the vertex shader model uniform
-    rotate_mat = Mat4.from_rotation(angle=angle,
-                                    vector=Vec3(x=0, y=1, z=0))
-    model_mat = translate_mat @ rotate_mat
-    program['model'] = model_mat
-
-
-pyglet.clock.schedule_interval(update, 1/60)
-pyglet.app.run()
+colors_blu = (0, 0, 200, 255)
+colors_ora = (255, 127, 0, 255)
+colors_red = (200, 0, 0, 255)
+colors_yel = (200, 200, 0, 255)
+colors_blk = (0, 0, 0, 255)
+
+
+# faces in one buffer (ref scene.py)
+layers = scene.Scene()
+layers.add(GL_TRIANGLES, vertices, colors_blu, indices_blu)
+layers.add(GL_TRIANGLES, vertices, colors_ora, indices_ora)
+layers.add(GL_TRIANGLES, vertices, colors_red, indices_red)
+layers.add(GL_TRIANGLES, vertices, colors_yel, indices_yel)
+# layers.add(GL_LINES, vertices, colors_blk, indices_blk_line)
+
+# the data above needs no window, so other tools can import the scene
+if __name__ == '__main__':
+    import polyhedra
+    polyhedra.main(['dodecahedron_2'])
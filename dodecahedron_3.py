@@ -1,60 +1,18 @@
 import pyglet
-from pyglet.graphics.shader import Shader, ShaderProgram
 # from pyglet.gl import GL_LINES
-from pyglet.gl import (GL_DEPTH_TEST,
-                       GL_POINTS)
+from pyglet.gl import GL_POINTS
 # from pyglet.gl import GL_TRIANGLES, GL_LINES
 # from pyglet.gl import GL_POINT_SIZE
-from pyglet.gl import glClearColor, glEnable, glLineWidth, glPointSize
 from pyglet.math import Mat4, Vec3
-from math import sqrt
+
+import geometry
+import scene
 
 
 """ DODECAHEDRON """
 """ Vertices """
 
-window = pyglet.window.Window(1280, 720, caption="DODECAHEDRON")
-glEnable(GL_DEPTH_TEST)
-# set window background colour
-glClearColor(1.0, 1.0, 1.0, 1.0)
-glLineWidth(5)
-glPointSize(10)
-
-
-# create the vertex source and fragment source
-vertex_source = """
-#version 330
-layout(location = 0) in vec3 vertices;
-layout(location = 1) in vec4 colors;
-
-out vec4 newColor;
-
-uniform mat4 vp;
-uniform mat4 model;
-
-void main()
-{
-    gl_Position = vp * model * vec4(vertices, 1.0f);
-    newColor = colors;
-}
-"""
-
-fragment_source = """
-#version 330
-in vec4 newColor;
-
-out vec4 outColor;
-
-void main()
-{
-    outColor = newColor;
-}
-"""
-
-# compile vertex source and fragment source into the shader program
-vert_shader = Shader(vertex_source, 'vertex')
-frag_shader = Shader(fragment_source, 'fragment')
-program = ShaderProgram(vert_shader, frag_shader)
+caption = "DODECAHEDRON"
 
 # view_mat seems to be position of eye
 view_mat = Mat4.from_translation(Vec3(x=0, y=0, z=-200))
@@ -63,48 +21,17 @@ proj_mat = Mat4.orthogonal_projection(left=0, right=1280,
                                       z_near=0.1, z_far=1000)
 
 vp = proj_mat @ view_mat
-print(vp)
-
-program['vp'] = vp
 
 # create the translation matrix
 translate_mat = Mat4.from_translation(vector=Vec3(x=640, y=360, z=0))
 
-program['model'] = translate_mat
-
-batch = pyglet.graphics.Batch()
-
-# Regular dodecahedron built on golden ratio (ref wikipedia.com/dodecahedron)
-h = 2.0 / (1.0 + sqrt(5.0))                 # approx 0.618
-h2 = h * h
-
-# Vertices are defined (ref wikipedia)
-vertices = [
-    -1, -1, -1,                 # vertex 0
-    1, -1, -1,
-    1,  1, -1,
-    -1,  1, -1,
-
-    -1, -1,  1,
-    1, -1,  1,
-    1,  1,  1,
-    -1,  1,  1,
+# turned about the y axis, one radian per second
+rates = (0.0, 1.0, 0.0)
+line_width = 5
+point_size = 10
 
-    0, -(1+h), -(1-h2),
-    0, -(1+h),  (1-h2),
-    0,  (1+h),  (1-h2),
-    0,  (1+h), -(1-h2),
-
-    -(1+h), -(1-h2), 0,
-    -(1+h),  (1-h2), 0,
-    (1+h),  (1-h2), 0,
-    (1+h), -(1-h2), 0,
-
-    -(1-h2), 0, -(1+h),
-    -(1-h2), 0,  (1+h),
-    (1-h2), 0,  (1+h),
-    (1-h2), 0, -(1+h)           # vertex 19
-]
+# Regular dodecahedron built on golden ratio (ref geometry.py)
+vertices = geometry.vertices('dodecahedron', scale=100).ravel()
 # pentagon faces
 indices = [
     0,  8,  9,  4, 12,        # blu
@@ -148,19 +75,18 @@ indices = [
 
 
 # Just some colours
-colors = (0, 0, 0, 255) * 20
+colors = (0, 0, 0, 255)
 
-# # Scale up the vertices
-vertices = [v * 100 for v in vertices]
-print(vertices)
+# print(vertices)
 
-print(vertices[0], vertices[1], vertices[2])
+# print(vertices[0], vertices[1], vertices[2])
 x = vertices[0] + 640
 y = vertices[1] + 360
 z = vertices[2]
 
-label = pyglet.text.Label(
-    'X', font_name='Times New Roman', font_size=36,
+# the label is made once there is a window, in after_draw()
+label_args = dict(
+    text='X', font_name='Times New Roman', font_size=36,
     color=(250, 0, 0, 255),
     x=x,
     y=y,
@@ -182,35 +108,23 @@ label = pyglet.text.Label(
 #                           batch=batch,
 #                           program=program
 #                           )
-program.vertex_list_indexed(
-    20,
-    GL_POINTS,
-    batch=batch,
-    indices=indices,
-    vertices=('f', vertices),
-    colors=('Bn', colors)
-)
-
-
-@window.event
-def on_draw():
-    window.clear()
-    batch.draw()
-    label.draw()
 
+# the vertices as points (ref scene.py)
+layers = scene.Scene()
+layers.add(GL_POINTS, vertices, colors, indices)
 
-angle = 0
+label = None
 
 
-def update(dt: float):
-    global angle
-    angle += dt
-    # upload the combined model matrix to the vertex shader model uniform
-    rotate_mat = Mat4.from_rotation(angle=angle,
-                                    vector=Vec3(x=0, y=1, z=0))
-    model_mat = translate_mat @ rotate_mat
-    program['model'] = model_mat
+def after_draw():
+    """Mark vertex 0; the label stays put while the solid turns."""
+    global label
+    if label is None:
+        label = pyglet.text.Label(**label_args)
+    label.draw()
 
 
-pyglet.clock.schedule_interval(update, 1/60)
-pyglet.app.run()
+# the data above needs no window, so other tools can import the scene
+if __name__ == '__main__':
+    import polyhedra
+    polyhedra.main(['dodecahedron_3'])
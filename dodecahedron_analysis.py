@@ -1,94 +1,243 @@
+import argparse
+import json
 from math import sqrt
+from time import perf_counter
+
+import numpy as np
+
+import conway
+import derive
+import geodesic
+import geometry
+import golden
+import symmetry
+from golden import GoldenArray, phi, h
 
 """ DODECAHEDRON """
+""" Distances from one vertex to all the others, classified exactly:
+    squared distances are numbers a + b√5 (ref golden.py), looked up by
+    their integer keys instead of between float bounds.
+    Given a solid, every pair of its vertices is classified instead. The
+    symmetries of the solid split its vertices into orbits; the distances
+    from one vertex of each orbit are worked out, a block of rows at a
+    time, and stand for every other vertex of the orbit moved onto it, so
+    a geodesic sphere of 40962 vertices needs 374 rows, not 40962.
+    Usage: python dodecahedron_analysis.py                  (vertex 8)
+           python dodecahedron_analysis.py geodesic64 --output report.npz
+    A solid is a geometry.py name, geodesic<frequency> or a Conway
+    expression (ref conway.py); reports are JSON or NPZ by extension.
+"""
+
+
+def solid(name):
+    """(n, 3) vertices of a geometry.py name, geodesic<F> or 'tkD'."""
+    if name in geometry.names():
+        return geometry.vertices(name)
+    if name.startswith('geodesic'):
+        return geodesic.sphere(int(name[len('geodesic'):]))[0]
+    return conway.apply(name).points
+
+
+def analyse(points, group=None, decimals=4, block=1 << 22):
+    """Distance classes of every pair of points, one row per orbit.
+
+    The matrices of group (default none but the identity) that map the
+    points onto themselves give the orbits. Returns a dict of arrays:
+        distances       (c,) distinct distances, rounded to decimals
+        counts          (c,) pairs i < j at each of them
+        representatives (r,) lowest point of every orbit
+        sizes           (r,) points in every orbit
+        labels          (r, n) class of the distance from every
+                        representative to every point
+        orbit           (n,) orbit of every point
+        permutations    (m, n) image of every point under each symmetry
+        moves           (n,) symmetry moving its representative to a point
+    distances[0] is 0, the distance from a point to itself. Rows are
+    worked out about block distances at a time.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    count = len(points)
+    if group is None:
+        group = np.eye(3)[None]
+    permutation, _ = symmetry.permutations(points, group, decimals)
+    representatives, orbit, sizes = np.unique(symmetry.orbits(permutation),
+                                              return_inverse=True,
+                                              return_counts=True)
+    # the symmetry taking the representative of each point onto it
+    moves = (permutation[:, representatives[orbit]]
+             == np.arange(count)).argmax(axis=0)
+
+    # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, one matmul per block of rows
+    squares = np.einsum('ij,ij->i', points, points)
+    rows = max(1, block // count)
+    blocks = []
+    for start in range(0, len(representatives), rows):
+        chosen = representatives[start:start + rows]
+        squared = squares[chosen, None] + squares[None] \
+            - 2 * points[chosen] @ points.T
+        keys = np.rint(np.sqrt(np.maximum(squared, 0)) * 10.0 ** decimals)
+        unique, inverse, tally = np.unique(keys.astype(np.int64),
+                                           return_inverse=True,
+                                           return_counts=True)
+        # each row counts once for every point of its orbit
+        weighted = np.bincount(
+            inverse.ravel(), np.repeat(sizes[start:start + rows], count),
+            minlength=len(unique))
+        blocks.append((unique, inverse.reshape(len(chosen), count),
+                       weighted))
+    keys = np.unique(np.concatenate([unique for unique, _, _ in blocks]))
+    labels = np.empty((len(representatives), count),
+                      dtype=derive.index_dtype(len(keys)))
+    ordered = np.zeros(len(keys))
+    start = 0
+    for unique, inverse, weighted in blocks:
+        at = np.searchsorted(keys, unique)
+        labels[start:start + len(inverse)] = at[inverse]
+        ordered[at] += weighted
+        start += len(inverse)
+    # every pair was counted from both ends, and each point with itself
+    ordered[0] -= count
+    return {
+        'distances': keys / 10.0 ** decimals,
+        'counts': np.rint(ordered / 2).astype(np.int64),
+        'representatives': representatives,
+        'sizes': sizes,
+        'labels': labels,
+        # indices as small as they go: the arrays are saved whole
+        'orbit': orbit.astype(derive.index_dtype(len(representatives))),
+        'permutations': permutation.astype(derive.index_dtype(count)),
+        'moves': moves.astype(derive.index_dtype(len(permutation))),
+    }
+
+
+def distances_from(analysis, vertex):
+    """(n,) class of the distance from vertex to every point, from the
+    row of its orbit's representative moved onto it."""
+    row = analysis['labels'][analysis['orbit'][vertex]]
+    image = analysis['permutations'][analysis['moves'][vertex]]
+    classes = np.empty_like(row)
+    classes[image] = row
+    return classes
+
+
+def save(analysis, path, **details):
+    """Write an analysis to path: every array to .npz, or to .json a
+    summary with the classes of each orbit's representative.
+
+    JSON is for small solids: a geodesic sphere of 40962 points has
+    20000 distances and writes 50 MB of it. NPZ is left uncompressed,
+    which is 40 MB there but 150 times faster to write.
+    """
+    if path.endswith('.npz'):
+        np.savez(path, **details, **analysis)
+        return
+    orbits = []
+    for representative, size, row in zip(analysis['representatives'],
+                                         analysis['sizes'],
+                                         analysis['labels']):
+        classes, counts = np.unique(row, return_counts=True)
+        orbits.append({'representative': int(representative),
+                       'size': int(size),
+                       'classes': classes.tolist(),
+                       'counts': counts.tolist()})
+    report = dict(details,
+                  distances=analysis['distances'].tolist(),
+                  counts=analysis['counts'].tolist(),
+                  symmetries=len(analysis['permutations']),
+                  orbits=orbits)
+    with open(path, 'w') as output:
+        json.dump(report, output)
+
+
+def exact(v1=8):
+    # Regular dodecahedron built on golden ratio, exactly (ref geometry.py)
+    points = golden.vertices('dodecahedron')
+    vertices = points.__array__().ravel()
+
+    vertex_count = len(points)
+
+    for index in range(vertex_count):
+        x = vertices[index * 3]
+        y = vertices[index * 3 + 1]
+        z = vertices[index * 3 + 2]
+        print(index, x, y, z)
+
+    # half the distance is 1, root 2, h = 1/phi or phi: the squared
+    # distances are 4 times their squares
+    labels = ['adjacent', 'square', 'minor', 'golden']
+    squares = GoldenArray.of([4 * d for d in (1, 2, h * h, phi * phi)],
+                             points.denominator ** 2)
+    descriptions = dict(zip(squares.keys().tolist(), labels))
+    descriptions[0] = "VERTEX"
+
+    # distances = []
+    adjcnt = []
+    square = []
+    goldens = []
+    minor = []
+    other = []
+    # every squared distance from v1 at once, exactly
+    delta = points - points[v1]
+    squared = delta.dot(delta)
+    keys = squared.keys().tolist()
+    for v2 in range(vertex_count):
+        dist = sqrt(float(squared.item(v2))) / 2.
+        description = descriptions.get(keys[v2], "other")
+
+        if description == "adjacent":
+            adjcnt.append(v2)
+        if description == "square":
+            square.append(v2)
+        if description == "golden":
+            goldens.append(v2)
+        if description == "minor":
+            minor.append(v2)
+        if description == "other":
+            other.append(v2)
+
+        print(v1, v2, dist, description)
+    print("VERTEX:", v1)
+    print("Adjcnt:", adjcnt)
+    print("square:", square)
+    print("golden:", goldens)
+    print("minor :", minor)
+    print("other :", other)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Classify the distances from a dodecahedron vertex, "
+                    "or between every pair of vertices of a solid.")
+    parser.add_argument('solid', nargs='?',
+                        help="geometry.py name, geodesic<F> or Conway "
+                             "expression; omitted, the exact listing")
+    parser.add_argument('--vertex', type=int, default=8)
+    parser.add_argument('--group', default='icosahedral',
+                        choices=['tetrahedral', 'octahedral',
+                                 'icosahedral', 'none'])
+    parser.add_argument('--decimals', type=int, default=4)
+    parser.add_argument('--output', help="report.json or report.npz")
+    args = parser.parse_args()
 
-# Regular dodecahedron built on golden ratio (ref wikipedia.com/dodecahedron)
-h = 2.0 / (1.0 + sqrt(5.0))                 # approx 0.618
-h2 = h * h
-
-# phi = (1.0 + sqrt(5.0)) / 2.0
-# h is 1/phi
-# h is phi-1
-# h2 is 2-phi
-# print(h, h2, phi, phi - 1, 2 - phi)
-
-# Vertices are defined (ref wikipedia)
-vertices = [
-    -1, -1, -1,                 # vertex 0
-    1, -1, -1,
-    1,  1, -1,
-    -1,  1, -1,
-
-    -1, -1,  1,
-    1, -1,  1,
-    1,  1,  1,
-    -1,  1,  1,
-
-    0, -(1+h), -(1-h2),
-    0, -(1+h),  (1-h2),
-    0,  (1+h),  (1-h2),
-    0,  (1+h), -(1-h2),
-
-    -(1+h), -(1-h2), 0,
-    -(1+h),  (1-h2), 0,
-    (1+h),  (1-h2), 0,
-    (1+h), -(1-h2), 0,
-
-    -(1-h2), 0, -(1+h),
-    -(1-h2), 0,  (1+h),
-    (1-h2), 0,  (1+h),
-    (1-h2), 0, -(1+h)           # vertex 19
-]
-
-vertex_count = len(vertices) // 3
-
-for index in range(vertex_count):
-    x = vertices[index * 3]
-    y = vertices[index * 3 + 1]
-    z = vertices[index * 3 + 2]
-    print(index, x, y, z)
-
-# distances = []
-adjcnt = []
-square = []
-golden = []
-minor = []
-other = []
-v1 = 8
-for v2 in range(vertex_count):
-    x2 = (vertices[v1 * 3] - vertices[v2 * 3]) ** 2
-    y2 = (vertices[v1 * 3 + 1] - vertices[v2 * 3 + 1]) ** 2
-    z2 = (vertices[v1 * 3 + 2] - vertices[v2 * 3 + 2]) ** 2
-    dist = sqrt(x2 + y2 + z2) / 2.
-    description = ""
-    if 0 == dist:
-        description = "VERTEX"
-    elif 0.999 < dist < 1.001:
-        description = "adjacent"
-    elif 1.414 < dist < 1.415:
-        description = "square"
-    elif 0.618 < dist < 0.619:
-        description = "minor"
-    elif 1.618 < dist < 1.619:
-        description = "golden"
+    if args.solid is None:
+        exact(args.vertex)
     else:
-        description = "other"
-
-    if description == "adjacent":
-        adjcnt.append(v2)
-    if description == "square":
-        square.append(v2)
-    if description == "golden":
-        golden.append(v2)
-    if description == "minor":
-        minor.append(v2)
-    if description == "other":
-        other.append(v2)
-
-    print(v1, v2, dist, description)
-print("VERTEX:", v1)
-print("Adjcnt:", adjcnt)
-print("square:", square)
-print("golden:", golden)
-print("minor :", minor)
-print("other :", other)
+        points = solid(args.solid)
+        group = None
+        if args.group != 'none':
+            # mirror images too: the ones a chiral solid lacks drop out
+            group = symmetry.with_inversion(symmetry.rotations(args.group))
+        start = perf_counter()
+        analysis = analyse(points, group, args.decimals)
+        took = perf_counter() - start
+        print("%s: %d points, %d symmetries, %d orbits, %d distances "
+              "in %.2f s" % (args.solid, len(points),
+                             len(analysis['permutations']),
+                             len(analysis['sizes']),
+                             len(analysis['distances']), took))
+        for distance, count in list(zip(analysis['distances'],
+                                        analysis['counts']))[1:13]:
+            print("%10.4f %10d" % (distance, count))
+        if args.output:
+            save(analysis, args.output, solid=args.solid,
+                 points=len(points), decimals=args.decimals)
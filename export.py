@@ -0,0 +1,236 @@
+import argparse
+import ctypes
+import shutil
+import subprocess
+import sys
+from time import perf_counter
+
+import numpy as np
+import pyglet
+
+# offscreen first, it makes pyglet headless before any GL is loaded
+import offscreen
+from pyglet import gl
+
+
+""" EXPORT """
+""" Turntable videos of a scene script, without a window and without
+    screen recording.
+    update() is stepped with a fixed dt, every frame is drawn into an
+    offscreen framebuffer and read back through two pixel buffer
+    objects in turn: frame n is copied into one while frame n - 1 is
+    collected from the other, so the CPU never waits on a frame still
+    being drawn. Frames stream straight into ffmpeg, or into a raw .y4m
+    file when ffmpeg is not installed; no images are saved on the way.
+    Usage: python export.py octahedron.py --seconds 10 --out octahedron.mp4
+"""
+
+
+class PixelReader:
+    """Double-buffered asynchronous readback of RGBA frames."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.size = width * height * 4
+        self.buffers = (gl.GLuint * 2)()
+        gl.glGenBuffers(2, self.buffers)
+        for buffer in self.buffers:
+            gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, buffer)
+            gl.glBufferData(gl.GL_PIXEL_PACK_BUFFER, self.size, None,
+                            gl.GL_STREAM_READ)
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+        self.frame = np.empty((height, width, 4), dtype=np.uint8)
+        self.count = 0
+
+    def push(self, framebuffer):
+        """Start reading framebuffer; returns the previous frame, if any.
+
+        The returned array is reused by the next call; rows come in
+        OpenGL order, bottom first.
+        """
+        gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, framebuffer.fbo)
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER,
+                        self.buffers[self.count % 2])
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+        # into the bound pixel buffer: returns at once
+        gl.glReadPixels(0, 0, self.width, self.height, gl.GL_RGBA,
+                        gl.GL_UNSIGNED_BYTE, None)
+        self.count += 1
+        if self.count < 2:
+            gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+            return None
+        return self._collect(self.count - 2)
+
+    def flush(self):
+        """The last frame pushed, or None if there is none."""
+        if self.count == 0:
+            return None
+        return self._collect(self.count - 1)
+
+    def _collect(self, number):
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, self.buffers[number % 2])
+        address = gl.glMapBufferRange(gl.GL_PIXEL_PACK_BUFFER, 0, self.size,
+                                      gl.GL_MAP_READ_BIT)
+        mapped = (ctypes.c_ubyte * self.size).from_address(address)
+        np.copyto(self.frame.reshape(-1),
+                  np.frombuffer(mapped, dtype=np.uint8))
+        gl.glUnmapBuffer(gl.GL_PIXEL_PACK_BUFFER)
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+        return self.frame
+
+    def delete(self):
+        gl.glDeleteBuffers(2, self.buffers)
+
+
+class FFmpegSink:
+    """Raw RGBA frames piped into ffmpeg, which flips and encodes them."""
+
+    def __init__(self, path, width, height, fps):
+        self.process = subprocess.Popen(
+            ['ffmpeg', '-loglevel', 'error', '-y',
+             '-f', 'rawvideo', '-pix_fmt', 'rgba',
+             '-s', '%dx%d' % (width, height), '-r', str(fps), '-i', '-',
+             # OpenGL rows start at the bottom
+             '-vf', 'vflip', '-pix_fmt', 'yuv420p', path],
+            stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self.process.stdin.write(frame.data)
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait()
+
+
+class Y4MSink:
+    """YUV4MPEG2 stream of 4:2:0 frames (full range BT.601).
+
+    Any player or encoder reads it: ffmpeg -i out.y4m out.mp4
+    """
+
+    def __init__(self, path, width, height, fps):
+        if width % 2 or height % 2:
+            raise ValueError("4:2:0 needs an even width and height")
+        self.file = sys.stdout.buffer if path == '-' else open(path, 'wb')
+        self.file.write(b'YUV4MPEG2 W%d H%d F%d:1 Ip A1:1 C420jpeg\n'
+                        % (width, height, fps))
+        # the Y, U and V planes of one frame, back to back
+        area = width * height
+        self.planes = np.empty(area * 3 // 2, dtype=np.uint8)
+        self.y = self.planes[:area].reshape(height, width)
+        self.u = self.planes[area:area * 5 // 4]
+        self.v = self.planes[area * 5 // 4:]
+        # scratch space, reused every frame
+        self.luma = np.empty((height, width), dtype=np.uint16)
+        self.channel = np.empty((height, width), dtype=np.uint16)
+        self.pairs = np.empty((2, height, width), dtype=np.uint32)
+        self.rows = np.empty((2, height // 2, width), dtype=np.uint32)
+        self.blocks = np.empty((2, height // 2, width // 2), dtype=np.uint32)
+        self.rgb = np.empty((3, height // 2, width // 2), dtype=np.int32)
+        self.chroma = np.empty((height // 2, width // 2), dtype=np.int32)
+
+    def write(self, frame):
+        # one uint32 per pixel, R in the low byte, top row first
+        pixels = frame.view(np.uint32)[::-1, :, 0]
+        # Y with weights in 8 bit fixed point, a channel at a time
+        luma, channel = self.luma, self.channel
+        for shift, weight in ((0, 77), (8, 150), (16, 29)):
+            np.right_shift(pixels, shift, out=channel, casting='unsafe')
+            channel &= 0xFF
+            if shift:
+                channel *= weight
+                luma += channel
+            else:
+                np.multiply(channel, weight, out=luma)
+        luma += 128
+        luma >>= 8
+        np.copyto(self.y, luma, casting='unsafe')
+
+        # R and B, G and A 16 bits apart, so adding a 2 x 2 block sums
+        # two colours at once without one spilling into the other
+        pairs, rows, blocks = self.pairs, self.rows, self.blocks
+        np.bitwise_and(pixels, 0x00FF00FF, out=pairs[0])
+        np.right_shift(pixels, 8, out=pairs[1])
+        pairs[1] &= 0x00FF00FF
+        np.add(pairs[:, 0::2], pairs[:, 1::2], out=rows)
+        np.add(rows[:, :, 0::2], rows[:, :, 1::2], out=blocks)
+        r, g, b = self.rgb
+        np.bitwise_and(blocks[0], 0xFFFF, out=r, casting='unsafe')
+        np.bitwise_and(blocks[1], 0xFFFF, out=g, casting='unsafe')
+        np.right_shift(blocks[0], 16, out=b, casting='unsafe')
+        # the sums are 4 times the mean, hence >> 10 for weights out of 256
+        chroma = self.chroma
+        for plane, weights in ((self.u, (-43, -85, 128)),
+                               (self.v, (128, -107, -21))):
+            np.multiply(r, weights[0], out=chroma)
+            for channel, weight in zip((g, b), weights[1:]):
+                chroma += channel * weight
+            chroma += (128 << 10) + 512
+            chroma >>= 10
+            np.minimum(chroma, 255, out=chroma)
+            np.copyto(plane, chroma.ravel(), casting='unsafe')
+
+        self.file.write(b'FRAME\n')
+        self.file.write(self.planes.data)
+
+    def close(self):
+        if self.file is not sys.stdout.buffer:
+            self.file.close()
+
+
+def export(script, path, frames, fps=60, size=(1920, 1080), argv=()):
+    """Write frames of a scene script to a video; returns seconds taken.
+
+    Paths ending .y4m (or - for stdout) are written directly, anything
+    else is encoded by ffmpeg.
+    """
+    width, height = size
+    if path == '-' or path.endswith('.y4m'):
+        sink = Y4MSink(path, width, height, fps)
+    elif shutil.which('ffmpeg'):
+        sink = FFmpegSink(path, width, height, fps)
+    else:
+        raise RuntimeError("ffmpeg not found, write a .y4m file instead")
+
+    window, callbacks = offscreen.load(script, argv)
+    window.switch_to()
+    target = offscreen.Framebuffer(width, height)
+    reader = PixelReader(width, height)
+    start = perf_counter()
+    try:
+        for _ in range(frames):
+            for callback in callbacks:
+                callback(1 / fps)
+            target.bind()
+            pyglet.event.EventDispatcher.dispatch_event(window, 'on_draw')
+            frame = reader.push(target)
+            if frame is not None:
+                sink.write(frame)
+        frame = reader.flush()
+        if frame is not None:
+            sink.write(frame)
+    finally:
+        sink.close()
+        reader.delete()
+        target.unbind()
+        target.delete()
+        window.close()
+    return perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Export a scene script as a video, no window needed.")
+    parser.add_argument('script')
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--fps', type=int, default=60)
+    parser.add_argument('--size', type=int, nargs=2, default=(1920, 1080))
+    parser.add_argument('--out', default='turntable.mp4')
+    args, script_args = parser.parse_known_args()
+
+    frames = round(args.seconds * args.fps)
+    took = export(args.script, args.out, frames, args.fps, args.size,
+                  script_args)
+    print("%d frames in %.1f s, %.1f x real time"
+          % (frames, took, frames / args.fps / took), file=sys.stderr)
@@ -0,0 +1,176 @@
+import argparse
+import io
+import math
+import multiprocessing
+import os
+import sys
+import zipfile
+from time import perf_counter
+from types import SimpleNamespace
+
+import numpy as np
+import pyglet
+
+# offscreen first, it makes pyglet headless before any GL is loaded
+import offscreen
+from pyglet.gl import GL_DEPTH_TEST
+from pyglet.gl import glClearColor, glEnable, glLineWidth, glPointSize
+from pyglet.math import Mat4, Vec3
+
+import geometry
+import polyhedra
+import raster
+import scene
+import shaders
+
+
+""" FARM """
+""" Thumbnails of every scene at many angles and sizes, rendered on all
+    cores at once.
+    Each (scene, angle, size) is a job. Jobs are shared out over a pool
+    of processes; every worker makes one offscreen GL context, compiles
+    the program once and builds each scene the first time it meets it,
+    so after that a job is one draw and one readback. The PNGs come back
+    to this process and go into a single zip archive.
+    Scenes are those of polyhedra.py, and the solids of geometry.py,
+    named geometry.cube etc.
+    Usage: python farm.py --angles 360 --size 320 180 --size 640 360
+"""
+
+# the scene scripts are all drawn for a 1280 x 720 window
+WIDTH, HEIGHT = 1280, 720
+
+# per worker: the context, programs, built scenes and framebuffers
+_window = None
+_programs = {}
+_scenes = {}
+_targets = {}
+
+
+def names():
+    """Every scene the farm can render."""
+    return polyhedra.scenes + tuple('geometry.' + name
+                                    for name in geometry.names())
+
+
+def load_scene(name):
+    """The scene called name, as layers, vp, translate_mat etc.
+
+    Layers are collected but not built, so no GL context is needed.
+    """
+    if name in polyhedra.scenes:
+        return polyhedra.load(name)
+    layers = scene.Scene()
+    for layer in raster.solid_layers(name.removeprefix('geometry.')):
+        layers.add(*layer)
+    # as the scene scripts place theirs
+    view_mat = Mat4.from_translation(Vec3(x=0, y=0, z=-200))
+    proj_mat = Mat4.orthogonal_projection(left=0, right=WIDTH,
+                                          bottom=0, top=HEIGHT,
+                                          z_near=0.1, z_far=1000)
+    return SimpleNamespace(
+        layers=layers, vp=proj_mat @ view_mat, line_width=3,
+        translate_mat=Mat4.from_translation(
+            vector=Vec3(x=WIDTH / 2, y=HEIGHT / 2, z=0)))
+
+
+def jobs(scenes, angles, sizes):
+    """(scene, angle in degrees, (width, height)) for every combination.
+
+    Sorted so that runs of jobs share a framebuffer size and a scene.
+    """
+    return [(name, 360 * step / angles, tuple(size))
+            for size in sizes for name in scenes for step in range(angles)]
+
+
+def _start_worker():
+    global _window
+    # the window is never shown; it only carries the GL context
+    _window = pyglet.window.Window(16, 16, visible=False)
+    _window.switch_to()
+    glEnable(GL_DEPTH_TEST)
+    glClearColor(1.0, 1.0, 1.0, 1.0)
+
+
+def _render(job):
+    name, angle, (width, height) = job
+    if name not in _scenes:
+        _scenes[name] = load_scene(name)
+        _scenes[name].layers.build()
+    if (width, height) not in _targets:
+        _targets[width, height] = offscreen.Framebuffer(width, height)
+    module = _scenes[name]
+    target = _targets[width, height]
+    # programs by fragment source, as in polyhedra.py
+    fragment = getattr(module, 'fragment', shaders.fragment_source)
+    if fragment not in _programs:
+        _programs[fragment] = shaders.create_program(fragment=fragment)
+    program = _programs[fragment]
+
+    # turntable: the solid turned about the vertical axis
+    rotate_mat = Mat4.from_rotation(angle=math.radians(angle),
+                                    vector=Vec3(x=0, y=1, z=0))
+    # lines and points as thick, relative to the frame, as in the window
+    scale = height / HEIGHT
+    glLineWidth(max(1.0, getattr(module, 'line_width', 1) * scale))
+    glPointSize(max(1.0, getattr(module, 'point_size', 1) * scale))
+    target.bind()
+    _window.clear()
+    program.use()
+    program['vp'] = module.vp
+    program['model'] = module.translate_mat @ rotate_mat
+    # e.g. the face colour table of dodecahedron.py
+    if hasattr(module, 'before_draw'):
+        module.before_draw(program)
+    module.layers.draw()
+    program.stop()
+    frame = target.read()
+
+    data = np.ascontiguousarray(frame[::-1]).tobytes()
+    png = io.BytesIO()
+    pyglet.image.ImageData(width, height, 'RGBA', data).save('frame.png',
+                                                             file=png)
+    path = '%s/%dx%d/%07.3f.png' % (name, width, height, angle)
+    return path, png.getvalue()
+
+
+def render(path, scenes, angles=360, sizes=((320, 180),), processes=None):
+    """Render every job into the zip archive at path; returns job count.
+
+    processes defaults to one per core.
+    """
+    work = jobs(scenes, angles, sizes)
+    processes = processes or os.cpu_count()
+    # a few chunks per worker keeps them all busy to the end
+    chunk = max(1, len(work) // (processes * 4))
+    # spawn: each worker gets a clean pyglet, and its own GL context
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes, _start_worker) as pool, \
+            zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED) as archive:
+        # PNGs are compressed already
+        for name, png in pool.imap_unordered(_render, work, chunk):
+            archive.writestr(name, png)
+    return len(work)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Render every scene at many angles and sizes into "
+                    "one zip archive, on all cores.")
+    parser.add_argument('scenes', nargs='*',
+                        help="default: all of %s" % ', '.join(names()))
+    parser.add_argument('--angles', type=int, default=360)
+    parser.add_argument('--size', type=int, nargs=2, action='append',
+                        help="width height, may be given more than once "
+                             "(default 320 180)")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--out', default='thumbnails.zip')
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    start = perf_counter()
+    count = render(args.out, args.scenes or names(), args.angles,
+                   args.size or [(320, 180)], args.processes)
+    took = perf_counter() - start
+    print("%d frames in %.1f s, %.1f frames/s, %s"
+          % (count, took, count / took, args.out))
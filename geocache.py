@@ -0,0 +1,264 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import struct
+import sys
+from time import perf_counter
+
+import numpy as np
+
+
+""" GEOCACHE """
+""" Generated geometry kept on disk, so later launches map it instead of
+    building it again.
+    arrays(generator, *parameters) calls generator(*parameters) once; the
+    arrays it returns (a tuple or a dict of them) are written to one file
+    under a hash of the generator's name, the source of its module and
+    of the modules of this project it uses (geometry, conway, derive ...,
+    followed through their own imports) and the parameters, and later
+    calls map that file and hand out read-only views of it, copying
+    nothing. A change to any of those modules gives new files, so a
+    geometry fix is never hidden behind what was cached before it.
+    Every hit touches its file, and after each write the least recently
+    used files go until the cache is back under limit bytes.
+    Set cache_dir to None to always build.
+    Usage: python geocache.py [--clear]
+"""
+
+cache_dir = os.path.join(
+    os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+    'polyhedra', 'geometry')
+
+# bytes the cache may hold before the least recently used files go
+limit = 1 << 30
+
+# entries mapped and built, files evicted, seconds saved by the hits
+stats = {'hits': 0, 'misses': 0, 'evicted': 0, 'saved': 0.0}
+
+# length of the JSON header that follows
+_header = struct.Struct('<I')
+# arrays start on these boundaries in the file
+_ALIGN = 64
+
+# the project's modules are the .py files next to this one
+_here = os.path.dirname(os.path.abspath(__file__))
+
+_sources = {}
+
+
+def _ours(module):
+    path = getattr(module, '__file__', None)
+    return path is not None \
+        and os.path.dirname(os.path.abspath(path)) == _here
+
+
+def _used(module):
+    # module and the project modules it names, imported whole or through
+    # a function or class taken from them, and the ones those name
+    found = {}
+    stack = [module]
+    while stack:
+        current = stack.pop()
+        if current is None or current in found.values():
+            continue
+        found[current.__name__] = current
+        for value in vars(current).values():
+            if inspect.isfunction(value) or inspect.isclass(value):
+                value = sys.modules.get(value.__module__)
+            if inspect.ismodule(value) and _ours(value):
+                stack.append(value)
+    return [found[name] for name in sorted(found)]
+
+
+def _text(module):
+    try:
+        return inspect.getsource(module)
+    except (OSError, TypeError):
+        return ''
+
+
+def _source(generator):
+    # the text of the generator's module and the project modules it
+    # uses, read once, and its own code (all there is of a script run
+    # as __main__)
+    module = inspect.getmodule(generator)
+    if module not in _sources:
+        _sources[module] = ''.join(
+            '%s\0%s\0' % (used.__name__, _text(used))
+            for used in _used(module))
+    code = getattr(generator, '__code__', None)
+    return _sources[module] + repr(code.co_code if code else None)
+
+
+def cache_path(generator, *parameters):
+    """The file the arrays of generator(*parameters) are kept in."""
+    key = hashlib.sha256()
+    for part in (generator.__module__, generator.__qualname__,
+                 _source(generator)) + parameters:
+        if isinstance(part, np.ndarray):
+            key.update(repr((part.dtype.str, part.shape)).encode())
+            key.update(np.ascontiguousarray(part).data)
+        else:
+            key.update(repr(part).encode())
+        # so moving text from one part to the next changes the key
+        key.update(b'\0')
+    return os.path.join(cache_dir, key.hexdigest() + '.bin')
+
+
+def _names(built):
+    if isinstance(built, dict):
+        return list(built), list(built.values())
+    return [str(index) for index in range(len(built))], list(built)
+
+
+def save(path, built, build_time=0.0):
+    """Write a tuple or dict of arrays to path, each aligned for mapping."""
+    names, arrays = _names(built)
+    arrays = [np.ascontiguousarray(array) for array in arrays]
+    offsets = []
+    offset = 0
+    for array in arrays:
+        offsets.append(offset)
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({
+        'kind': 'dict' if isinstance(built, dict) else 'tuple',
+        'seconds': build_time,
+        'arrays': [[name, array.dtype.str, array.shape, start]
+                   for name, array, start in zip(names, arrays, offsets)],
+    }).encode()
+    # the data starts aligned too
+    header += b' ' * (-(_header.size + len(header)) % _ALIGN)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # written whole then renamed, as farm workers may race to save
+    temporary = '%s.%d' % (path, os.getpid())
+    with open(temporary, 'wb') as file:
+        file.write(_header.pack(len(header)))
+        file.write(header)
+        for array, start in zip(arrays, offsets):
+            file.seek(_header.size + len(header) + start)
+            file.write(array.data)
+        file.truncate(_header.size + len(header) + offset)
+    os.replace(temporary, path)
+
+
+def load(path):
+    """(arrays, build seconds) of a file written by save(), mapped."""
+    with open(path, 'rb') as file:
+        size, = _header.unpack(file.read(_header.size))
+        header = json.loads(file.read(size))
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    base = _header.size + size
+    arrays = {}
+    for name, dtype, shape, start in header['arrays']:
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        if count:
+            arrays[name] = np.frombuffer(data, dtype, count,
+                                         base + start).reshape(shape)
+        else:
+            arrays[name] = _frozen((np.empty(shape, dtype),))[0]
+    if header['kind'] == 'tuple':
+        arrays = tuple(arrays[str(index)] for index in range(len(arrays)))
+    return arrays, header['seconds']
+
+
+def arrays(generator, *parameters):
+    """generator(*parameters), from the cache if it is there.
+
+    The result is read-only either way, so a hit and a miss behave alike.
+    """
+    if cache_dir is None:
+        stats['misses'] += 1
+        return _frozen(generator(*parameters))
+
+    path = cache_path(generator, *parameters)
+    try:
+        start = perf_counter()
+        built, build_time = load(path)
+        # most recently used now
+        os.utime(path)
+    except (OSError, ValueError, KeyError, struct.error):
+        # missing, or cut short or garbled: built again and rewritten
+        pass
+    else:
+        stats['hits'] += 1
+        # a small array can map slower than it builds: no time saved
+        stats['saved'] += max(0.0, build_time - (perf_counter() - start))
+        return built
+
+    stats['misses'] += 1
+    start = perf_counter()
+    built = _frozen(generator(*parameters))
+    try:
+        save(path, built, perf_counter() - start)
+        evict(keep=path)
+    except OSError:
+        # a read-only home only costs the build next time
+        pass
+    return built
+
+
+def _frozen(built):
+    names, values = _names(built)
+    values = [np.asarray(value) for value in values]
+    for value in values:
+        value.flags.writeable = False
+    if isinstance(built, dict):
+        return dict(zip(names, values))
+    return tuple(values)
+
+
+def entries():
+    """[(path, bytes, last use)] of the cache, least recently used first."""
+    if cache_dir is None or not os.path.isdir(cache_dir):
+        return []
+    found = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith('.bin'):
+            status = entry.stat()
+            found.append((entry.path, status.st_size, status.st_mtime))
+    return sorted(found, key=lambda found: found[2])
+
+
+def evict(keep=None):
+    """Remove least recently used files until the cache fits in limit."""
+    files = entries()
+    total = sum(size for _, size, _ in files)
+    for path, size, _ in files:
+        if total <= limit:
+            break
+        if path == keep:
+            continue
+        try:
+            # a mapped file stays readable to whoever maps it
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        stats['evicted'] += 1
+
+
+def report():
+    """One line on what the cache did in this process."""
+    return ("geometry: %d mapped, %d built, %d evicted, %.1f ms saved"
+            % (stats['hits'], stats['misses'], stats['evicted'],
+               stats['saved'] * 1000))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="List the geometry cache, or clear it.")
+    parser.add_argument('--clear', action='store_true')
+    args = parser.parse_args()
+
+    files = entries()
+    for path, size, _ in files:
+        if args.clear:
+            os.remove(path)
+        else:
+            print("%s %10d" % (os.path.basename(path), size))
+    print("%d files, %.1f of %.1f MB%s"
+          % (len(files), sum(size for _, size, _ in files) / 2 ** 20,
+             limit / 2 ** 20, ', cleared' if args.clear else ''))
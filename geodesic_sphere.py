@@ -0,0 +1,53 @@
+import numpy as np
+from pyglet.gl import GL_LINES, GL_TRIANGLES
+from pyglet.math import Mat4, Vec3
+
+import geocache
+import geodesic
+import scene
+
+
+""" GEODESIC SPHERE """
+""" The icosahedron's faces cut into frequency^2 triangles each and
+    pushed out onto the sphere, coloured by direction.
+"""
+
+caption = "GEODESIC SPHERE"
+
+# view_mat seems to be position of eye
+view_mat = Mat4.from_translation(Vec3(x=0, y=0, z=-200))
+proj_mat = Mat4.orthogonal_projection(left=0, right=1280,
+                                      bottom=0, top=720,
+                                      z_near=0.1, z_far=1000)
+
+vp = proj_mat @ view_mat
+
+# create the translation matrix
+translate_mat = Mat4.from_translation(vector=Vec3(x=640, y=360, z=0))
+
+# rates of turn about the x, y and z axes, in radians per second
+rates = (0.3, 0.5, 0.0)
+line_width = 1
+
+# 16 makes 5120 triangles (ref geodesic.py)
+frequency = 16
+radius = 180
+
+# built once, then mapped from the cache (ref geocache.py)
+vertices, triangles, edges = geocache.arrays(geodesic.sphere, frequency,
+                                             radius)
+
+# red, green and blue from how far each point lies along x, y and z
+colors = np.column_stack([
+    (np.abs(vertices) / radius * 255).astype(np.uint8),
+    np.full(len(vertices), 255, dtype=np.uint8)])
+
+# edges raised a little off the faces, so depth testing keeps them
+layers = scene.Scene()
+layers.add(GL_TRIANGLES, vertices, colors, triangles)
+layers.add(GL_LINES, vertices * 1.005, (40, 40, 40, 255), edges)
+
+# the data above needs no window, so other tools can import the scene
+if __name__ == '__main__':
+    import polyhedra
+    polyhedra.main(['geodesic_sphere'])
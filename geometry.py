@@ -0,0 +1,244 @@
+from functools import lru_cache
+from math import sqrt
+
+import numpy as np
+
+
+""" GEOMETRY """
+""" Vertex, edge and face arrays for every solid the scripts draw.
+    Each array is built once per process and then shared read-only:
+    vertices are contiguous float32 (n, 3), edges and faces uint16.
+"""
+
+# Regular dodecahedron built on golden ratio (ref wikipedia.com/dodecahedron)
+h = 2.0 / (1.0 + sqrt(5.0))                 # approx 0.618
+h2 = h * h
+# h is 1/phi = phi-1, h2 is 2-phi
+# icosahedron built on golden ratio
+g = (1.0 + sqrt(5.0)) / 2.0                 # approx 1.618
+
+_solids = {
+    'dodecahedron': {
+        # Vertices are defined (ref wikipedia)
+        'vertices': [
+            -1, -1, -1,                 # vertex 0
+            1, -1, -1,
+            1,  1, -1,
+            -1,  1, -1,                 # 3
+
+            -1, -1,  1,                 # 4
+            1, -1,  1,
+            1,  1,  1,
+            -1,  1,  1,                 # 7
+
+            0, -(1+h), -(1-h2),         # 8
+            0, -(1+h),  (1-h2),         # 9
+            0,  (1+h),  (1-h2),
+            0,  (1+h), -(1-h2),
+
+            -(1+h), -(1-h2), 0,
+            -(1+h),  (1-h2), 0,         # 13
+            (1+h),  (1-h2), 0,
+            (1+h), -(1-h2), 0,          # 15
+
+            -(1-h2), 0, -(1+h),
+            -(1-h2), 0,  (1+h),
+            (1-h2), 0,  (1+h),
+            (1-h2), 0, -(1+h)           # vertex 19
+        ],
+        'edges': [
+            10, 11, 11, 2, 2, 14, 14, 6, 6, 10,
+            1, 15, 15, 5, 5, 18, 18, 17, 17, 7,
+            7, 13, 13, 3, 3, 16, 16, 19, 19, 1,
+            0, 12, 12, 4, 4, 9, 9, 8, 8, 0,
+            1, 8, 5, 9, 17, 4, 13, 12, 16, 0,
+            19, 2, 15, 14, 18, 6, 7, 10, 3, 11
+        ],
+        # pentagon faces
+        'faces': [
+            0,  8,  9,  4, 12,
+            0, 12, 13,  3, 16,
+            0, 16, 19,  1,  8,
+
+            8,  1, 15,  5,  9,
+            12, 4, 17, 7, 13,
+            16, 3, 11, 2, 19,
+
+            9, 5, 18, 17, 4,
+            13, 7, 10, 11, 3,
+            19, 2, 14, 15, 1,
+
+            15, 14, 6, 18, 5,
+            17, 18, 6, 10, 7,
+            11, 10, 6, 14, 2
+        ],
+        'face_size': 5,
+    },
+    'icosahedron': {
+        # Vertices are defined by 3 orthogonal golden ratio rectangles
+        'vertices': [
+            0., -1, -g,                 # rectangle x = 0
+            0., -1,  g,
+            0.,  1,  g,
+            0.,  1, -g,
+
+            -g, 0., -1,                 # rectangle y = 0
+            g, 0., -1,
+            g, 0.,  1,
+            -g, 0.,  1,
+
+            -1, -g, 0.,                 # rectangle z = 0
+            -1,  g, 0.,
+            1,  g, 0.,
+            1, -g, 0.
+        ],
+        'edges': [
+            2, 10, 10,  6,  6, 2,  2, 9,   2, 7,
+            2,  1, 10,  5, 10, 3, 10, 9,   9, 3,
+            9,  4,  9,  7,  1, 6,  1, 11,  1, 8,
+            1,  7,  6, 11,  6, 5,  5, 11,  5, 0,
+            5,  3,  3,  0,  3, 4,  7,  4,  7, 8,
+            8,  0,  0,  4,  4, 8,  8, 11, 11, 0
+        ],
+        'faces': [
+            0, 3, 4, 0, 3, 5, 0, 5, 11, 0, 4, 8, 0, 8, 11,
+            1, 2, 6, 1, 2, 7, 1, 6, 11, 1, 7, 8, 1, 8, 11,
+            2, 6, 10, 2, 7, 9, 2, 9, 10,
+            3, 4, 9, 3, 5, 10, 3, 9, 10,
+            4, 7, 8, 4, 7, 9,
+            5, 6, 10, 5, 6, 11
+        ],
+        'face_size': 3,
+    },
+    'octahedron': {
+        # vertex 0 is opposite vertex 3
+        'vertices': [
+            1, 0, 0,
+            0, 1, 0,
+            0, 0, 1,
+
+            -1, 0, 0,
+            0, -1, 0,
+            0, 0, -1
+        ],
+        'edges': [
+            0, 1,  0, 2,  0, 4,  0, 5,
+            3, 1,  3, 2,  3, 4,  3, 5,
+            1, 2,  2, 4,  4, 5,  5, 1,
+        ],
+        'faces': [
+            0, 1, 2,  3, 5, 4,
+            0, 2, 4,  3, 1, 5,
+            0, 5, 1,  3, 4, 2,
+            0, 4, 5,  3, 2, 1
+        ],
+        'face_size': 3,
+    },
+    'cube': {
+        'vertices': [
+            -1, -1, -1,
+            -1, -1,  1,
+            -1,  1,  1,
+            -1,  1, -1,
+
+            1, -1, -1,
+            1, -1,  1,
+            1,  1,  1,
+            1,  1, -1
+        ],
+        'edges': [
+            0, 1,  1, 2,  2, 3,  3, 0,
+            4, 5,  5, 6,  6, 7,  7, 4,
+            0, 4,  1, 5,  2, 6,  3, 7
+        ],
+        'faces': [
+            0, 1, 2, 3,
+            4, 5, 6, 7,
+            0, 1, 5, 4,
+            3, 2, 6, 7,
+            0, 3, 7, 4,
+            1, 2, 6, 5
+        ],
+        'face_size': 4,
+    },
+    'tetrahedron': {
+        # the same points as dodecahedron vertices 6, 3, 1, 4
+        'vertices': [
+            1,  1,  1,
+            -1,  1, -1,
+            1, -1, -1,
+            -1, -1,  1
+        ],
+        'edges': [
+            0, 1,  0, 2,  0, 3,  1, 2,  1, 3,  2, 3
+        ],
+        'faces': [
+            0, 1, 2,
+            0, 1, 3,
+            0, 2, 3,
+            1, 2, 3
+        ],
+        'face_size': 3,
+    },
+}
+
+
+def _frozen(array):
+    array = np.ascontiguousarray(array)
+    array.flags.writeable = False
+    return array
+
+
+def names():
+    """Names of all the solids, in the order they are defined."""
+    return tuple(_solids)
+
+
+@lru_cache(maxsize=None)
+def _source(name):
+    # double precision master copy, everything else is derived from it
+    return np.array(_solids[name]['vertices'], dtype=np.float64).reshape(-1, 3)
+
+
+@lru_cache(maxsize=None)
+def vertices(name, scale=1):
+    """(n, 3) float32 vertices of a solid, multiplied by scale.
+
+    The same array object is returned for the same (name, scale), so
+    pass vertices(...).ravel() to vertex_list_indexed without copying.
+    """
+    return _frozen((_source(name) * scale).astype(np.float32))
+
+
+@lru_cache(maxsize=None)
+def edges(name):
+    """(m, 2) uint16 vertex index pairs, one per edge."""
+    return _frozen(np.array(_solids[name]['edges'],
+                            dtype=np.uint16).reshape(-1, 2))
+
+
+@lru_cache(maxsize=None)
+def faces(name):
+    """(f, k) uint16 faces, wound counter-clockwise seen from outside."""
+    solid = _solids[name]
+    faces = np.array(solid['faces'],
+                     dtype=np.uint16).reshape(-1, solid['face_size'])
+    # the solids are convex and centred on the origin, so a face is
+    # inward wound when its normal points back towards the origin
+    corners = _source(name)[faces[:, :3]]
+    normals = np.cross(corners[:, 1] - corners[:, 0],
+                       corners[:, 2] - corners[:, 0])
+    inward = np.einsum('ij,ij->i', normals, corners[:, 0]) < 0
+    faces[inward] = faces[inward, ::-1]
+    return _frozen(faces)
+
+
+@lru_cache(maxsize=None)
+def triangles(name):
+    """(t, 3) uint16 triangles, each face split into a fan."""
+    face = faces(name)
+    k = face.shape[1]
+    fan = np.stack([np.zeros(k - 2, dtype=np.intp),
+                    np.arange(1, k - 1),
+                    np.arange(2, k)], axis=1)
+    return _frozen(face[:, fan].reshape(-1, 3))
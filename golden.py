@@ -0,0 +1,392 @@
+from fractions import Fraction
+from functools import lru_cache, total_ordering
+from math import lcm, sqrt
+
+import numpy as np
+
+import geometry
+import symmetry
+
+
+""" GOLDEN """
+""" Exact numbers a + b√5, for the golden ratio solids.
+    Every coordinate of the dodecahedron and icosahedron, their edge
+    lengths, distances and the matrices of their rotations lie in Q(√5),
+    so classifying distances, testing planes and checking symmetries can
+    be done exactly instead of through windows like 1.618 < d < 1.619.
+    Golden is one number with Fraction parts. GoldenArray holds whole
+    arrays as (a + b√5) / denominator: two int64 arrays and one shared
+    denominator, so sums and products are integer array arithmetic and
+    every element has an exact integer key for np.unique or a dict.
+"""
+
+SQRT5 = sqrt(5.0)
+
+
+def _largest(part):
+    # largest magnitude in an int64 array, as a Python int
+    return max(-int(part.min()), int(part.max())) if part.size else 0
+
+
+def _bounded(terms, *parts):
+    # terms values as large as the largest in parts must add up
+    # without leaving int64
+    if terms * max(_largest(part) for part in parts) >= 1 << 63:
+        raise OverflowError("too large for int64 sums")
+
+
+@total_ordering
+class Golden:
+    """The number a + b√5, a and b rational."""
+
+    __slots__ = ('a', 'b')
+
+    def __init__(self, a=0, b=0):
+        self.a = Fraction(a)
+        self.b = Fraction(b)
+
+    @staticmethod
+    def _coerce(other):
+        if isinstance(other, Golden):
+            return other
+        if isinstance(other, (int, Fraction)):
+            return Golden(other)
+        return None
+
+    def __add__(self, other):
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        return Golden(self.a + other.a, self.b + other.b)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return Golden(-self.a, -self.b)
+
+    def __pos__(self):
+        return self
+
+    def __sub__(self, other):
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        return Golden(self.a - other.a, self.b - other.b)
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        return Golden(self.a * other.a + 5 * self.b * other.b,
+                      self.a * other.b + self.b * other.a)
+
+    __rmul__ = __mul__
+
+    def conjugate(self):
+        """a - b√5."""
+        return Golden(self.a, -self.b)
+
+    def norm(self):
+        """(a + b√5)(a - b√5) = a² - 5b², a rational."""
+        return self.a * self.a - 5 * self.b * self.b
+
+    def __truediv__(self, other):
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        norm = other.norm()
+        if norm == 0:
+            raise ZeroDivisionError("division by zero")
+        product = self * other.conjugate()
+        return Golden(product.a / norm, product.b / norm)
+
+    def __rtruediv__(self, other):
+        return Golden(other) / self
+
+    def __pow__(self, exponent):
+        if not isinstance(exponent, int):
+            return NotImplemented
+        if exponent < 0:
+            return 1 / self ** -exponent
+        result, base = Golden(1), self
+        while exponent:
+            if exponent & 1:
+                result = result * base
+            base = base * base
+            exponent >>= 1
+        return result
+
+    def sign(self):
+        """-1, 0 or 1, exactly."""
+        sa = (self.a > 0) - (self.a < 0)
+        sb = (self.b > 0) - (self.b < 0)
+        if sa == sb or sb == 0:
+            return sa
+        if sa == 0:
+            return sb
+        # opposite signs: the larger of a² and 5b² wins
+        return sa if self.a * self.a > 5 * self.b * self.b else sb
+
+    def __eq__(self, other):
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        return self.a == other.a and self.b == other.b
+
+    def __lt__(self, other):
+        other = self._coerce(other)
+        if other is None:
+            return NotImplemented
+        return (self - other).sign() < 0
+
+    def __hash__(self):
+        # equal to the hash of a Fraction or int of the same value
+        return hash(self.a) if self.b == 0 else hash((self.a, self.b))
+
+    def __abs__(self):
+        return -self if self.sign() < 0 else self
+
+    def __bool__(self):
+        return bool(self.a or self.b)
+
+    def __float__(self):
+        return float(self.a) + float(self.b) * SQRT5
+
+    def __repr__(self):
+        return 'Golden(%s, %s)' % (self.a, self.b)
+
+    def __str__(self):
+        if self.b == 0:
+            return str(self.a)
+        b = '√5' if self.b == 1 else '-√5' if self.b == -1 \
+            else '%s√5' % self.b
+        if self.a == 0:
+            return b
+        return '%s %s %s' % (self.a, '-' if b[0] == '-' else '+',
+                             b.lstrip('-'))
+
+
+# the golden ratio and its inverse
+phi = Golden(Fraction(1, 2), Fraction(1, 2))
+h = Golden(Fraction(-1, 2), Fraction(1, 2))
+
+
+class GoldenArray:
+    """Arrays of (a + b√5) / denominator, a and b int64 of one shape.
+
+    int64 holds the dodecahedron and icosahedron, their distances and
+    rotations with a great deal to spare; products, sums and
+    differences that would not fit raise OverflowError.
+    """
+
+    __slots__ = ('a', 'b', 'denominator')
+
+    def __init__(self, a, b=None, denominator=1):
+        self.a = np.asarray(a, dtype=np.int64)
+        self.b = (np.zeros_like(self.a) if b is None
+                  else np.asarray(b, dtype=np.int64))
+        self.denominator = int(denominator)
+
+    @classmethod
+    def from_floats(cls, values, denominator=2, limit=8, tolerance=1e-6):
+        """Exact form of floats known to be (a + b√5) / denominator.
+
+        |b| is tried up to limit; raises ValueError for any value that
+        is no such number.
+        """
+        scaled = np.asarray(values, dtype=np.float64) * denominator
+        best_a = np.zeros(scaled.shape, dtype=np.int64)
+        best_b = np.zeros(scaled.shape, dtype=np.int64)
+        error = np.full(scaled.shape, np.inf)
+        for b in range(-limit, limit + 1):
+            a = np.round(scaled - b * SQRT5)
+            miss = np.abs(scaled - a - b * SQRT5)
+            # √5 is irrational, so at most one b comes this close
+            better = miss < error - tolerance
+            best_a[better] = a[better]
+            best_b[better] = b
+            error[better] = miss[better]
+        if (error > tolerance * np.maximum(1, np.abs(scaled))).any():
+            raise ValueError("values not of the form (a + b√5) / %d"
+                             % denominator)
+        return cls(best_a, best_b, denominator)
+
+    @classmethod
+    def of(cls, numbers, denominator):
+        """Array of Golden numbers, all multiples of 1 / denominator."""
+        numbers = [Golden(number) if isinstance(number, (int, Fraction))
+                   else number for number in numbers]
+        a = [number.a * denominator for number in numbers]
+        b = [number.b * denominator for number in numbers]
+        if any(part.denominator != 1 for part in a + b):
+            raise ValueError("not all multiples of 1/%d" % denominator)
+        return cls([int(part) for part in a], [int(part) for part in b],
+                   denominator)
+
+    @property
+    def shape(self):
+        return self.a.shape
+
+    def __len__(self):
+        return len(self.a)
+
+    def __getitem__(self, index):
+        return GoldenArray(self.a[index], self.b[index], self.denominator)
+
+    def reshape(self, *shape):
+        return GoldenArray(self.a.reshape(*shape), self.b.reshape(*shape),
+                           self.denominator)
+
+    def item(self, *index):
+        """One element as a Golden."""
+        return Golden(Fraction(int(self.a[index]), self.denominator),
+                      Fraction(int(self.b[index]), self.denominator))
+
+    def with_denominator(self, denominator):
+        """The same values over a multiple of the denominator."""
+        factor, rest = divmod(denominator, self.denominator)
+        if rest:
+            raise ValueError("%d is not a multiple of %d"
+                             % (denominator, self.denominator))
+        return GoldenArray(self.a * factor, self.b * factor, denominator)
+
+    def _common(self, other):
+        if not isinstance(other, GoldenArray):
+            other = GoldenArray(other)
+        denominator = lcm(self.denominator, other.denominator)
+        return (self.with_denominator(denominator),
+                other.with_denominator(denominator))
+
+    def __add__(self, other):
+        x, y = self._common(other)
+        _bounded(2, x.a, x.b, y.a, y.b)
+        return GoldenArray(x.a + y.a, x.b + y.b, x.denominator)
+
+    __radd__ = __add__
+
+    def __neg__(self):
+        return GoldenArray(-self.a, -self.b, self.denominator)
+
+    def __sub__(self, other):
+        x, y = self._common(other)
+        _bounded(2, x.a, x.b, y.a, y.b)
+        return GoldenArray(x.a - y.a, x.b - y.b, x.denominator)
+
+    def __rsub__(self, other):
+        return -self + other
+
+    def __mul__(self, other):
+        if not isinstance(other, GoldenArray):
+            other = GoldenArray(other)
+        for part in (self.a, self.b, other.a, other.b):
+            if part.size and np.abs(part).max() >= 1 << 30:
+                raise OverflowError("too large for int64 products")
+        return GoldenArray(self.a * other.a + 5 * self.b * other.b,
+                           self.a * other.b + self.b * other.a,
+                           self.denominator * other.denominator)
+
+    __rmul__ = __mul__
+
+    def sum(self, axis=None):
+        terms = self.a.size if axis is None else self.a.shape[axis]
+        _bounded(terms, self.a, self.b)
+        return GoldenArray(self.a.sum(axis=axis), self.b.sum(axis=axis),
+                           self.denominator)
+
+    def dot(self, other):
+        """Sum of products along the last axis."""
+        return (self * other).sum(axis=-1)
+
+    def cross(self, other):
+        """Cross product of (..., 3) arrays."""
+        x, y = self, other
+        return GoldenArray.stack([
+            x[..., 1] * y[..., 2] - x[..., 2] * y[..., 1],
+            x[..., 2] * y[..., 0] - x[..., 0] * y[..., 2],
+            x[..., 0] * y[..., 1] - x[..., 1] * y[..., 0]], axis=-1)
+
+    @staticmethod
+    def stack(arrays, axis=0):
+        denominator = lcm(*(array.denominator for array in arrays))
+        arrays = [array.with_denominator(denominator) for array in arrays]
+        return GoldenArray(np.stack([array.a for array in arrays], axis),
+                           np.stack([array.b for array in arrays], axis),
+                           denominator)
+
+    def sign(self):
+        """-1, 0 or 1 for every element, exactly."""
+        sa, sb = np.sign(self.a), np.sign(self.b)
+        # where the signs differ, the larger of a² and 5b² wins
+        larger_a = self.a * self.a > 5 * self.b * self.b
+        return np.where((sa == sb) | (sb == 0), sa,
+                        np.where(sa == 0, sb, np.where(larger_a, sa, sb)))
+
+    def keys(self):
+        """One int64 per element, equal exactly when the values are."""
+        if self.a.size and max(np.abs(self.a).max(),
+                               np.abs(self.b).max()) >= 1 << 31:
+            raise OverflowError("too large for int64 keys")
+        return (self.a << 32) + self.b
+
+    def __array__(self, dtype=None, copy=None):
+        values = (self.a + self.b * SQRT5) / self.denominator
+        return values if dtype is None else values.astype(dtype)
+
+    def __repr__(self):
+        return 'GoldenArray(%r, %r, %d)' % (self.a.tolist(),
+                                            self.b.tolist(),
+                                            self.denominator)
+
+
+@lru_cache(maxsize=None)
+def vertices(name):
+    """(n, 3) exact vertices of a geometry.py solid."""
+    return GoldenArray.from_floats(geometry.vertices(name).astype(
+        np.float64), denominator=2)
+
+
+@lru_cache(maxsize=None)
+def rotations(name):
+    """(k, 3, 3) exact rotations of a symmetry.py group."""
+    return GoldenArray.from_floats(symmetry.rotations(name), denominator=4)
+
+
+def distance_classes(points):
+    """Distinct squared distances between points and how many pairs have
+    each: (squared distances, counts, (i, j, label)), as
+    derive.distance_classes but exact, squared and over every pair.
+    """
+    i, j = np.triu_indices(len(points), k=1)
+    delta = points[i] - points[j]
+    squared = delta.dot(delta)
+    _, first, label, counts = np.unique(squared.keys(), return_index=True,
+                                        return_inverse=True,
+                                        return_counts=True)
+    return squared[first], counts, (i, j, label)
+
+
+def coplanar(points, faces):
+    """Whether every corner of each (f, k) face lies in one plane."""
+    corners = points[np.asarray(faces)]
+    normal = (corners[:, 1] - corners[:, 0]).cross(
+        corners[:, 2] - corners[:, 0])
+    # every corner's offset from the first, along the normal, is 0
+    offsets = (corners - corners[:, :1]).dot(normal[:, None])
+    return ((offsets.a == 0) & (offsets.b == 0)).all(axis=1)
+
+
+def is_symmetry(points, matrices):
+    """Whether each (3, 3) matrix maps the set of points onto itself."""
+    # (k, n, 3) images of the points, as symmetry.orbit
+    images = (points.reshape(1, -1, 1, 3) * matrices[:, None]).sum(axis=-1)
+    images = images.with_denominator(
+        lcm(images.denominator, points.denominator))
+    own = points.with_denominator(images.denominator).keys()
+    # the same set in any order: rows sorted by their keys
+    own = np.sort(own.view([('', own.dtype)] * 3).ravel())
+    moved = np.ascontiguousarray(images.keys())
+    moved = np.sort(moved.view([('', moved.dtype)] * 3)[..., 0], axis=1)
+    return (moved == own[None]).all(axis=1)
@@ -0,0 +1,234 @@
+import argparse
+from itertools import count
+from time import perf_counter
+
+import numpy as np
+
+import derive
+
+
+""" HULL """
+""" Convex hulls, the standard way to get the faces of a new solid from
+    its vertices alone.
+    Quickhull: start from a tetrahedron of extreme points, give every
+    point outside it to the face it is furthest above, then keep adding
+    the furthest point of some face, replacing the faces it sees with a
+    fan from it to their horizon. Points are only tested against the
+    new faces, in one array operation per step, and most are dropped
+    early, so random points take O(n log n) expected time.
+    The steps themselves are Python, one per corner of the hull, at
+    about 0.2 ms each: a million points in a ball (a few thousand
+    corners) take about 2 s, but when every point is a corner it is
+    the steps that count, 80000 points on a sphere taking some 17 s
+    and a million minutes.
+    Triangles in one plane (the pentagons of a dodecahedron, the
+    squares of a cube) are then merged: only edges between faces at an
+    angle are kept, and derive.faces walks the polygons round them.
+    Points in the plane of a face or on an edge are not corners, so
+    they do not become vertices.
+    Usage: python hull.py --points 1000000 [--sphere-points 20000]
+"""
+
+
+def _prepared(points, tolerance):
+    # float32 vertices (geometry.py) are only good to about 1e-7, so the
+    # default tolerance follows the precision they came in
+    points = np.asarray(points)
+    kind = points.dtype if points.dtype.kind == 'f' else np.float64
+    points = points.astype(np.float64).reshape(-1, 3)
+    if tolerance is None:
+        tolerance = 64 * np.finfo(kind).eps * np.abs(points).max()
+    return points, tolerance
+
+
+def _plane(points, a, b, c):
+    normal = np.cross(points[b] - points[a], points[c] - points[a])
+    length = np.linalg.norm(normal, axis=-1)
+    normal = normal / np.expand_dims(length, -1)
+    return normal, np.einsum('...i,...i->...', normal, points[a])
+
+
+def _simplex(points, tolerance):
+    # two of the extreme points furthest apart
+    extremes = np.unique(np.concatenate([points.argmin(axis=0),
+                                         points.argmax(axis=0)]))
+    delta = points[extremes, None] - points[None, extremes]
+    i, j = np.unravel_index(np.einsum('ijk,ijk->ij', delta, delta).argmax(),
+                            (len(extremes), len(extremes)))
+    a, b = extremes[i], extremes[j]
+    # then the point furthest from their line, and from their plane
+    line = (points[b] - points[a]) / np.linalg.norm(points[b] - points[a])
+    offset = points - points[a]
+    across = offset - np.outer(offset @ line, line)
+    c = np.einsum('ij,ij->i', across, across).argmax()
+    if np.linalg.norm(across[c]) <= tolerance:
+        raise ValueError("points are collinear, they have no hull")
+    normal, height = _plane(points, a, b, c)
+    above = points @ normal - height
+    d = np.abs(above).argmax()
+    if abs(above[d]) <= tolerance:
+        raise ValueError("points are coplanar, they have no hull")
+    # wound so that every face has d, or the other corner, behind it
+    if above[d] > 0:
+        b, c = c, b
+    return [(a, b, c), (a, d, b), (b, d, c), (c, d, a)]
+
+
+def triangles(points, tolerance=None):
+    """(t, 3) triangles of the convex hull, wound outward.
+
+    tolerance is how far above a face a point must be to lie outside
+    it; by default a few units in the last place of the points' dtype,
+    times the size of the point cloud.
+    """
+    points, tolerance = _prepared(points, tolerance)
+
+    faces = {}
+    planes = {}
+    outside = {}
+    owner = {}
+    pending = []
+    numbers = count()
+
+    def add(corners, candidates):
+        normal, offset = _plane(points, *(np.array(column) for column in
+                                          zip(*corners)))
+        # each candidate goes to the new face it is furthest above
+        height = points[candidates] @ normal.T - offset
+        best = height.argmax(axis=1)
+        keep = height[np.arange(len(candidates)), best] > tolerance
+        candidates, best = candidates[keep], best[keep]
+        heights = height[keep, best]
+        order = np.argsort(best, kind='stable')
+        split = np.searchsorted(best[order], np.arange(1, len(corners)))
+        groups = np.split(order, split)
+        for (a, b, c), n, o, group in zip(corners, normal, offset, groups):
+            face = next(numbers)
+            faces[face] = (int(a), int(b), int(c))
+            planes[face] = (n, o)
+            for edge in ((a, b), (b, c), (c, a)):
+                owner[edge] = face
+            if len(group):
+                outside[face] = (candidates[group], heights[group])
+                pending.append(face)
+
+    add(_simplex(points, tolerance), np.arange(len(points)))
+
+    while pending:
+        face = pending.pop()
+        if face not in outside:
+            continue
+        candidates, heights = outside[face]
+        apex = int(candidates[heights.argmax()])
+        point = points[apex]
+
+        # the faces the apex sees, and the horizon round them
+        visible = {face}
+        hidden = set()
+        horizon = []
+        stack = [face]
+        while stack:
+            current = stack.pop()
+            a, b, c = faces[current]
+            for edge in ((a, b), (b, c), (c, a)):
+                neighbour = owner[edge[::-1]]
+                if neighbour in visible:
+                    continue
+                if neighbour not in hidden:
+                    normal, offset = planes[neighbour]
+                    if point @ normal - offset > tolerance:
+                        visible.add(neighbour)
+                        stack.append(neighbour)
+                        continue
+                    hidden.add(neighbour)
+                horizon.append(edge)
+
+        # their outside points go to the fan from the apex
+        orphans = [outside.pop(current)[0] for current in visible
+                   if current in outside]
+        for current in visible:
+            a, b, c = faces.pop(current)
+            del planes[current]
+            for edge in ((a, b), (b, c), (c, a)):
+                if owner.get(edge) == current:
+                    del owner[edge]
+        orphans = np.concatenate(orphans)
+        add([(a, b, apex) for a, b in horizon], orphans[orphans != apex])
+
+    return np.array(list(faces.values()), dtype=np.intp)
+
+
+def hull(points, tolerance=None):
+    """Convex hull of points: (faces, triangles) indexing points.
+
+    faces are (f, k) polygons wound counter-clockwise from outside,
+    padded with -1 when they differ in size, coplanar triangles merged
+    and points along their edges dropped;
+    triangles (t, 3) are the faces split into fans.
+    """
+    points, tolerance = _prepared(points, tolerance)
+    triangle = triangles(points, tolerance)
+
+    # every edge of the triangles, with the triangles either side
+    sides = np.stack([triangle, np.roll(triangle, -1, axis=1)], axis=2)
+    sides = sides.reshape(-1, 2)
+    order = np.lexsort(sides.T[::-1])
+    twin = order[np.searchsorted(
+        (sides[order, 0] * len(points) + sides[order, 1]),
+        sides[:, 1] * len(points) + sides[:, 0])]
+    # corner of the triangle across each edge, against this one's plane
+    across = triangle.ravel()[3 * (twin // 3) + (twin % 3 + 2) % 3]
+    normal, offset = _plane(points, *triangle.T)
+    normal, offset = np.repeat(normal, 3, axis=0), np.repeat(offset, 3)
+    bent = np.einsum('ij,ij->i', points[across], normal) - offset \
+        < -tolerance
+    edges = sides[bent & (sides[:, 0] < sides[:, 1])]
+
+    # derive.faces walks the polygons round the edges that are kept
+    used, local = np.unique(edges, return_inverse=True)
+    faces = derive.faces(points[used], local.reshape(-1, 2))
+    faces = np.where(faces >= 0, used[faces], -1)
+
+    # points along an edge of a polygon are corners of the walk, but the
+    # polygon goes straight on there: drop them, or the fans get
+    # triangles with no area
+    size = (faces >= 0).sum(axis=1)[:, None]
+    column = np.arange(faces.shape[1])
+    rows = np.arange(len(faces))[:, None]
+    before = points[faces[rows, (column - 1) % size]]
+    after = points[faces[rows, (column + 1) % size]]
+    chord = after - before
+    off = np.linalg.norm(np.cross(points[faces] - before, chord), axis=2) \
+        / np.linalg.norm(chord, axis=2)
+    corner = (faces >= 0) & (off > tolerance)
+    order = np.argsort(~corner, axis=1, kind='stable')
+    faces = np.take_along_axis(np.where(corner, faces, -1), order, axis=1)
+    faces = faces[:, :corner.sum(axis=1).max()]
+    return faces, derive.triangulate(faces)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Time the hull of random points in a ball and on "
+                    "a sphere.")
+    parser.add_argument('--points', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sphere-points', type=int, default=20000,
+                        help="points on the sphere, all of them corners "
+                             "that cost a Python step each")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    directions = rng.normal(size=(args.points, 3))
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    for name, radius in (('ball', rng.random(args.points) ** (1 / 3)),
+                         ('sphere', np.ones(args.points))):
+        if name == 'sphere':
+            # every point a corner: a step each (see above)
+            directions = directions[:min(args.points, args.sphere_points)]
+            radius = radius[:len(directions)]
+        start = perf_counter()
+        faces, triangle = hull(directions * radius[:, None])
+        took = perf_counter() - start
+        print("%-6s %8d points  %6d faces  %.2f s"
+              % (name, len(directions), len(faces), took))
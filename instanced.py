@@ -0,0 +1,222 @@
+import sys
+
+import numpy as np
+import pyglet
+from pyglet.gl import GL_DEPTH_TEST, GL_TRIANGLES
+from pyglet.gl import glClearColor, glEnable
+from pyglet.gl import glBindVertexArray, glDrawElementsInstanced
+from pyglet.gl import GL_STREAM_DRAW, GL_ELEMENT_ARRAY_BUFFER
+from pyglet.math import Mat4, Vec3
+
+import buffers
+import geometry
+import shaders
+import symmetry
+
+
+""" MANY POLYHEDRA """
+""" A grid of spinning dodecahedra, icosahedra and compounds of five cubes,
+    each with its own rotation axis, rate and phase.
+    Every mesh is drawn with one instanced draw call; the rotations of all
+    copies are worked out together in NumPy and uploaded in one go.
+    Usage: python instanced.py [number of copies, default 10000]
+"""
+
+count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+window = pyglet.window.Window(1280, 720, caption="MANY POLYHEDRA")
+glEnable(GL_DEPTH_TEST)
+# set window background colour
+glClearColor(1.0, 1.0, 1.0, 1.0)
+
+
+# the usual vertex source, plus a position and a rotation per copy
+vertex_source = """
+#version 330
+layout(location = 0) in vec3 vertices;
+layout(location = 1) in vec4 colors;
+layout(location = 2) in vec3 offset;
+layout(location = 3) in vec4 rotation;
+
+out vec4 newColor;
+
+uniform mat4 vp;
+uniform mat4 model;
+
+// rotate v by the unit quaternion q
+vec3 rotate(vec4 q, vec3 v)
+{
+    return v + 2.0 * cross(q.xyz, cross(q.xyz, v) + q.w * v);
+}
+
+void main()
+{
+    vec3 position = rotate(rotation, vertices) + offset;
+    gl_Position = vp * model * vec4(position, 1.0f);
+    newColor = colors;
+}
+"""
+
+fragment_source = """
+#version 330
+in vec4 newColor;
+
+out vec4 outColor;
+
+void main()
+{
+    outColor = newColor;
+}
+"""
+
+# compile vertex source and fragment source into the shader program
+program = shaders.create_program(vertex_source, fragment_source)
+
+# view_mat seems to be position of eye
+view_mat = Mat4.from_translation(Vec3(x=0, y=0, z=-200))
+proj_mat = Mat4.orthogonal_projection(left=0, right=1280,
+                                      bottom=0, top=720,
+                                      z_near=0.1, z_far=1000)
+
+vp = proj_mat @ view_mat
+
+program['vp'] = vp
+
+# create the translation matrix
+translate_mat = Mat4.from_translation(vector=Vec3(x=640, y=360, z=0))
+
+program['model'] = translate_mat
+
+# Just some colours
+palette = np.array([
+    (255, 0, 0, 255),
+    (0, 200, 0, 255),
+    (0, 0, 255, 255),
+    (255, 127, 0, 255),
+    (240, 240, 0, 255),
+], dtype=np.uint8)
+
+
+def flat_mesh(vertices, faces, colors):
+    """Separate corners for every face, so each face has a single colour.
+
+    Returns (positions, colors, triangle indices) scaled to unit radius.
+    """
+    faces = np.asarray(faces)
+    k = faces.shape[1]
+    positions = vertices[faces].reshape(-1, 3)
+    positions = positions / np.linalg.norm(positions, axis=1).max()
+    corner_colors = np.repeat(colors, k, axis=0)
+    # fan out each face from its first corner
+    first = np.arange(len(faces))[:, None] * k
+    fan = np.stack([np.zeros(k - 2, dtype=np.intp),
+                    np.arange(1, k - 1),
+                    np.arange(2, k)], axis=1).ravel()
+    indices = (first + fan).ravel().astype(np.uint32)
+    return (positions.astype(np.float32),
+            corner_colors.astype(np.uint8), indices)
+
+
+dodecahedron = geometry.vertices('dodecahedron')
+cubes = symmetry.indices_into(
+    symmetry.compound(geometry.vertices('cube'),
+                      symmetry.rotations('icosahedral')),
+    dodecahedron)
+
+# the face across the centre from each face of the dodecahedron, and a
+# number for each opposite pair
+centres = dodecahedron[geometry.faces('dodecahedron')].mean(axis=1)
+opposite = np.linalg.norm(centres[:, None] + centres[None],
+                          axis=2).argmin(axis=1)
+pairs = np.unique(np.minimum(np.arange(len(centres)), opposite),
+                  return_inverse=True)[1]
+
+meshes = [
+    # dodecahedron, opposite faces the same colour
+    flat_mesh(dodecahedron, geometry.faces('dodecahedron'),
+              palette[pairs % len(palette)]),
+    flat_mesh(geometry.vertices('icosahedron'),
+              geometry.faces('icosahedron'),
+              palette[np.arange(20) % 5]),
+    # compound of five cubes, one colour per cube
+    flat_mesh(dodecahedron,
+              cubes[:, geometry.faces('cube')].reshape(-1, 4),
+              palette[np.repeat(np.arange(5), 6)]),
+]
+
+# lay the copies out on a grid filling the window, taking turns by mesh
+columns = int(np.ceil(np.sqrt(count * 1280 / 720)))
+rows = int(np.ceil(count / columns))
+cell = min(1280 / columns, 720 / rows)
+grid = np.stack(np.meshgrid((np.arange(columns) - (columns - 1) / 2) * cell,
+                            (np.arange(rows) - (rows - 1) / 2) * cell),
+                axis=-1).reshape(-1, 2)[:count]
+
+rng = np.random.default_rng(0)
+axis = rng.normal(size=(count, 3))
+axis /= np.linalg.norm(axis, axis=1)[:, None]
+rate = rng.uniform(0.3, 1.5, size=count)
+phase = rng.uniform(0, 2 * np.pi, size=count)
+
+# copies sorted by mesh, so each mesh owns one slice of the arrays
+kind = np.arange(count) % len(meshes)
+order = np.argsort(kind, kind='stable')
+offsets = np.zeros((count, 3), dtype=np.float32)
+offsets[:, :2] = grid[order]
+starts = np.searchsorted(kind[order], np.arange(len(meshes) + 1))
+
+rotations = np.zeros((count, 4), dtype=np.float32)
+half_angle = np.empty(count)
+sine = np.empty(count)
+
+instances = []
+for mesh, (positions, colors, indices) in enumerate(meshes):
+    copies = slice(starts[mesh], starts[mesh + 1])
+    vao = buffers.create_vertex_array()
+    buffers.attribute(0, buffers.create_buffer(positions * 0.4 * cell),
+                      3, np.float32)
+    buffers.attribute(1, buffers.create_buffer(colors),
+                      4, np.uint8, normalize=True)
+    buffers.attribute(2, buffers.create_buffer(offsets[copies]),
+                      3, np.float32, divisor=1)
+    rotation_buffer = buffers.create_buffer(
+        size=rotations[copies].nbytes, usage=GL_STREAM_DRAW)
+    buffers.attribute(3, rotation_buffer, 4, np.float32, divisor=1)
+    buffers.create_buffer(indices, target=GL_ELEMENT_ARRAY_BUFFER)
+    glBindVertexArray(0)
+    instances.append((vao, rotation_buffer, len(indices), copies))
+
+
+@window.event
+def on_draw():
+    window.clear()
+    program.use()
+    for vao, _, index_count, copies in instances:
+        glBindVertexArray(vao)
+        glDrawElementsInstanced(GL_TRIANGLES, index_count,
+                                buffers.gl_type(np.uint32), 0,
+                                copies.stop - copies.start)
+    glBindVertexArray(0)
+    program.stop()
+
+
+time = 0
+
+
+def update(dt: float):
+    global time
+    time += dt
+    # quaternions for all copies at once: (axis * sin(a/2), cos(a/2))
+    np.multiply(rate, time, out=half_angle)
+    np.add(half_angle, phase, out=half_angle)
+    np.multiply(half_angle, 0.5, out=half_angle)
+    np.sin(half_angle, out=sine)
+    np.multiply(axis, sine[:, None], out=rotations[:, :3])
+    np.cos(half_angle, out=rotations[:, 3])
+    # upload the new rotations of each mesh's copies in one call
+    for _, rotation_buffer, _, copies in instances:
+        buffers.upload(rotation_buffer, rotations[copies])
+
+
+pyglet.clock.schedule_interval(update, 1/60)
+pyglet.app.run()
@@ -0,0 +1,434 @@
+import argparse
+import re
+from itertools import islice
+from time import perf_counter
+
+import numpy as np
+
+import geodesic
+
+
+""" MESH FILE """
+""" Polyhedra from OBJ, OFF and PLY files, as arrays.
+    Text is read in blocks of lines and every block parsed in one go:
+    the lines of a kind are joined, with a number that cannot be an index
+    between them, and np.fromstring reads the lot in C, so the ends of the
+    lines are found again from the markers. Only the arrays being built
+    grow with the file, never a list of Python numbers.
+    Binary PLY is not read at all: its vertices and faces are views into
+    a memory map of the file, when every face has the same corner count.
+    Faces of different sizes are padded with -1 (as derive.faces), and
+    derive.triangulate cuts them into fans.
+    Every loader takes a check() called between blocks, so a caller can
+    give up on a large file part way: whatever check raises stops the
+    load (ref polyhedra.py).
+    Usage: python meshfile.py model.ply
+           python meshfile.py --write sphere.obj --frequency 512
+           python -m polyhedra model.ply
+"""
+
+# text is read this many bytes at a time
+BLOCK = 1 << 24
+
+formats = ('.obj', '.off', '.ply')
+
+
+def _blocks(stream, check=None):
+    # whole lines, about BLOCK bytes at a time
+    rest = b''
+    while True:
+        if check is not None:
+            check()
+        data = stream.read(BLOCK)
+        if not data:
+            if rest:
+                yield rest.split(b'\n')
+            return
+        data = rest + data
+        cut = data.rfind(b'\n') + 1
+        rest = data[cut:]
+        if cut:
+            yield data[:cut].split(b'\n')
+        else:
+            rest = data
+
+
+def _numbers(lines, dtype, marker):
+    # every number of the lines, marker after each line, and line sizes
+    separator = b' %d ' % marker
+    values = np.fromstring(separator.join(lines) + separator, dtype=dtype,
+                           sep=' ')
+    ends = np.flatnonzero(values == marker)
+    sizes = np.diff(ends, prepend=-1) - 1
+    return values[values != marker], sizes
+
+
+def _columns(lines, width):
+    # first width numbers of lines that all hold as many numbers
+    values = np.fromstring(b' '.join(lines), dtype=np.float32, sep=' ')
+    if len(values) % len(lines):
+        raise ValueError("vertex lines of different lengths")
+    return values.reshape(len(lines), -1)[:, :width]
+
+
+def _counted(lines):
+    # lines of k, k corners and maybe a colour: (corners, sizes)
+    values, length = _numbers(lines, np.float64, -1)
+    start = np.cumsum(length) - length
+    sizes = values[start].astype(np.int64)
+    taken = np.repeat(start + 1 - np.cumsum(sizes) + sizes, sizes) \
+        + np.arange(sizes.sum())
+    return values[taken].astype(np.int64), sizes
+
+
+def _padded(corners, sizes):
+    # (f, k) faces, -1 after the corners of faces under k
+    width = sizes.max() if len(sizes) else 3
+    if (sizes == width).all():
+        return corners.reshape(-1, width)
+    faces = np.full((len(sizes), width), -1, dtype=corners.dtype)
+    column = np.arange(len(corners)) - np.repeat(np.cumsum(sizes) - sizes,
+                                                 sizes)
+    faces[np.repeat(np.arange(len(sizes)), sizes), column] = corners
+    return faces
+
+
+def _index_dtype(count):
+    # signed, so -1 can pad
+    return np.int32 if count < 2 ** 31 else np.int64
+
+
+def _narrowed(values):
+    # blocks are kept until the end: int32 halves what they hold
+    return values.astype(_index_dtype(values.max() + 1 if len(values)
+                                      else 0))
+
+
+def _joined(parts, dtype, shape):
+    return np.concatenate(parts).astype(dtype, copy=False) if parts \
+        else np.empty(shape, dtype=dtype)
+
+
+def load_obj(path, check=None):
+    """(points, faces) of a Wavefront OBJ file: v and f lines only."""
+    points, corners, sizes = [], [], []
+    count = 0
+    with open(path, 'rb') as stream:
+        for lines in _blocks(stream, check):
+            kinds = [line[:2] for line in lines]
+            vertex = [line[2:] for line, kind in zip(lines, kinds)
+                      if kind == b'v ']
+            face = [line[2:] for line, kind in zip(lines, kinds)
+                    if kind == b'f ']
+            if face:
+                data = b'\n'.join(face)
+                if b'/' in data:
+                    # v/vt/vn: only the vertex is wanted
+                    face = re.sub(rb'/\S*', b'', data).split(b'\n')
+                values, size = _numbers(face, np.int64, 0)
+                if (values < 0).any():
+                    # -1 is the last vertex before the face's own line
+                    before = count + np.cumsum(
+                        [kind == b'v ' for kind in kinds])[
+                        [i for i, kind in enumerate(kinds) if kind == b'f ']]
+                    values = np.where(values < 0,
+                                      np.repeat(before, size) + values,
+                                      values - 1)
+                else:
+                    values -= 1
+                corners.append(_narrowed(values))
+                sizes.append(_narrowed(size))
+            if vertex:
+                points.append(_columns(vertex, 3))
+                count += len(vertex)
+    faces = _padded(_joined(corners, _index_dtype(count), 0),
+                    _joined(sizes, np.int32, 0))
+    return _joined(points, np.float32, (0, 3)), faces
+
+
+def _off_lines(lines):
+    # without comments and blank lines
+    lines = [line.split(b'#', 1)[0] for line in lines]
+    return [line for line in lines if line.strip()]
+
+
+def load_off(path, check=None):
+    """(points, faces) of an Object File Format file, colours ignored."""
+    with open(path, 'rb') as stream:
+        # OFF (or COFF, NOFF ...), then the counts, maybe on its line
+        words = []
+        while len(words) < 4:
+            line = stream.readline()
+            if not line:
+                raise ValueError("%s: no OFF header" % path)
+            words += line.split(b'#', 1)[0].split()
+        if not words[0].endswith(b'OFF'):
+            raise ValueError("%s: not an OFF file" % path)
+        vertex_count, face_count = int(words[1]), int(words[2])
+
+        points = np.empty((vertex_count, 3), dtype=np.float32)
+        corners, sizes = [], []
+        read = faces_read = 0
+        for lines in _blocks(stream, check):
+            lines = _off_lines(lines)
+            vertex = lines[:vertex_count - read]
+            if vertex:
+                points[read:read + len(vertex)] = _columns(vertex, 3)
+                read += len(vertex)
+            face = lines[len(vertex):][:face_count - faces_read]
+            if face:
+                corner, size = _counted(face)
+                corners.append(_narrowed(corner))
+                sizes.append(_narrowed(size))
+                faces_read += len(face)
+    if read < vertex_count or faces_read < face_count:
+        raise ValueError("%s: ends after %d of %d vertices, %d of %d faces"
+                         % (path, read, vertex_count, faces_read,
+                            face_count))
+    faces = _padded(_joined(corners, _index_dtype(vertex_count), 0),
+                    _joined(sizes, np.int32, 0))
+    return points, faces
+
+
+_ply_types = {
+    'char': 'i1', 'int8': 'i1', 'uchar': 'u1', 'uint8': 'u1',
+    'short': 'i2', 'int16': 'i2', 'ushort': 'u2', 'uint16': 'u2',
+    'int': 'i4', 'int32': 'i4', 'uint': 'u4', 'uint32': 'u4',
+    'float': 'f4', 'float32': 'f4', 'double': 'f8', 'float64': 'f8',
+}
+
+
+def _ply_header(stream, path):
+    # [(name, count, [(property, type) or (property, count, type)])]
+    if stream.readline().strip() != b'ply':
+        raise ValueError("%s: not a PLY file" % path)
+    form = None
+    elements = []
+    for line in stream:
+        words = line.decode('ascii').split()
+        if not words or words[0] in ('comment', 'obj_info'):
+            continue
+        if words[0] == 'end_header':
+            return form, elements, stream.tell()
+        if words[0] == 'format':
+            form = words[1]
+        elif words[0] == 'element':
+            elements.append((words[1], int(words[2]), []))
+        elif words[0] == 'property' and words[1] == 'list':
+            elements[-1][2].append((words[4], _ply_types[words[2]],
+                                    _ply_types[words[3]]))
+        elif words[0] == 'property':
+            elements[-1][2].append((words[2], _ply_types[words[1]]))
+    raise ValueError("%s: no end_header" % path)
+
+
+def _ply_faces(data, offset, count, size_type, index_type, path,
+               head=0, tail=0):
+    # (faces, bytes used): runs of faces with the size of the run's first
+    # face are read as one record array each, so a file of triangles is
+    # one view of the map, and mixed faces are copied run by run; head
+    # and tail are the bytes of other face properties before and after
+    # the list, stepped over
+    size_type, index_type = np.dtype(size_type), np.dtype(index_type)
+    if not count:
+        return np.empty((0, 3), dtype=np.intp), offset
+    runs = []
+    done = 0
+    while done < count:
+        fit = 0
+        if offset + head + size_type.itemsize <= len(data):
+            width = int(np.frombuffer(data, size_type, 1,
+                                      offset + head)[0])
+            record = np.dtype({
+                'names': ['size', 'corners'],
+                'formats': [size_type, (index_type, width)],
+                'offsets': [head, head + size_type.itemsize],
+                'itemsize': head + size_type.itemsize
+                + width * index_type.itemsize + tail})
+            fit = min(count - done, (len(data) - offset) // record.itemsize)
+        if not fit:
+            # cut short: not even the next face is all there
+            raise ValueError("%s: ends after %d of %d faces"
+                             % (path, done, count))
+        run = np.frombuffer(data, record, fit, offset)
+        wrong = np.flatnonzero(run['size'] != width)
+        if len(wrong):
+            run = run[:wrong[0]]
+        runs.append(run['corners'])
+        done += len(run)
+        offset += len(run) * record.itemsize
+    if len(runs) == 1:
+        return runs[0], offset
+    sizes = np.concatenate([np.full(len(run), run.shape[1]) for run in runs])
+    corners = np.concatenate([run.ravel() for run in runs])
+    return _padded(corners.astype(np.int64), sizes), offset
+
+
+def load_ply(path, check=None):
+    """(points, faces) of a PLY file.
+
+    Binary files are memory mapped: points is an (n, 3) view of the x, y
+    and z properties and, if every face has as many corners, faces a
+    view of their indices, neither copied until used.
+    """
+    with open(path, 'rb') as stream:
+        form, elements, offset = _ply_header(stream, path)
+        if form == 'ascii':
+            return _load_ply_ascii(stream, elements, path, check)
+    order = {'binary_little_endian': '<', 'binary_big_endian': '>'}[form]
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    points = faces = None
+    for name, count, properties in elements:
+        lists = [at for at, entry in enumerate(properties)
+                 if len(entry) == 3]
+        if lists:
+            if name != 'face':
+                raise ValueError("%s: list properties only in faces"
+                                 % path)
+            if len(lists) > 1:
+                raise ValueError("%s: faces with more than one list "
+                                 "property are not supported" % path)
+            # other face properties (colour, flags) are stepped over
+            at = lists[0]
+            _, size_type, index_type = properties[at]
+            head, tail = (sum(np.dtype(kind).itemsize
+                              for _, kind in part)
+                          for part in (properties[:at], properties[at + 1:]))
+            faces, offset = _ply_faces(data, offset, count,
+                                       order + size_type,
+                                       order + index_type, path,
+                                       head, tail)
+            continue
+        record = np.dtype([(prop, order + kind)
+                           for prop, kind in properties])
+        if offset + count * record.itemsize > len(data):
+            raise ValueError("%s: ends in %s" % (path, name))
+        if name == 'vertex':
+            rows = np.frombuffer(data, record, count, offset)
+            points = _xyz(rows)
+        offset += count * record.itemsize
+    if points is None or faces is None:
+        raise ValueError("%s: no vertex or no face element" % path)
+    return points, faces
+
+
+def _xyz(rows):
+    # x, y and z next to each other and alike: a view, else a copy
+    fields = rows.dtype.fields
+    kind, start = fields['x']
+    if fields['y'] == (kind, start + kind.itemsize) \
+            and fields['z'] == (kind, start + 2 * kind.itemsize):
+        return np.ndarray((len(rows), 3), kind, rows, start,
+                          (rows.dtype.itemsize, kind.itemsize))
+    return np.column_stack([rows['x'], rows['y'], rows['z']])
+
+
+def _load_ply_ascii(stream, elements, path, check):
+    points = faces = None
+    lines = (line for block in _blocks(stream, check) for line in block
+             if line.strip())
+    for name, count, properties in elements:
+        rows = list(islice(lines, count))
+        if len(rows) < count:
+            raise ValueError("%s: ends in %s" % (path, name))
+        if name == 'vertex':
+            names = [entry[0] for entry in properties]
+            table = _columns(rows, len(names))
+            points = table[:, [names.index(axis) for axis in 'xyz']]
+        elif name == 'face':
+            faces = _padded(*_counted(rows))
+    if points is None or faces is None:
+        raise ValueError("%s: no vertex or no face element" % path)
+    return points, faces
+
+
+def load(path, check=None):
+    """(points, faces) of an .obj, .off or .ply file.
+
+    points are (n, 3), float32 unless a PLY file says otherwise; faces
+    (f, k) indices into them, padded with -1 when faces differ in size.
+    check, if given, is called between blocks of the file.
+    """
+    kind = path[path.rfind('.'):].lower()
+    if kind not in formats:
+        raise ValueError("%s: not one of %s" % (path, ', '.join(formats)))
+    return {'.obj': load_obj, '.off': load_off, '.ply': load_ply}[kind](
+        path, check)
+
+
+def save(path, points, faces):
+    """Write points and (f, k) faces, -1 padded or not, by extension.
+
+    PLY is written binary little endian, OBJ and OFF as text.
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    faces = np.asarray(faces)
+    sizes = (faces >= 0).sum(axis=1)
+    corners = faces[faces >= 0]
+    kind = path[path.rfind('.'):].lower()
+    with open(path, 'wb') as stream:
+        if kind == '.ply':
+            stream.write(('ply\nformat binary_little_endian 1.0\n'
+                          'element vertex %d\nproperty float x\n'
+                          'property float y\nproperty float z\n'
+                          'element face %d\n'
+                          'property list uchar int vertex_indices\n'
+                          'end_header\n' % (len(points), len(faces)))
+                         .encode('ascii'))
+            points.astype('<f4').tofile(stream)
+            # every face a size byte then its corners, as one byte array
+            record = 1 + 4 * sizes
+            start = np.cumsum(record) - record
+            data = np.zeros(record.sum(), dtype=np.uint8)
+            data[start] = sizes
+            at = np.repeat(start + 1 - 4 * (np.cumsum(sizes) - sizes),
+                           sizes) + 4 * np.arange(len(corners))
+            quads = corners.astype('<i4').view(np.uint8).reshape(-1, 4)
+            for byte in range(4):
+                data[at + byte] = quads[:, byte]
+            data.tofile(stream)
+            return
+        if kind == '.off':
+            stream.write(b'OFF\n%d %d 0\n' % (len(points), len(faces)))
+            np.savetxt(stream, points, fmt='%.9g')
+            prefix, offset = '%d' % faces.shape[1], 0
+        elif kind == '.obj':
+            np.savetxt(stream, points, fmt='v %.9g %.9g %.9g')
+            prefix, offset = 'f', 1
+        else:
+            raise ValueError("%s: not one of %s"
+                             % (path, ', '.join(formats)))
+        if (sizes == faces.shape[1]).all():
+            np.savetxt(stream, faces + offset,
+                       fmt=prefix + ' %d' * faces.shape[1])
+        else:
+            for face in faces:
+                face = face[face >= 0] + offset
+                stream.write(('%s %s\n' % (
+                    prefix if offset else len(face),
+                    ' '.join(map(str, face)))).encode('ascii'))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Time loading mesh files, or write a geodesic sphere "
+                    "to one.")
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--write', help="a .obj, .off or .ply to write")
+    parser.add_argument('--frequency', type=int, default=512,
+                        help="of the sphere written; 512 makes 5.2 "
+                             "million faces")
+    args = parser.parse_args()
+
+    if args.write:
+        start = perf_counter()
+        points, triangles, _ = geodesic.sphere(args.frequency)
+        save(args.write, points, triangles)
+        print("wrote %d faces to %s in %.2f s"
+              % (len(triangles), args.write, perf_counter() - start))
+    for path in args.paths:
+        start = perf_counter()
+        points, faces = load(path)
+        took = perf_counter() - start
+        print("%s: %d points, %d faces of up to %d corners in %.2f s"
+              % (path, len(points), len(faces), faces.shape[1], took))
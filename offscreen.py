@@ -0,0 +1,150 @@
+import argparse
+import ctypes
+import os
+import runpy
+import sys
+
+import numpy as np
+import pyglet
+
+# no display needed: windows get an EGL surface instead, which on a box
+# without a GPU is Mesa's llvmpipe software rasterizer.
+# This has to happen before the first window is made.
+pyglet.options['headless'] = True
+
+from pyglet import gl  # noqa: E402
+
+
+""" OFFSCREEN """
+""" Run any of the scene scripts without a window or X server, and get
+    its frames back as NumPy arrays or PNG files.
+    The script sets up its program and batches as usual; its on_draw
+    then draws into an RGBA framebuffer, and update() is called with a
+    fixed time step, so the same frames come out on every run.
+    Usage: python offscreen.py compound_of_5_cubes.py --frames 60 --out shots
+"""
+
+
+class Framebuffer:
+    """Offscreen RGBA8 colour and 24 bit depth buffers."""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.fbo = gl.GLuint()
+        gl.glGenFramebuffers(1, ctypes.byref(self.fbo))
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.fbo)
+        self.renderbuffers = (gl.GLuint * 2)()
+        gl.glGenRenderbuffers(2, self.renderbuffers)
+        attachments = ((gl.GL_RGBA8, gl.GL_COLOR_ATTACHMENT0),
+                       (gl.GL_DEPTH_COMPONENT24, gl.GL_DEPTH_ATTACHMENT))
+        for renderbuffer, (storage, attachment) in zip(self.renderbuffers,
+                                                       attachments):
+            gl.glBindRenderbuffer(gl.GL_RENDERBUFFER, renderbuffer)
+            gl.glRenderbufferStorage(gl.GL_RENDERBUFFER, storage,
+                                     width, height)
+            gl.glFramebufferRenderbuffer(gl.GL_FRAMEBUFFER, attachment,
+                                         gl.GL_RENDERBUFFER, renderbuffer)
+        status = gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER)
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        if status != gl.GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("framebuffer incomplete: 0x%x" % status)
+
+    def bind(self):
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, self.fbo)
+        gl.glViewport(0, 0, self.width, self.height)
+
+    def unbind(self):
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+
+    def read(self, out=None):
+        """(height, width, 4) uint8 pixels, top row first."""
+        if out is None:
+            out = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        gl.glBindFramebuffer(gl.GL_READ_FRAMEBUFFER, self.fbo)
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+        gl.glReadPixels(0, 0, self.width, self.height, gl.GL_RGBA,
+                        gl.GL_UNSIGNED_BYTE, out.ctypes.data)
+        # OpenGL rows start at the bottom
+        return out[::-1]
+
+    def delete(self):
+        gl.glDeleteRenderbuffers(2, self.renderbuffers)
+        gl.glDeleteFramebuffers(1, ctypes.byref(self.fbo))
+
+
+def save_png(frame, path):
+    """Write a (height, width, 4) uint8 frame, top row first, as PNG."""
+    height, width = frame.shape[:2]
+    # pyglet images start at the bottom row
+    data = np.ascontiguousarray(frame[::-1]).tobytes()
+    pyglet.image.ImageData(width, height, 'RGBA', data).save(path)
+
+
+def load(script, argv=()):
+    """Run a scene script up to pyglet.app.run(), without entering it.
+
+    Returns (window, callbacks): the window it made and the functions it
+    scheduled on the clock.
+    """
+    callbacks = []
+    saved = (pyglet.app.run, pyglet.clock.schedule_interval,
+             pyglet.clock.schedule, sys.argv)
+    pyglet.app.run = lambda *args, **kwargs: None
+    pyglet.clock.schedule_interval = \
+        lambda func, interval, *args, **kwargs: callbacks.append(func)
+    pyglet.clock.schedule = \
+        lambda func, *args, **kwargs: callbacks.append(func)
+    sys.argv = [script] + list(argv)
+    # the scripts import geometry, shaders etc. from their own folder
+    sys.path.insert(0, os.path.dirname(os.path.abspath(script)))
+    try:
+        runpy.run_path(script, run_name='__main__')
+    finally:
+        (pyglet.app.run, pyglet.clock.schedule_interval,
+         pyglet.clock.schedule, sys.argv) = saved
+        sys.path.pop(0)
+    window = list(pyglet.app.windows)[-1]
+    return window, callbacks
+
+
+def frames(script, count, dt=1/60, argv=()):
+    """Yield count frames of a scene script as (height, width, 4) arrays.
+
+    Each frame is a fresh array; update() advances by dt before each.
+    """
+    window, callbacks = load(script, argv)
+    window.switch_to()
+    width, height = window.get_framebuffer_size()
+    target = Framebuffer(width, height)
+    try:
+        for _ in range(count):
+            for callback in callbacks:
+                callback(dt)
+            target.bind()
+            # straight to the handlers, there is no event loop to queue for
+            pyglet.event.EventDispatcher.dispatch_event(window, 'on_draw')
+            yield target.read()
+    finally:
+        target.unbind()
+        target.delete()
+        window.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Render a scene script to PNG files, no window needed.")
+    parser.add_argument('script')
+    parser.add_argument('--frames', type=int, default=1)
+    parser.add_argument('--dt', type=float, default=1/60,
+                        help="seconds between frames")
+    parser.add_argument('--out', default='frames')
+    args, script_args = parser.parse_known_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    name = os.path.splitext(os.path.basename(args.script))[0]
+    for number, frame in enumerate(frames(args.script, args.frames,
+                                          args.dt, script_args)):
+        path = os.path.join(args.out, '%s_%04d.png' % (name, number))
+        save_png(frame, path)
+        print(path)
@@ -0,0 +1,175 @@
+import functools
+from time import perf_counter
+
+import numpy as np
+import pyglet
+from pyglet.gl import GL_DEPTH_TEST, GL_LINES, GL_POINTS, GL_TRIANGLES
+from pyglet.gl import glDisable, glEnable, glIsEnabled
+from pyglet.window import key
+
+import timers
+
+
+""" OVERLAY """
+""" Frame timing drawn over a scene, shown and hidden with F3.
+    A rolling graph of the last frames: frame time in grey, the CPU
+    time of update() and on_draw in orange and the GPU time in green,
+    against a red 60 fps line. Below it the GPU time of every draw call
+    of a scene.Scene, from GL_TIME_ELAPSED queries.
+    While hidden it only costs a flag test per event and per draw call.
+    Make it after on_draw is set, and schedule update through timed():
+        hud = overlay.Overlay(window, layers)
+        pyglet.clock.schedule_interval(hud.timed(update), 1/60)
+"""
+
+# graph: samples kept, pixels per sample and per millisecond, and the
+# longest frame drawn in full, in milliseconds
+SAMPLES = 120
+BAR = 3
+SCALE = 4
+TOP = 70
+
+_mode_names = {GL_TRIANGLES: 'triangles', GL_LINES: 'lines',
+               GL_POINTS: 'points'}
+
+
+class Overlay:
+    """Timing overlay of a window, with per draw call timing of scene."""
+
+    def __init__(self, window, scene=None, toggle=key.F3):
+        self.window = window
+        self.scene = scene
+        self.toggle = toggle
+        self.shown = False
+        self.queries = None
+        self.frame = 0
+        # seconds per sample: frame interval, update, on_draw, GPU
+        self.times = np.zeros((4, SAMPLES))
+        self.draw_calls = {}
+        self.last = None
+        self.update_time = 0.0
+        self.draw_start = 0.0
+        self.text_due = 0.0
+        self.batch = None
+        # on top of the window's handlers: on_draw comes before the scene
+        # draws, on_refresh after
+        window.push_handlers(self)
+
+    def timed(self, update):
+        """update, also timed while the overlay is shown."""
+        @functools.wraps(update)
+        def timed_update(dt, *args, **kwargs):
+            if not self.shown:
+                return update(dt, *args, **kwargs)
+            start = perf_counter()
+            update(dt, *args, **kwargs)
+            self.update_time += perf_counter() - start
+        return timed_update
+
+    def show(self, shown=True):
+        self.shown = shown
+        if shown:
+            if self.batch is None:
+                self._create()
+            self.queries = timers.TimerQueries(32)
+            self.times[:] = 0
+            self.last = None
+        else:
+            # queries still in flight must finish before they are freed
+            self.queries.collect(wait=True)
+            self.queries.delete()
+            self.queries = None
+        if self.scene is not None:
+            # the scene times its draw calls through begin() and end()
+            self.scene.timer = self if shown else None
+
+    def watch(self, scene):
+        """Time the draw calls of scene from now on, instead."""
+        if self.scene is not None:
+            self.scene.timer = None
+        self.scene = scene
+        self.draw_calls = {}
+        if self.shown and scene is not None:
+            scene.timer = self
+
+    def begin(self, label):
+        self.queries.begin((self.frame, label))
+
+    def end(self):
+        self.queries.end()
+
+    def on_key_press(self, symbol, modifiers):
+        if symbol == self.toggle:
+            self.show(not self.shown)
+
+    def on_draw(self):
+        if self.shown:
+            self.draw_start = perf_counter()
+
+    def on_refresh(self, dt):
+        if not self.shown:
+            return
+        now = perf_counter()
+        column = self.frame % SAMPLES
+        self.times[:, column] = (0.0 if self.last is None
+                                 else now - self.last,
+                                 self.update_time, now - self.draw_start, 0.0)
+        self.last = now
+        self.update_time = 0.0
+        # draw calls of earlier frames, as the GPU finishes them
+        for (frame, mode), elapsed in self.queries.collect():
+            if frame > self.frame - SAMPLES:
+                self.times[3, frame % SAMPLES] += elapsed / 1e9
+            self.draw_calls[mode] = elapsed / 1e9
+        self.frame += 1
+        self._draw()
+
+    def _create(self):
+        self.batch = pyglet.graphics.Batch()
+        width = SAMPLES * BAR
+        # graph in the top left corner, text under it
+        base = self.window.height - TOP * SCALE - 10
+        self.back = pyglet.shapes.Rectangle(
+            0, base - 130, width + 20, TOP * SCALE + 140,
+            color=(0, 0, 0, 160), batch=self.batch)
+        # frame and CPU bars 2 pixels wide, GPU bars 1 pixel beside them
+        series = (((150, 150, 150, 255), 0, 2), ((255, 140, 0, 255), 0, 2),
+                  ((0, 200, 0, 255), 2, 1))
+        self.bars = [[pyglet.shapes.Rectangle(
+            10 + column * BAR + shift, base, bar_width, 0, color=color,
+            batch=self.batch) for column in range(SAMPLES)]
+            for color, shift, bar_width in series]
+        limit = base + 1000 / 60 * SCALE
+        self.limit = pyglet.shapes.Line(
+            10, limit, 10 + width, limit, color=(255, 0, 0, 255),
+            batch=self.batch)
+        self.label = pyglet.text.Label(
+            '', x=10, y=base - 10, width=width, multiline=True,
+            anchor_y='top', font_size=9, color=(255, 255, 255, 255),
+            batch=self.batch)
+
+    def _draw(self):
+        # oldest sample on the left
+        order = (np.arange(SAMPLES) + self.frame) % SAMPLES
+        frame, update, draw, gpu = self.times[:, order] * 1000 * SCALE
+        for bars, heights in zip(self.bars, (frame, update + draw, gpu)):
+            for bar, height in zip(bars, heights):
+                bar.height = min(height, TOP * SCALE)
+        now = perf_counter()
+        if now >= self.text_due:
+            # new text four times a second; layout is the costly part
+            self.text_due = now + 0.25
+            recent = self.times[:, order[-30:]].mean(axis=1) * 1000
+            lines = ["frame %.2f ms   update %.3f   draw %.3f   gpu %.3f"
+                     % tuple(recent)]
+            lines += ["  %-10s %.3f ms" % (_mode_names.get(mode, mode),
+                                           elapsed * 1000)
+                      for mode, elapsed in self.draw_calls.items()]
+            if self.scene is None:
+                lines.append("  no scene.Scene: draw calls are not timed")
+            self.label.text = '\n'.join(lines)
+        depth = glIsEnabled(GL_DEPTH_TEST)
+        glDisable(GL_DEPTH_TEST)
+        self.batch.draw()
+        if depth:
+            glEnable(GL_DEPTH_TEST)
@@ -0,0 +1,321 @@
+import argparse
+import importlib
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from types import SimpleNamespace
+
+import numpy as np
+import pyglet
+from pyglet.gl import GL_DEPTH_TEST, GL_LINES, GL_TRIANGLES
+from pyglet.gl import glClearColor, glEnable, glLineWidth, glPointSize
+from pyglet.math import Mat4, Vec3
+from pyglet.window import key
+
+import binaries
+import derive
+import geocache
+import geometry
+import meshfile
+import overlay
+import scene
+import shaders
+
+
+""" POLYHEDRA """
+""" One window for all the spinning scenes.
+    The scene scripts keep their layers, matrices and rates at module
+    level; a scene is imported the first time it is shown and its layers
+    built then, so starting up costs one import and one build. The
+    window, its GL context and the compiled programs are shared by every
+    scene, so switching is a few uniforms and, the first time, a build.
+    Builds run on a thread while the last scene keeps spinning, so a
+    large mesh file does not stop the window; its upload is then spread
+    over the frames that follow, a few milliseconds each, drawing what
+    has arrived (ref scene.py). Going on to another scene gives up a
+    build still running at its next step.
+    Left and right arrows go to the previous and next scene, F3 shows
+    frame timing (ref overlay.py).
+    A mesh file (ref meshfile.py) is shown as a scene of its own.
+    Usage: python -m polyhedra compound_of_10_tetrahedra
+           python -m polyhedra model.ply
+"""
+
+# in the order the arrow keys go through them
+scenes = ('compound_of_10_tetrahedra', 'compound_of_10_tetrahedra_2',
+          'compound_of_5_cubes', 'compound_of_5_tetrahedra', 'conway_solid',
+          'dodecahedron', 'dodecahedron_2', 'dodecahedron_3',
+          'dodecahedron_4', 'icosahedron', 'geodesic_sphere', 'octahedron',
+          'octahedron-mobius')
+
+_modules = {}
+
+
+def is_mesh_file(name):
+    return name.lower().endswith(meshfile.formats) and os.path.isfile(name)
+
+
+class Cancelled(Exception):
+    """A build given up because another scene was asked for."""
+
+
+def mesh_scene(path, size=180, face_colours=10 ** 6, check=None):
+    """A scene of a mesh file fitted into size pixels (the depth the
+    view keeps in front of the eye).
+
+    Up to face_colours triangles every face is coloured by the direction
+    it faces, each corner a vertex of its own; above that the vertices
+    are shared and coloured by direction, as geodesic_sphere.py.
+    check is called between the steps, and may raise to give up.
+    """
+    check = check or (lambda: None)
+    points, faces = meshfile.load(path, check)
+    check()
+    if not len(points) or not len(faces):
+        raise ValueError("%s: no faces" % path)
+    points = np.asarray(points, dtype=np.float32)
+    points = points - (points.min(axis=0) + points.max(axis=0)) / 2
+    points *= size / np.sqrt(np.einsum('ij,ij->i', points, points).max())
+    triangles = faces if faces.shape[1] == 3 else derive.triangulate(faces)
+    check()
+    # the points of a file are distinct already, nothing to merge
+    layers = scene.Scene(merge=False)
+    if len(triangles) <= face_colours:
+        corners = points[triangles]
+        normals = np.cross(corners[:, 1] - corners[:, 0],
+                           corners[:, 2] - corners[:, 0])
+        lengths = np.linalg.norm(normals, axis=1)
+        normals /= np.where(lengths > 0, lengths, 1)[:, None]
+        colors = np.full((len(triangles), 4), 255, dtype=np.uint8)
+        colors[:, :3] = np.abs(normals) * 255
+        layers.add(GL_TRIANGLES, corners, np.repeat(colors, 3, axis=0))
+    else:
+        colors = np.full((len(points), 4), 255, dtype=np.uint8)
+        colors[:, :3] = np.abs(points) / size * 255
+        layers.add(GL_TRIANGLES, points, colors, triangles)
+    return _scene(os.path.basename(path), layers)
+
+
+def _scene(caption, layers):
+    # what a scene module holds, for scenes made here
+    view_mat = Mat4.from_translation(Vec3(x=0, y=0, z=-200))
+    proj_mat = Mat4.orthogonal_projection(left=0, right=1280,
+                                          bottom=0, top=720,
+                                          z_near=0.1, z_far=1000)
+    return SimpleNamespace(
+        caption=caption, layers=layers, vp=proj_mat @ view_mat,
+        translate_mat=Mat4.from_translation(vector=Vec3(x=640, y=360, z=0)),
+        rates=(0.2, 0.5, 0.1))
+
+
+def placeholder():
+    """The icosahedron's edges, shown until the first scene is built."""
+    layers = scene.Scene()
+    layers.add(GL_LINES, geometry.vertices('icosahedron', 60),
+               (160, 160, 160, 255), geometry.edges('icosahedron'))
+    return _scene("building", layers)
+
+
+def prepare(name, cancel=None):
+    """Scene name loaded and its layers prepared, all but the upload.
+
+    Runs on the viewer's build thread, so it makes no GL calls. Once the
+    threading.Event cancel is set, the build raises Cancelled at its
+    next step.
+    """
+    def check():
+        if cancel is not None and cancel.is_set():
+            raise Cancelled(name)
+
+    module = load(name, check)
+    if module.layers.vao is None:
+        module.layers.prepare(check)
+    return module
+
+
+def load(name, check=None):
+    """The scene module called name, imported on first use, or the
+    scene of a mesh file (check as mesh_scene)."""
+    if name not in _modules:
+        if is_mesh_file(name):
+            _modules[name] = mesh_scene(name, check=check)
+        elif name not in scenes:
+            raise KeyError("no scene %r, try one of: %s"
+                           % (name, ', '.join(scenes)))
+        else:
+            _modules[name] = importlib.import_module(name)
+    return _modules[name]
+
+
+class Viewer:
+    """The window, and the scene it shows.
+
+    Scenes are built on a thread of their own while the window keeps
+    drawing the one before (or placeholder()), and swapped in by update()
+    once built; only the upload is left to the main thread, which owns
+    the GL context, and a large one is streamed in by update() a chunk
+    at a time.
+    """
+
+    def __init__(self, name):
+        self.window = pyglet.window.Window(1280, 720)
+        glEnable(GL_DEPTH_TEST)
+        # set window background colour
+        glClearColor(1.0, 1.0, 1.0, 1.0)
+        # programs by fragment source; every scene spins in the shader
+        self.programs = {}
+        self.hud = None
+        self.time = 0
+        # one thread: a build queued behind another can still be cancelled
+        self.builder = ThreadPoolExecutor(1)
+        # (name, start, future, cancel event) of the scene being built
+        self.building = None
+        self.window.push_handlers(self)
+        waiting = placeholder()
+        waiting.layers.build()
+        self.swap('placeholder', waiting, perf_counter())
+        self.show(name)
+
+    def program(self, fragment):
+        if fragment not in self.programs:
+            self.programs[fragment] = shaders.create_program(
+                shaders.spin_vertex_source, fragment)
+        return self.programs[fragment]
+
+    def show(self, name):
+        """Go to scene name: at once if it was built before, else once
+        it is (ref update). A build name replaces is dropped if it has
+        not started, and one already running gives up at its next step,
+        so the thread is free for name."""
+        self.target = name
+        if self.building is not None:
+            self.building[2].cancel()
+            self.building[3].set()
+            self.building = None
+        module = _modules.get(name)
+        if module is not None and module.layers.vao is not None:
+            self.swap(name, module, perf_counter())
+            return
+        self.window.set_caption("%s (building %s)"
+                                % (getattr(self.module, 'caption', ''),
+                                   name))
+        cancel = threading.Event()
+        self.building = (name, perf_counter(),
+                         self.builder.submit(prepare, name, cancel), cancel)
+
+    def wait(self):
+        """Swap in the scene being built, waiting for it if need be, and
+        upload all of it."""
+        if self.building is not None:
+            # blocks until it is done; its error, if any, comes from poll
+            self.building[2].exception()
+            self.poll()
+        self.module.layers.stream(budget=None)
+
+    def poll(self):
+        """Swap in the scene being built if it is ready."""
+        if self.building is None or not self.building[2].done():
+            return
+        name, start, future, _ = self.building
+        self.building = None
+        try:
+            module = future.result()
+        except (OSError, ValueError, KeyError) as error:
+            print("%s not built: %s" % (name, error), file=sys.stderr)
+            self.target = self.name
+            self.window.set_caption(getattr(self.module, 'caption',
+                                            self.name))
+            return
+        module.layers.upload(stream=True)
+        self.swap(name, module, start)
+
+    def swap(self, name, module, start):
+        """Show module, a built scene, from now on."""
+        self.name = name
+        self.module = module
+        self.current = self.program(getattr(module, 'fragment',
+                                            shaders.fragment_source))
+        glLineWidth(getattr(module, 'line_width', 1))
+        glPointSize(getattr(module, 'point_size', 1))
+        self.window.set_caption(getattr(module, 'caption', name))
+        self.current['vp'] = module.vp
+        self.current['model'] = module.translate_mat
+        self.current['rates'] = module.rates
+        self.current['axis'] = getattr(module, 'axis', (0, 0, 1))
+        self.current['axis_rate'] = getattr(module, 'axis_rate', 0)
+        # each scene starts from where its script started
+        self.time = 0
+        self.current['time'] = self.time
+        if self.hud is not None:
+            self.hud.watch(module.layers)
+        if name != 'placeholder':
+            # stderr, as export.py may be writing frames to stdout
+            print("%s in %.1f ms" % (name, (perf_counter() - start) * 1000),
+                  file=sys.stderr)
+
+    def on_draw(self):
+        self.window.clear()
+        self.current.use()
+        if hasattr(self.module, 'before_draw'):
+            self.module.before_draw(self.current)
+        self.module.layers.draw()
+        self.current.stop()
+        if hasattr(self.module, 'after_draw'):
+            self.module.after_draw()
+
+    def on_key_press(self, symbol, modifiers):
+        if symbol in (key.LEFT, key.RIGHT):
+            step = 1 if symbol == key.RIGHT else -1
+            # from a mesh file, to the first or the last scene
+            position = scenes.index(self.target) \
+                if self.target in scenes else -1 if step > 0 else 0
+            self.show(scenes[(position + step) % len(scenes)])
+
+    def update(self, dt):
+        self.time += dt
+        self.poll()
+        # uniforms are uploaded here, as in the scripts, not in on_draw
+        self.current['time'] = self.time
+        self.module.layers.stream()
+
+
+# the window keeps weak references to its handlers
+viewer = None
+
+
+def main(argv=None):
+    global viewer
+    parser = argparse.ArgumentParser(
+        prog='python -m polyhedra',
+        description="Show the spinning scenes in one window; left and "
+                    "right arrows switch scenes, F3 shows timing.")
+    parser.add_argument('scene', nargs='?', default=scenes[0],
+                        help="a scene name, or an .obj, .off or .ply file")
+    parser.add_argument('--list', action='store_true',
+                        help="print the scene names and exit")
+    args = parser.parse_args(argv)
+    if args.list:
+        print('\n'.join(scenes))
+        return
+    if args.scene not in scenes and not is_mesh_file(args.scene):
+        parser.error("no scene or mesh file %r, try --list" % args.scene)
+
+    start = perf_counter()
+    viewer = Viewer(args.scene)
+    if args.scene in scenes:
+        # scene modules build in milliseconds, and offscreen.py and
+        # export.py render them from the first frame
+        viewer.wait()
+    # F3 shows frame and draw call timing (ref overlay.py)
+    viewer.hud = overlay.Overlay(viewer.window, viewer.module.layers)
+    print("started in %.1f ms, %s, %s"
+          % ((perf_counter() - start) * 1000, binaries.report(),
+             geocache.report()), file=sys.stderr)
+    pyglet.clock.schedule_interval(viewer.hud.timed(viewer.update), 1/60)
+    pyglet.app.run()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,368 @@
+import argparse
+import importlib
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+import pyglet
+
+# only pyglet's constants, maths and PNG writer are used, never a GL
+# context, so no window may be made behind our back
+pyglet.options['shadow_window'] = False
+
+from pyglet.gl import GL_LINES, GL_POINTS, GL_TRIANGLES  # noqa: E402
+from pyglet.math import Mat4, Vec3  # noqa: E402
+
+import geometry  # noqa: E402
+import shaders  # noqa: E402
+
+
+""" RASTER """
+""" Stills of the scenes drawn on the CPU with NumPy, for machines with
+    no OpenGL at all.
+    Takes the same layers a scene.Scene is given, the same proj_mat @
+    view_mat @ model matrix, and fills a depth buffer the way
+    GL_DEPTH_TEST does: nearest fragment wins, and of equal depths the
+    one drawn first. Work is vectorized over all primitives and all the
+    pixels they cover at once.
+    Colours are blended across every primitive from its vertices, as
+    GL does, and a scene drawn with shaders.face_fragment_source gets
+    its face_colors table; a scene with any other fragment shader is
+    refused. What after_draw() adds (the label of dodecahedron_3) is not
+    drawn.
+    Usage: python raster.py compound_of_10_tetrahedra [--time 2.5]
+"""
+
+# candidate pixels handled at a time, bounds the memory used
+CHUNK = 1 << 22
+
+# a fragment key holds depth (24 bits, as a GL depth buffer) above the
+# primitive number (32 bits); primitives are numbered in draw order, so
+# the smallest key at a pixel is the fragment GL would keep
+_DEPTH_SCALE = (1 << 24) - 1
+_EMPTY = np.iinfo(np.int64).max
+
+_primitive_size = {GL_TRIANGLES: 3, GL_LINES: 2, GL_POINTS: 1}
+
+
+def _matrix(mat):
+    # pyglet Mat4 is stored column by column
+    return np.array(mat, dtype=np.float64).reshape(4, 4).T
+
+
+def to_window(positions, mvp, width, height):
+    """(n, 3) window x, y in pixels from bottom left, and depth 0..1."""
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    clip = positions @ _matrix(mvp)[:3, :3].T + _matrix(mvp)[:3, 3]
+    # orthographic, so w stays 1
+    return np.column_stack([(clip[:, 0] + 1) * (width / 2),
+                            (clip[:, 1] + 1) * (height / 2),
+                            (clip[:, 2] + 1) / 2])
+
+
+def _ranges(count):
+    # owner of each candidate and its position within the owner's range
+    owner = np.repeat(np.arange(len(count)), count)
+    local = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count,
+                                               count)
+    return owner, local
+
+
+def _chunks(count):
+    # slices of primitives covering at most CHUNK candidates each
+    ends = np.cumsum(count)
+    start = 0
+    while start < len(count):
+        base = ends[start - 1] if start else 0
+        stop = max(np.searchsorted(ends, base + CHUNK, side='right'),
+                   start + 1)
+        yield slice(start, stop)
+        start = stop
+
+
+def _triangle_fragments(corners, width, height):
+    # corners (t, 3, 3) in window space; yields (triangle, pixel, depth)
+    x, y, z = corners[:, :, 0], corners[:, :, 1], corners[:, :, 2]
+    area = ((x[:, 1] - x[:, 0]) * (y[:, 2] - y[:, 0])
+            - (y[:, 1] - y[:, 0]) * (x[:, 2] - x[:, 0]))
+    keep = area != 0
+    x, y, z, area = x[keep], y[keep], z[keep], area[keep]
+    number = np.flatnonzero(keep)
+    # barycentric weight of each corner as a plane a x + b y + c
+    a = np.stack([y[:, 1] - y[:, 2], y[:, 2] - y[:, 0],
+                  y[:, 0] - y[:, 1]], axis=1) / area[:, None]
+    b = np.stack([x[:, 2] - x[:, 1], x[:, 0] - x[:, 2],
+                  x[:, 1] - x[:, 0]], axis=1) / area[:, None]
+    c = np.stack([x[:, 1] * y[:, 2] - y[:, 1] * x[:, 2],
+                  x[:, 2] * y[:, 0] - y[:, 2] * x[:, 0],
+                  x[:, 0] * y[:, 1] - y[:, 0] * x[:, 1]],
+                 axis=1) / area[:, None]
+    # depth is a plane too
+    depth_x = np.einsum('ij,ij->i', a, z)
+    depth_y = np.einsum('ij,ij->i', b, z)
+    depth_0 = np.einsum('ij,ij->i', c, z)
+
+    # every pixel row crossed by a triangle, through pixel centres
+    y0 = np.clip(np.ceil(y.min(axis=1) - 0.5), 0, height).astype(np.int64)
+    y1 = np.clip(np.floor(y.max(axis=1) - 0.5), -1,
+                 height - 1).astype(np.int64)
+    triangle, local = _ranges(np.maximum(y1 - y0 + 1, 0))
+    row = y0[triangle] + local
+    cy = row + 0.5
+
+    # along a row each weight is a x + (b y + c) >= 0, which bounds x
+    # from one side; the span is what all three bounds leave
+    with np.errstate(divide='ignore', invalid='ignore'):
+        at = a[triangle]
+        bound = -(b[triangle] * cy[:, None] + c[triangle]) / at
+    flat = at == 0
+    lower = np.where(at > 0, bound, -np.inf).max(axis=1)
+    upper = np.where(at < 0, bound, np.inf).min(axis=1)
+    # a weight that does not change along the row is all or nothing
+    outside = (flat & ((b[triangle] * cy[:, None] + c[triangle]) < 0)
+               ).any(axis=1)
+    first = np.maximum(np.ceil(lower - 0.5), 0)
+    last = np.minimum(np.floor(upper - 0.5), width - 1)
+    count = np.where(outside, 0, np.maximum(last - first + 1, 0))
+    count = count.astype(np.int64)
+    first = first.astype(np.int64)
+    start = row * width + first
+    depth_row = (depth_y[triangle] * cy + depth_0[triangle]
+                 + depth_x[triangle] * (first + 0.5))
+    slope = depth_x[triangle]
+    triangle = number[triangle]
+
+    for part in _chunks(count):
+        span, local = _ranges(count[part])
+        span += part.start
+        yield (triangle[span], start[span] + local,
+               depth_row[span] + slope[span] * local)
+
+
+def _line_fragments(ends, line_width, width, height):
+    # ends (l, 2, 3); a wide line is repeated across its minor axis,
+    # as aliased GL lines are
+    delta = ends[:, 1] - ends[:, 0]
+    steps = np.ceil(np.abs(delta[:, :2]).max(axis=1)).astype(np.int64)
+    x_major = np.abs(delta[:, 0]) >= np.abs(delta[:, 1])
+    count = (steps + 1) * line_width
+    for part in _chunks(count):
+        line, local = _ranges(count[part])
+        line += part.start
+        step = local // line_width
+        across = local % line_width - (line_width - 1) // 2
+        t = step / np.maximum(steps[line], 1)
+        point = ends[line, 0] + t[:, None] * delta[line]
+        px = np.floor(point[:, 0]).astype(np.int64)
+        py = np.floor(point[:, 1]).astype(np.int64)
+        major = x_major[line]
+        py += np.where(major, across, 0)
+        px += np.where(major, 0, across)
+        inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+        yield (line[inside], py[inside] * width + px[inside],
+               point[inside, 2])
+
+
+def _weights(mode, corners, x, y):
+    # how much each corner's colour counts at window points x, y, as GL
+    # blends colours across a primitive
+    if mode == GL_TRIANGLES:
+        # corners seen from the point, and the area each pair spans
+        u = corners[:, :, 0] - x[:, None]
+        v = corners[:, :, 1] - y[:, None]
+        weights = np.roll(u, -1, axis=1) * np.roll(v, -2, axis=1) \
+            - np.roll(v, -1, axis=1) * np.roll(u, -2, axis=1)
+        area = weights.sum(axis=1)
+        # pixels a line's width or a rounding away from the triangle
+        weights = np.clip(weights / area[:, None], 0, None)
+        return weights / weights.sum(axis=1)[:, None]
+    if mode == GL_LINES:
+        delta = corners[:, 1, :2] - corners[:, 0, :2]
+        offset = np.stack([x, y], axis=1) - corners[:, 0, :2]
+        length = np.einsum('ij,ij->i', delta, delta)
+        t = np.clip(np.einsum('ij,ij->i', offset, delta)
+                    / np.where(length > 0, length, 1), 0, 1)
+        return np.stack([1 - t, t], axis=1)
+    return np.ones((len(corners), 1))
+
+
+def _point_fragments(centres, point_size, width, height):
+    # square points of point_size pixels
+    count = np.full(len(centres), point_size * point_size)
+    corner = np.floor(centres[:, :2] - point_size / 2 + 0.5).astype(np.int64)
+    for part in _chunks(count):
+        point, local = _ranges(count[part])
+        point += part.start
+        px = corner[point, 0] + local % point_size
+        py = corner[point, 1] + local // point_size
+        inside = (px >= 0) & (px < width) & (py >= 0) & (py < height)
+        yield (point[inside], py[inside] * width + px[inside],
+               centres[point[inside], 2])
+
+
+def render(layers, mvp, width=1280, height=720,
+           background=(255, 255, 255, 255), line_width=1, point_size=1,
+           face_colors=None, triangles_per_face=1):
+    """(height, width, 4) uint8 frame, top row first.
+
+    layers are (mode, positions, colors, indices) as in scene.Scene;
+    like Scene.draw() all triangles are drawn first, then all lines,
+    then all points, in the order the modes first appear. With
+    face_colors, primitive i of each mode is coloured face_colors[i //
+    triangles_per_face], as shaders.face_fragment_source does.
+    """
+    # aliased GL lines and points are a whole number of pixels, at least 1
+    line_width = max(1, int(round(line_width)))
+    point_size = max(1, int(round(point_size)))
+    modes = list(dict.fromkeys(layer[0] for layer in layers))
+    keys = np.full(width * height, _EMPTY, dtype=np.int64)
+    # (mode, number of its first primitive, corners, corner colours)
+    drawn_modes = []
+    first = 0
+    for mode in modes:
+        size = _primitive_size[mode]
+        corners = []
+        colors = []
+        for layer_mode, positions, layer_colors, indices in layers:
+            if layer_mode != mode:
+                continue
+            positions = np.asarray(positions).reshape(-1, 3)
+            layer_colors = np.broadcast_to(
+                np.asarray(layer_colors, dtype=np.uint8).reshape(-1, 4),
+                (len(positions), 4))
+            indices = np.asarray(indices, dtype=np.intp).reshape(-1, size)
+            corners.append(to_window(positions, mvp, width, height)[indices])
+            colors.append(layer_colors[indices])
+        corners = np.concatenate(corners)
+        colors = np.concatenate(colors)
+        if face_colors is not None:
+            # gl_PrimitiveID counts from 0 in every draw call, one a mode
+            table = np.asarray(face_colors, dtype=np.uint8).reshape(-1, 4)
+            face = np.minimum(np.arange(len(corners)) // triangles_per_face,
+                              len(table) - 1)
+            colors = np.repeat(table[face][:, None], size, axis=1)
+        drawn_modes.append((mode, first, corners, colors))
+        if mode == GL_TRIANGLES:
+            fragments = _triangle_fragments(corners, width, height)
+        elif mode == GL_LINES:
+            fragments = _line_fragments(corners, line_width, width, height)
+        else:
+            fragments = _point_fragments(corners[:, 0], point_size,
+                                         width, height)
+        for primitive, pixel, depth in fragments:
+            # outside the near and far planes
+            keep = (depth >= 0) & (depth <= 1)
+            key = (np.round(depth[keep] * _DEPTH_SCALE).astype(np.int64)
+                   << 32) | (primitive[keep] + first)
+            np.minimum.at(keys, pixel[keep], key)
+        first += len(corners)
+
+    frame = np.empty((width * height, 4), dtype=np.uint8)
+    frame[:] = background
+    pixel = np.flatnonzero(keys != _EMPTY)
+    winner = keys[pixel] & 0xFFFFFFFF
+    for mode, first, corners, colors in drawn_modes:
+        mine = (winner >= first) & (winner < first + len(corners))
+        number = winner[mine] - first
+        # colours blended at the pixel centres
+        weights = _weights(mode, corners[number], pixel[mine] % width + 0.5,
+                           pixel[mine] // width + 0.5)
+        blend = np.einsum('ij,ijk->ik', weights, colors[number])
+        frame[pixel[mine]] = np.clip(np.round(blend), 0, 255)
+    # rows were counted from the bottom, as in OpenGL
+    return frame.reshape(height, width, 4)[::-1]
+
+
+def render_scene(module, time=0.0, width=1280, height=720):
+    """Frame of a scene module such as compound_of_10_tetrahedra at time.
+
+    The module gives layers, vp, translate_mat and rates, and optionally
+    axis, axis_rate, line_width and point_size, as the spinning scenes do.
+    A scene with fragment = shaders.face_fragment_source gives
+    face_colors and triangles_per_face too; other fragment shaders, and
+    a before_draw() without that one, raise ValueError.
+    """
+    fragment = getattr(module, 'fragment', shaders.fragment_source)
+    face_colors = None
+    triangles_per_face = 1
+    if fragment == shaders.face_fragment_source:
+        face_colors = module.face_colors
+        triangles_per_face = module.triangles_per_face
+    elif fragment != shaders.fragment_source \
+            or hasattr(module, 'before_draw'):
+        raise ValueError("%s sets up its own shading, which raster.py "
+                         "cannot follow" % module.__name__)
+    model = module.translate_mat @ shaders.spin_matrix(
+        module.rates, time, getattr(module, 'axis', (0, 0, 1)),
+        getattr(module, 'axis_rate', 0))
+    return render(module.layers.layers, module.vp @ model, width, height,
+                  line_width=getattr(module, 'line_width', 1),
+                  point_size=getattr(module, 'point_size', 1),
+                  face_colors=face_colors,
+                  triangles_per_face=triangles_per_face)
+
+
+def solid_layers(name, scale=100):
+    """Faces and edges of a geometry.py solid, faces in four colours."""
+    palette = np.array([(0, 0, 255, 255), (255, 127, 0, 255),
+                        (255, 0, 0, 255), (255, 255, 0, 255)],
+                       dtype=np.uint8)
+    faces = geometry.faces(name)
+    # corners of each face apart, so every face keeps its own colour
+    positions = geometry.vertices(name, scale=scale)[faces].reshape(-1, 3)
+    colors = np.repeat(palette[np.arange(len(faces)) % 4], faces.shape[1],
+                       axis=0)
+    k = faces.shape[1]
+    fan = np.stack([np.zeros(k - 2, dtype=np.intp), np.arange(1, k - 1),
+                    np.arange(2, k)], axis=1)
+    triangles = (np.arange(len(faces))[:, None, None] * k + fan).ravel()
+    return [
+        (GL_TRIANGLES, positions, colors, triangles),
+        (GL_LINES, geometry.vertices(name, scale=scale),
+         (60, 60, 60, 255), geometry.edges(name)),
+    ]
+
+
+def save_png(frame, path):
+    """Write a (height, width, 4) uint8 frame, top row first, as PNG."""
+    height, width = frame.shape[:2]
+    data = np.ascontiguousarray(frame[::-1]).tobytes()
+    pyglet.image.ImageData(width, height, 'RGBA', data).save(path)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Draw stills without OpenGL. Scenes are modules "
+                    "such as compound_of_10_tetrahedra; with none, "
+                    "every solid of geometry.py is drawn.")
+    parser.add_argument('scenes', nargs='*')
+    parser.add_argument('--time', type=float, default=0.0)
+    parser.add_argument('--size', type=int, nargs=2, default=(1280, 720))
+    parser.add_argument('--out', default='stills')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    width, height = args.size
+    jobs = [(name, None) for name in args.scenes] or \
+        [(name, solid_layers(name)) for name in geometry.names()]
+    for name, layers in jobs:
+        start = perf_counter()
+        if layers is None:
+            module = importlib.import_module(name.removesuffix('.py'))
+            try:
+                frame = render_scene(module, args.time, width, height)
+            except ValueError as error:
+                print("%s skipped: %s" % (name, error), file=sys.stderr)
+                continue
+        else:
+            vp = (Mat4.orthogonal_projection(0, width, 0, height, 0.1, 1000)
+                  @ Mat4.from_translation(Vec3(0, 0, -200))
+                  @ Mat4.from_translation(Vec3(width / 2, height / 2, 0))
+                  @ shaders.spin_matrix((1.0, 0.3, 0.7), 0.5 + args.time))
+            frame = render(layers, vp, width, height, line_width=3)
+        took = perf_counter() - start
+        path = os.path.join(args.out, name.removesuffix('.py') + '.png')
+        save_png(frame, path)
+        print("%s %.1f ms" % (path, took * 1000))
@@ -0,0 +1,269 @@
+import ctypes
+from time import perf_counter
+
+import numpy as np
+from pyglet.gl import GL_ELEMENT_ARRAY_BUFFER
+from pyglet.gl import glBindVertexArray, glDrawElements
+
+import buffers
+import derive
+
+
+""" SCENE """
+""" Face, edge and point layers of a scene merged into one buffer.
+    Every layer used to be its own vertex list, uploading the same
+    vertices again next to its own colour array. Here the layers are
+    collected, repeated (position, colour) pairs are stored once in an
+    interleaved buffer, and the indices are sorted by primitive type so
+    each type is drawn with a single call.
+    A scene too large to upload in one frame can be streamed: its
+    buffers are made empty, stream() fills them a chunk at a time within
+    a budget per frame, and draw() shows every index whose vertices are
+    already there. Vertices are numbered in the order the indices first
+    use them, so what is drawable grows with what is uploaded.
+"""
+
+# interleaved layout: 12 bytes of position then 4 bytes of colour
+vertex_dtype = np.dtype([('position', np.float32, 3),
+                         ('color', np.uint8, 4)])
+
+# bytes per glBufferSubData call when streaming
+CHUNK = 1 << 22
+# seconds of uploads stream() does per frame, a quarter of one at 60 Hz
+BUDGET = 0.004
+
+
+class Scene:
+    """Layers added with add(), then build() once before drawing.
+
+    build() is prepare(), which only works on arrays and so may run on
+    another thread, then upload(), which needs the GL context.
+
+    merge=False keeps every vertex as added, for layers whose vertices
+    are known to be distinct (a loaded mesh file): merging millions of
+    them costs a sort.
+
+    upload(stream=True) only makes the buffers; stream() then fills
+    them over the next frames.
+    """
+
+    def __init__(self, merge=True):
+        self.merge = merge
+        self.layers = []
+        self.ranges = []
+        self.vertex_count = 0
+        self.vao = None
+        # anything with begin(label) and end(), e.g. an overlay.Overlay
+        self.timer = None
+        self._buffers = []
+        self._prepared = None
+        # (vertices, indices, running max of the indices, vertices and
+        # indices uploaded) while stream() has more to do
+        self._streaming = None
+        # indices draw() may use, None once all are uploaded
+        self._drawable = None
+
+    def add(self, mode, vertices, color, indices=None):
+        """Add a layer drawn as mode (GL_TRIANGLES, GL_LINES, ...).
+
+        color is one (r, g, b, a) for the whole layer or one per vertex.
+        Without indices every vertex is drawn once, in order.
+        """
+        positions = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+        colors = np.broadcast_to(
+            np.asarray(color, dtype=np.uint8).reshape(-1, 4),
+            (len(positions), 4))
+        if indices is None:
+            indices = np.arange(len(positions))
+        self.layers.append((mode, positions, colors,
+                            np.asarray(indices, dtype=np.intp).ravel()))
+        return self
+
+    def build(self):
+        """Upload the merged vertices and indices, ready for draw()."""
+        return self.prepare().upload()
+
+    def prepare(self, check=None):
+        """Merge the vertices and group the indices, once; no GL calls.
+
+        check, if given, is called between the steps; whatever it raises
+        gives the work up, to be done again by the next prepare().
+        """
+        if self._prepared is not None:
+            return self
+        check = check or (lambda: None)
+        sizes = [len(positions) for _, positions, _, _ in self.layers]
+        starts = np.cumsum([0] + sizes)
+        records = np.empty(starts[-1], dtype=vertex_dtype)
+        # + 0.0 so -0.0 and 0.0 are the same bytes
+        records['position'] = np.concatenate(
+            [positions for _, positions, _, _ in self.layers]) + 0.0
+        records['color'] = np.concatenate(
+            [colors for _, _, colors, _ in self.layers])
+
+        check()
+        if self.merge:
+            # one copy of every (position, colour) pair
+            keys = records.view(np.dtype((np.void, vertex_dtype.itemsize)))
+            _, first, inverse = np.unique(keys, return_index=True,
+                                          return_inverse=True)
+            # keep the pairs in the order they were added
+            order = np.argsort(first)
+            remap = np.empty_like(order)
+            remap[order] = np.arange(len(order))
+            inverse = remap[inverse.ravel()]
+            vertices = records[first[order]]
+        else:
+            inverse = np.arange(len(records))
+            vertices = records
+        check()
+        self.vertex_count = len(vertices)
+
+        # indices grouped by mode, modes in the order they first appear
+        modes = list(dict.fromkeys(mode for mode, _, _, _ in self.layers))
+        grouped = []
+        ranges = []
+        dtype = derive.index_dtype(len(vertices))
+        offset = 0
+        for mode in modes:
+            indices = np.concatenate([
+                inverse[start + layer_indices]
+                for start, (layer_mode, _, _, layer_indices)
+                in zip(starts, self.layers) if layer_mode == mode])
+            grouped.append(indices)
+            ranges.append((mode, len(indices),
+                           offset * np.dtype(dtype).itemsize))
+            offset += len(indices)
+        indices = np.concatenate(grouped).astype(dtype)
+        check()
+        prefix = None
+        if vertices.nbytes > CHUNK:
+            # number the vertices in the order the indices first use
+            # them, so the first k vertices serve a long run of indices;
+            # fancy assignment keeps the last write, hence the reversal
+            position = derive.index_dtype(len(indices) + 1)
+            first = np.full(len(vertices), len(indices), dtype=position)
+            first[indices[::-1]] = np.arange(len(indices),
+                                             dtype=position)[::-1]
+            order = np.argsort(first, kind='stable')
+            del first
+            remap = np.empty(len(order), dtype=dtype)
+            remap[order] = np.arange(len(order), dtype=dtype)
+            check()
+            vertices = vertices[order]
+            indices = remap[indices]
+            # the highest vertex each run of indices needs
+            prefix = np.maximum.accumulate(indices)
+        self._prepared = (vertices, indices, ranges, prefix)
+        return self
+
+    def upload(self, stream=False):
+        """Upload what prepare() worked out, ready for draw().
+
+        With stream, a scene larger than a chunk gets empty buffers of
+        its size, for stream() to fill.
+        """
+        vertices, indices, ranges, prefix = self.prepare()._prepared
+        stream = stream and prefix is not None
+        self.delete()
+        self.vao = buffers.create_vertex_array()
+        if stream:
+            vertex_buffer = buffers.create_buffer(size=vertices.nbytes)
+        else:
+            vertex_buffer = buffers.create_buffer(vertices)
+        stride = vertex_dtype.itemsize
+        buffers.attribute(0, vertex_buffer, 3, np.float32, stride,
+                          vertex_dtype.fields['position'][1])
+        buffers.attribute(1, vertex_buffer, 4, np.uint8, stride,
+                          vertex_dtype.fields['color'][1], normalize=True)
+        if stream:
+            index_buffer = buffers.create_buffer(
+                size=indices.nbytes, target=GL_ELEMENT_ARRAY_BUFFER)
+        else:
+            index_buffer = buffers.create_buffer(
+                indices, target=GL_ELEMENT_ARRAY_BUFFER)
+        glBindVertexArray(0)
+        self._buffers = [vertex_buffer, index_buffer]
+        self.ranges = ranges
+        self._index_type = buffers.gl_type(indices.dtype)
+        self._index_size = indices.itemsize
+        if stream:
+            self._streaming = [vertices, indices, prefix, 0, 0]
+            self._drawable = 0
+        # the driver has its own copy now, or stream() has the arrays
+        self._prepared = None
+        return self
+
+    def stream(self, budget=BUDGET):
+        """Upload chunks of a streamed scene for up to budget seconds
+        (all of it for None); True while there is more to come."""
+        if self._streaming is None:
+            return False
+        vertices, indices, prefix, vertex_done, index_done = \
+            self._streaming
+        vertex_buffer, index_buffer = self._buffers
+        vertex_chunk = CHUNK // vertex_dtype.itemsize
+        index_chunk = CHUNK // indices.itemsize
+        start = perf_counter()
+        # binding the index buffer outside this vao would rebind
+        # whichever vao is bound
+        glBindVertexArray(self.vao)
+        while index_done < len(indices) and (
+                budget is None or perf_counter() - start < budget):
+            end = min(index_done + index_chunk, len(indices))
+            if vertex_done <= prefix[end - 1]:
+                # the vertices the next indices need come first
+                stop = min(vertex_done + vertex_chunk, len(vertices))
+                buffers.upload(vertex_buffer, vertices[vertex_done:stop],
+                               vertex_done * vertex_dtype.itemsize)
+                vertex_done = stop
+            else:
+                buffers.upload(index_buffer, indices[index_done:end],
+                               index_done * indices.itemsize,
+                               target=GL_ELEMENT_ARRAY_BUFFER)
+                index_done = end
+        glBindVertexArray(0)
+        if index_done == len(indices):
+            # vertices no index uses are never needed
+            self._streaming = None
+            self._drawable = None
+            return False
+        self._streaming[3:] = vertex_done, index_done
+        # indices up to the first one naming a vertex not yet uploaded;
+        # the last vertex as prefix's own dtype, or searchsorted would
+        # convert all of prefix to compare
+        ready = 0
+        if vertex_done:
+            ready = int(np.searchsorted(
+                prefix, prefix.dtype.type(vertex_done - 1), side='right'))
+        self._drawable = min(index_done, ready)
+        return True
+
+    def draw(self):
+        """One draw call per primitive type; the program must be in use."""
+        glBindVertexArray(self.vao)
+        for mode, count, offset in self.ranges:
+            if self._drawable is not None:
+                # while streaming, the part of this range uploaded
+                first = offset // self._index_size
+                count = max(0, min(count, self._drawable - first))
+                if not count:
+                    continue
+            if self.timer is not None:
+                self.timer.begin(mode)
+            glDrawElements(mode, count, self._index_type,
+                           ctypes.c_void_p(offset))
+            if self.timer is not None:
+                self.timer.end()
+        glBindVertexArray(0)
+
+    def delete(self):
+        """Free the buffers of the last build()."""
+        for buffer in self._buffers:
+            buffers.delete_buffer(buffer)
+        if self.vao is not None:
+            buffers.delete_vertex_array(self.vao)
+        self._buffers = []
+        self.vao = None
+        self._streaming = None
+        self._drawable = None
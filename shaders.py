@@ -0,0 +1,121 @@
+from pyglet.math import Mat4, Vec3
+
+import binaries
+
+
+""" SHADERS """
+""" The vertex and fragment sources every scene uses, and a spinning
+    variant that turns the solid on the GPU.
+    With spin_vertex_source the rotation is worked out per vertex from a
+    time uniform, so update() only uploads one float a frame however
+    many solids share the program.
+    face_fragment_source colours whole faces from a small buffer of face
+    colours, so a solid needs no colour per vertex and no repeated
+    vertices to carry them.
+"""
+
+# create the vertex source and fragment source
+vertex_source = """
+#version 330
+layout(location = 0) in vec3 vertices;
+layout(location = 1) in vec4 colors;
+
+out vec4 newColor;
+
+uniform mat4 vp;
+uniform mat4 model;
+
+void main()
+{
+    gl_Position = vp * model * vec4(vertices, 1.0f);
+    newColor = colors;
+}
+"""
+
+# model * R(axis, axis_rate * time)
+#       * Rx(rates.x * time) * Ry(rates.y * time) * Rz(rates.z * time),
+# the same turns the scripts used to build with Mat4.from_rotation
+spin_vertex_source = """
+#version 330
+layout(location = 0) in vec3 vertices;
+layout(location = 1) in vec4 colors;
+
+out vec4 newColor;
+
+uniform mat4 vp;
+uniform mat4 model;
+uniform float time;
+uniform vec3 rates;
+uniform vec3 axis;
+uniform float axis_rate;
+
+void main()
+{
+    vec3 a = rates * time;
+    vec3 c = cos(a);
+    vec3 s = sin(a);
+    // matrices are given column by column
+    mat3 rotate_x = mat3(1.0, 0.0, 0.0, 0.0, c.x, s.x, 0.0, -s.x, c.x);
+    mat3 rotate_y = mat3(c.y, 0.0, -s.y, 0.0, 1.0, 0.0, s.y, 0.0, c.y);
+    mat3 rotate_z = mat3(c.z, s.z, 0.0, -s.z, c.z, 0.0, 0.0, 0.0, 1.0);
+    vec3 position = rotate_x * rotate_y * rotate_z * vertices;
+    if (axis_rate != 0.0) {
+        // Rodrigues' formula
+        vec3 k = normalize(axis);
+        float turn = axis_rate * time;
+        position = position * cos(turn) + cross(k, position) * sin(turn)
+                   + k * dot(k, position) * (1.0 - cos(turn));
+    }
+    gl_Position = vp * model * vec4(position, 1.0f);
+    newColor = colors;
+}
+"""
+
+fragment_source = """
+#version 330
+in vec4 newColor;
+
+out vec4 outColor;
+
+void main()
+{
+    outColor = newColor;
+}
+"""
+
+# colour of the face a fragment belongs to: triangles are numbered in
+# draw order, and every face is drawn as triangles_per_face triangles
+face_fragment_source = """
+#version 330
+uniform sampler2D face_colors;
+uniform int triangles_per_face;
+
+out vec4 outColor;
+
+void main()
+{
+    // the colour table is 1024 colours to a row (ref buffers.py)
+    int face = gl_PrimitiveID / triangles_per_face;
+    outColor = texelFetch(face_colors, ivec2(face % 1024, face / 1024), 0);
+}
+"""
+
+
+def create_program(vertex=vertex_source, fragment=fragment_source):
+    """Compile vertex source and fragment source into a shader program.
+
+    A program compiled on an earlier run is loaded instead (ref binaries.py).
+    """
+    return binaries.program(vertex, fragment)
+
+
+def spin_matrix(rates, time, axis=(0, 0, 1), axis_rate=0):
+    """The rotation spin_vertex_source applies, as a Mat4 on the CPU."""
+    rotate_x_mat = Mat4.from_rotation(angle=rates[0] * time,
+                                      vector=Vec3(x=1, y=0, z=0))
+    rotate_y_mat = Mat4.from_rotation(angle=rates[1] * time,
+                                      vector=Vec3(x=0, y=1, z=0))
+    rotate_z_mat = Mat4.from_rotation(angle=rates[2] * time,
+                                      vector=Vec3(x=0, y=0, z=1))
+    turn_mat = Mat4.from_rotation(angle=axis_rate * time, vector=Vec3(*axis))
+    return turn_mat @ rotate_x_mat @ rotate_y_mat @ rotate_z_mat
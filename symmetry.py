@@ -0,0 +1,195 @@
+from functools import lru_cache
+from math import cos, pi, sin, sqrt
+
+import numpy as np
+
+
+""" SYMMETRY """
+""" Rotation groups of the tetrahedron, octahedron (cube) and icosahedron
+    (dodecahedron) as stacked (k, 3, 3) matrices, and compounds built by
+    turning one seed solid with every rotation in a single batched matmul.
+    The groups are in the orientation of geometry.py: the dodecahedron
+    vertices are (+-1, +-1, +-1) and the cyclic shifts of (0, +-phi, +-1/phi).
+"""
+
+g = (1.0 + sqrt(5.0)) / 2.0                 # approx 1.618
+
+
+def _axis_rotation(axis, angle):
+    # Rodrigues' formula
+    x, y, z = np.asarray(axis, dtype=np.float64) / np.linalg.norm(axis)
+    k = np.array([[0, -z, y], [z, 0, -x], [-y, x, 0]])
+    return np.eye(3) + sin(angle) * k + (1 - cos(angle)) * k @ k
+
+
+# turn about the (1, 1, 1) diagonal: (x, y, z) -> (z, x, y)
+_cycle = np.array([[0., 0., 1.], [1., 0., 0.], [0., 1., 0.]])
+# half turn about the z axis
+_flip = np.diag([-1., -1., 1.])
+
+_generators = {
+    'tetrahedral': [_cycle, _flip],
+    'octahedral': [_cycle, _flip, _axis_rotation((0, 0, 1), pi / 2)],
+    # fifth turn about the centre of a dodecahedron face
+    'icosahedral': [_cycle, _flip, _axis_rotation((0, 1, g), 2 * pi / 5)],
+}
+
+
+def _keys(rows, decimals):
+    # rounding gives equal rows equal keys (and + 0.0 turns -0.0 into 0.0)
+    return np.round(rows, decimals) + 0.0
+
+
+def _distinct(matrices, decimals=6):
+    keys = _keys(matrices.reshape(len(matrices), -1), decimals)
+    _, first = np.unique(keys, axis=0, return_index=True)
+    return matrices[np.sort(first)]
+
+
+@lru_cache(maxsize=None)
+def rotations(name):
+    """(k, 3, 3) rotations: tetrahedral 12, octahedral 24, icosahedral 60.
+
+    The identity is always first. The group is closed up from its
+    generators, multiplying all known elements by all generators at once.
+    """
+    generators = np.stack(_generators[name])
+    group = np.eye(3)[None]
+    while True:
+        products = (generators[:, None] @ group[None]).reshape(-1, 3, 3)
+        larger = _distinct(np.concatenate([group, products]))
+        if len(larger) == len(group):
+            break
+        group = larger
+    group.flags.writeable = False
+    return group
+
+
+def with_inversion(group):
+    """The group together with its mirror images through the centre."""
+    return np.concatenate([group, -group])
+
+
+def orbit(points, group):
+    """(k, n, 3) copies of (n, 3) points, one per matrix of the group."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    # row vectors, so every point is multiplied by each transposed matrix
+    return points[None] @ np.swapaxes(group, 1, 2)
+
+
+def cosets(points, group, decimals=4):
+    """Indices into group of one rotation per distinct image of points.
+
+    Two rotations give the same compound member when they differ by a
+    symmetry of the seed, so one representative is kept per coset.
+    """
+    images = orbit(points, group)
+    # a member is the same set of points whatever order they come in
+    keys = _keys(images, decimals)
+    order = np.lexsort(keys.transpose(2, 0, 1)[::-1], axis=-1)
+    keys = np.take_along_axis(keys, order[..., None], axis=1)
+    _, first = np.unique(keys.reshape(len(keys), -1), axis=0,
+                         return_index=True)
+    return np.sort(first)
+
+
+def compound(seed, group, decimals=4):
+    """(m, n, 3) vertices of every distinct member of a compound.
+
+    The seed itself comes first when the group starts with the identity.
+    """
+    images = orbit(seed, group)
+    return images[cosets(seed, group, decimals)]
+
+
+def indices_into(rows, pool, decimals=4):
+    """Index into pool of every row of rows, matched after rounding.
+
+    Works for any row width, e.g. (..., 3) points into a vertex array.
+    Raises ValueError when a row is not in pool.
+    """
+    pool = np.asarray(pool, dtype=np.float64)
+    rows = np.asarray(rows, dtype=np.float64)
+    width = pool.shape[-1]
+    flat = rows.reshape(-1, width)
+    keys = _keys(np.concatenate([pool.reshape(-1, width), flat]), decimals)
+    _, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    size = len(keys) - len(flat)
+    lookup = np.full(inverse.max() + 1, -1, dtype=np.intp)
+    lookup[inverse[:size][::-1]] = np.arange(size)[::-1]
+    found = lookup[inverse[size:]]
+    if (found < 0).any():
+        raise ValueError("rows not found in pool")
+    return found.reshape(rows.shape[:-1])
+
+
+def permutations(points, group, decimals=4):
+    """The matrices of group that map points onto themselves, as moves.
+
+    Returns ((m, n) index of the image of every point under each of
+    them, (m,) their indices into group). Their images are a subgroup,
+    so m is 1 (the identity) for points with no symmetry in group.
+    Coordinates match within 10^-decimals.
+    """
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    images = orbit(points, group)
+    tolerance = 10.0 ** -decimals
+    # a coordinate becomes the number of its cluster of close values on
+    # its axis, so every row is one integer. Clusters rather than
+    # rounding: two copies of a value either side of a rounding boundary
+    # would round apart
+    found = np.ones(images.shape[:2], dtype=bool)
+    codes = np.zeros(len(points), dtype=np.int64)
+    image_codes = np.zeros(images.shape[:2], dtype=np.int64)
+    for axis in range(3):
+        values = np.sort(points[:, axis])
+        cluster = np.cumsum(np.diff(values, prepend=-np.inf) > tolerance) - 1
+        own = cluster[np.searchsorted(values, points[:, axis])]
+        # the nearer of the values either side of every image coordinate
+        coordinate = images[..., axis]
+        above = np.minimum(np.searchsorted(values, coordinate),
+                           len(values) - 1)
+        below = np.maximum(above - 1, 0)
+        nearest = np.where(np.abs(values[below] - coordinate)
+                           < np.abs(values[above] - coordinate), below, above)
+        found &= np.abs(values[nearest] - coordinate) <= tolerance
+        codes = codes * (cluster[-1] + 1) + own
+        image_codes = image_codes * (cluster[-1] + 1) + cluster[nearest]
+    order = np.argsort(codes, kind='stable')
+    at = np.minimum(np.searchsorted(codes[order], image_codes),
+                    len(points) - 1)
+    found &= codes[order][at] == image_codes
+    kept = np.flatnonzero(found.all(axis=1))
+    return order[at[kept]], kept
+
+
+def orbits(permutation):
+    """(n,) lowest index in the orbit of every point, from permutations.
+
+    The images of a point under a group are its whole orbit, so their
+    lowest index names the orbit.
+    """
+    return permutation.min(axis=0)
+
+
+if __name__ == '__main__':
+    import geometry
+
+    icosahedral = rotations('icosahedral')
+    for name in ('tetrahedral', 'octahedral', 'icosahedral'):
+        print(name, len(rotations(name)))
+
+    dodecahedron = geometry.vertices('dodecahedron')
+    cubes = compound(geometry.vertices('cube'), icosahedral)
+    print("cubes:", len(cubes))
+    print(indices_into(cubes, dodecahedron))
+
+    tetrahedron = geometry.vertices('tetrahedron')
+    print("tetrahedra:", len(compound(tetrahedron, icosahedral)),
+          len(compound(tetrahedron, with_inversion(icosahedral))))
+    # turned about its own 3-fold axis the seed loses the symmetry it
+    # shared with the dodecahedron, giving the compounds of 20 and 40
+    twisted = tetrahedron @ _axis_rotation((1, 1, 1), 0.2).T
+    print("twisted tetrahedra:", len(compound(twisted, icosahedral)),
+          len(compound(twisted, with_inversion(icosahedral))))
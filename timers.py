@@ -0,0 +1,69 @@
+import ctypes
+from collections import deque
+
+from pyglet import gl
+
+
+""" TIMERS """
+""" GPU time of draw calls, from GL_TIME_ELAPSED queries.
+    A query's result is ready only once the GPU has caught up, a frame
+    or two later. Asking for it sooner waits for the GPU, which is the
+    stall being measured, so results are collected only when available
+    and queries are reused from a small ring.
+"""
+
+
+class TimerQueries:
+    """Ring of size timer queries; begin() / end() around GL calls."""
+
+    def __init__(self, size=8):
+        self.size = size
+        self.ids = (gl.GLuint * size)()
+        gl.glGenQueries(size, self.ids)
+        self.free = list(range(size))
+        self.pending = deque()
+        self.active = None
+        self.results = []
+
+    def begin(self, label=None):
+        """Start timing; queries do not nest, end() the last one first."""
+        if not self.free:
+            # every query still in flight: wait for the oldest
+            self._take(self.pending.popleft())
+        index = self.free.pop()
+        gl.glBeginQuery(gl.GL_TIME_ELAPSED, self.ids[index])
+        self.active = (index, label)
+
+    def end(self):
+        gl.glEndQuery(gl.GL_TIME_ELAPSED)
+        self.pending.append(self.active)
+        self.active = None
+
+    def collect(self, wait=False):
+        """(label, nanoseconds) of finished queries, oldest first.
+
+        Without wait only results already available are taken.
+        """
+        available = gl.GLint()
+        while self.pending:
+            index, _ = self.pending[0]
+            if not wait:
+                gl.glGetQueryObjectiv(self.ids[index],
+                                      gl.GL_QUERY_RESULT_AVAILABLE,
+                                      ctypes.byref(available))
+                if not available.value:
+                    break
+            self._take(self.pending.popleft())
+        results, self.results = self.results, []
+        return results
+
+    def _take(self, query):
+        index, label = query
+        elapsed = gl.GLuint64()
+        gl.glGetQueryObjectui64v(self.ids[index], gl.GL_QUERY_RESULT,
+                                 ctypes.byref(elapsed))
+        self.free.append(index)
+        self.results.append((label, elapsed.value))
+
+    def delete(self):
+        gl.glDeleteQueries(self.size, self.ids)
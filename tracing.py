@@ -0,0 +1,169 @@
+import argparse
+import atexit
+import functools
+import json
+import os
+import runpy
+import signal
+import sys
+import threading
+from contextlib import contextmanager
+from time import perf_counter_ns
+
+import pyglet
+from pyglet.graphics.shader import Shader, ShaderProgram
+
+import binaries
+import buffers
+
+
+""" TRACING """
+""" Spans of on_draw, update() and the other scheduled functions, buffer
+    uploads and shader compiles, kept in a ring buffer and written out
+    as Chrome trace JSON, for chrome://tracing or ui.perfetto.dev.
+    The ring holds the last capacity spans, so a long run keeps its most
+    recent minutes in a fixed amount of memory. It is written when the
+    program exits, and on SIGUSR1 without stopping it.
+    Usage: python tracing.py compound_of_10_tetrahedra.py --out trace.json
+"""
+
+
+class Tracer:
+    """Ring buffer of (name, start, duration, thread) spans, in ns."""
+
+    def __init__(self, capacity=1 << 20):
+        self.capacity = capacity
+        self.spans = [None] * capacity
+        self.count = 0
+        self.origin = perf_counter_ns()
+        # scene builds record spans from their own thread too; reentrant,
+        # as SIGUSR1 may dump from the main thread in the middle of add
+        self.lock = threading.RLock()
+
+    def add(self, name, start, duration):
+        span = (name, start, duration, threading.get_native_id())
+        with self.lock:
+            self.spans[self.count % self.capacity] = span
+            self.count += 1
+
+    @contextmanager
+    def span(self, name):
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.add(name, start, perf_counter_ns() - start)
+
+    def wrap(self, func, name=None):
+        """func, recording a span named name (its own name by default)."""
+        name = name or func.__name__
+
+        @functools.wraps(func)
+        def traced(*args, **kwargs):
+            start = perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, start, perf_counter_ns() - start)
+        return traced
+
+    def events(self):
+        """The spans held, oldest first, as Chrome trace events."""
+        with self.lock:
+            if self.count <= self.capacity:
+                spans = self.spans[:self.count]
+            else:
+                cut = self.count % self.capacity
+                spans = self.spans[cut:] + self.spans[:cut]
+        pid = os.getpid()
+        # timestamps and durations in microseconds
+        return [{'name': name, 'ph': 'X', 'pid': pid, 'tid': thread,
+                 'ts': (start - self.origin) / 1000, 'dur': duration / 1000}
+                for name, start, duration, thread in spans]
+
+    def dump(self, path):
+        """Write the spans held to path as Chrome trace JSON."""
+        trace = {'traceEvents': self.events(), 'displayTimeUnit': 'ms',
+                 'otherData': {'spans': self.count,
+                               'dropped': max(0, self.count - self.capacity)}}
+        with open(path, 'w') as file:
+            json.dump(trace, file)
+
+
+def install(tracer):
+    """Trace windows' events, scheduled functions, uploads and shaders.
+
+    Call before the window is made and the functions scheduled.
+    """
+    # on_draw, on_key_press... of every window
+    window_class = pyglet.window.Window
+    dispatch_event = window_class.dispatch_event
+
+    def traced_dispatch(window, event_type, *args):
+        start = perf_counter_ns()
+        try:
+            return dispatch_event(window, event_type, *args)
+        finally:
+            tracer.add(event_type, start, perf_counter_ns() - start)
+
+    window_class.dispatch_event = traced_dispatch
+    # the buffer swap, where waiting for vsync or the GPU shows up
+    window_class.flip = tracer.wrap(window_class.flip, 'flip')
+
+    # update() and any other function put on the clock
+    for name in ('schedule', 'schedule_interval', 'schedule_once'):
+        schedule = getattr(pyglet.clock, name)
+
+        def traced_schedule(func, *args, schedule=schedule, **kwargs):
+            return schedule(tracer.wrap(func), *args, **kwargs)
+        setattr(pyglet.clock, name, traced_schedule)
+
+    # uploads, both the buffers.py ones and pyglet's vertex lists
+    buffers.create_buffer = tracer.wrap(buffers.create_buffer)
+    buffers.upload = tracer.wrap(buffers.upload)
+    for name in ('vertex_list', 'vertex_list_indexed'):
+        setattr(ShaderProgram, name,
+                tracer.wrap(getattr(ShaderProgram, name), name))
+
+    # compiling and linking
+    Shader.__init__ = tracer.wrap(Shader.__init__, 'compile shader')
+    ShaderProgram.__init__ = tracer.wrap(ShaderProgram.__init__,
+                                         'link program')
+    # the programs of shaders.create_program(), linked or loaded
+    binaries.CachedProgram.__init__ = tracer.wrap(
+        binaries.CachedProgram.__init__, 'link program')
+
+
+def dump_on_exit(tracer, path):
+    """Write the trace at exit, on SIGTERM, and on SIGUSR1 as well."""
+    atexit.register(tracer.dump, path)
+
+    def on_term(signum, frame):
+        # exits through atexit
+        sys.exit(128 + signum)
+
+    signal.signal(signal.SIGTERM, on_term)
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1,
+                      lambda signum, frame: tracer.dump(path))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Run a scene script, recording a Chrome trace.")
+    parser.add_argument('script')
+    parser.add_argument('--out', default='trace.json')
+    parser.add_argument('--capacity', type=int, default=1 << 20,
+                        help="spans kept, the oldest are dropped first")
+    args, script_args = parser.parse_known_args()
+
+    tracer = Tracer(args.capacity)
+    install(tracer)
+    dump_on_exit(tracer, args.out)
+    sys.argv = [args.script] + script_args
+    # the scripts import geometry, shaders etc. from their own folder
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    try:
+        runpy.run_path(args.script, run_name='__main__')
+    except KeyboardInterrupt:
+        pass